@@ -4,7 +4,7 @@ __version__ = "2.0.1"
 =================================================
 
 """
-from .moran import (Moran, Moran_BV, Moran_BV_matrix,
+from .moran import (Moran, Moran_BV, Moran_BV_matrix, Moran_Batch,
                     Moran_Local, Moran_Local_BV, 
                     Moran_Rate, Moran_Local_Rate)
 from .getisord import G, G_Local
@@ -0,0 +1,165 @@
+"""
+Batched conditional randomization for local spatial autocorrelation statistics
+
+"""
+import multiprocessing as mp
+import numpy as np
+from .permutation import _get_rng
+
+__all__ = ['crand_lags']
+
+# upper bound on the number of elements (observations x permutations x
+# neighbors) held in memory when evaluating a single block
+CHUNK_ELEMENTS = 2 ** 22
+
+# shared state for worker processes, set by _init_worker
+_Z = None
+_RIDS = None
+
+
+def _randint(rng, high, size):
+    """Draw integers on [0, high) with either a RandomState or a Generator."""
+    if hasattr(rng, 'integers'):
+        return rng.integers(0, high, size=size)
+    return rng.randint(0, high, size=size)
+
+
+def _sample_ids(rng, n, k, size):
+    """
+    Draw ``size`` samples of ``k`` distinct ids out of ``range(n)``.
+
+    For small k relative to n, samples are drawn with replacement and the
+    (rare) rows holding duplicates are redrawn. Otherwise full permutations
+    are truncated.
+
+    Returns
+    -------
+    ids     : array (size, k)
+    """
+    if k == 0:
+        return np.zeros((size, 0), dtype=int)
+    if k * k >= n:
+        return np.array([rng.permutation(n)[:k] for i in range(size)])
+    ids = _randint(rng, n, (size, k))
+    while True:
+        s = np.sort(ids, axis=1)
+        dups = (s[:, 1:] == s[:, :-1]).any(axis=1)
+        ndups = dups.sum()
+        if not ndups:
+            return ids
+        ids[dups] = _randint(rng, n, (ndups, k))
+
+
+def _init_worker(z, rids):
+    global _Z, _RIDS
+    _Z = z
+    _RIDS = rids
+
+
+def _lag_block(args):
+    """
+    Permuted spatial lags for a block of observations sharing a cardinality.
+
+    Parameters
+    ----------
+    args    : tuple
+              (obs, weights) where obs is an (m,) array of observation
+              indices and weights an (m, k) array of their neighbor weights
+
+    Returns
+    -------
+    lags    : array (m, permutations)
+    """
+    obs, weights = args
+    k = weights.shape[1]
+    rids = _RIDS[:, :k]
+    # skip i as a candidate neighbor of itself: ids are drawn from n-1
+    # values and those at or above i are shifted up by one
+    ids = rids[None, :, :] + (rids[None, :, :] >= obs[:, None, None])
+    return np.einsum('mpk,mk->mp', _Z[ids], weights)
+
+
+def crand_lags(w, z, permutations, n_jobs=1, chunksize=None, seed=None):
+    """
+    Spatial lags of z under conditional randomization.
+
+    For each observation i with k_i neighbors, each permutation assigns k_i
+    values of z drawn without replacement from all observations but i and
+    weights them with the row of w for i. A single matrix of random ids is
+    drawn for all observations; observations are then grouped by
+    cardinality and evaluated in blocks, so the work is done with array
+    operations rather than a loop over observations.
+
+    Parameters
+    ----------
+    w            : W
+                   spatial weights instance, already transformed
+    z            : array
+                   (n,) values to be conditionally permuted
+    permutations : int
+                   number of random permutations
+    n_jobs       : int
+                   number of processes used to evaluate the blocks. -1 uses
+                   all available cores.
+    chunksize    : int
+                   maximum number of observations per block. If None, it is
+                   set so that each block holds at most CHUNK_ELEMENTS
+                   permuted values.
+    seed         : None, int, RandomState or Generator
+                   source of randomness. Results do not depend on n_jobs or
+                   chunksize for a given seed.
+
+    Returns
+    -------
+    lags         : array
+                   (n, permutations) conditionally randomized spatial lags
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from pysal.lib.weights import lat2W
+    >>> from pysal.explore.esda.crand import crand_lags
+    >>> w = lat2W(5, 5)
+    >>> w.transform = 'r'
+    >>> z = np.arange(25.)
+    >>> lags = crand_lags(w, z, 99, seed=12345)
+    >>> lags.shape
+    (25, 99)
+    >>> np.allclose(lags, crand_lags(w, z, 99, seed=12345, chunksize=3))
+    True
+    """
+    z = np.asarray(z, dtype=float).flatten()
+    n = z.shape[0]
+    sp = w.sparse.tocsr()
+    indptr = sp.indptr
+    data = sp.data
+    cardinalities = np.diff(indptr)
+    kmax = cardinalities.max() if n else 0
+    rng = _get_rng(seed)
+    rids = _sample_ids(rng, n - 1, kmax, permutations)
+
+    blocks = []
+    for k in np.unique(cardinalities):
+        if k == 0:
+            continue
+        obs = np.flatnonzero(cardinalities == k)
+        weights = data[indptr[obs][:, None] + np.arange(k)]
+        m = chunksize or max(1, CHUNK_ELEMENTS // (permutations * k))
+        for start in range(0, obs.shape[0], m):
+            blocks.append((obs[start:start + m], weights[start:start + m]))
+
+    lags = np.zeros((n, permutations))
+    if n_jobs == -1:
+        n_jobs = mp.cpu_count()
+    if n_jobs > 1 and len(blocks) > 1:
+        P = mp.Pool(n_jobs, initializer=_init_worker, initargs=(z, rids))
+        results = P.map(_lag_block, blocks)
+        P.close()
+        P.join()
+    else:
+        _init_worker(z, rids)
+        results = [_lag_block(block) for block in blocks]
+    _init_worker(None, None)
+    for (obs, weights), block_lags in zip(blocks, results):
+        lags[obs] = block_lags
+    return lags
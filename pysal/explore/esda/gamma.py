@@ -8,6 +8,7 @@ __author__ = "Luc Anselin <luc.anselin@asu.edu> Serge Rey <sjsrey@gmail.com>"
 import numpy as np
 from pysal.lib.weights.spatial_lag import lag_spatial
 from .tabular import _univariate_handler
+from .permutation import simulate, BATCH_ELEMENTS
 
 __all__ = ['Gamma']
 
@@ -37,6 +38,13 @@ class Gamma(object):
                       'yes' or 'y' standardize to mean zero and variance one
     permutations    : int
                       number of random permutations for calculation of pseudo-p_values
+    n_jobs          : int
+                      number of processes to distribute the permutations
+                      over, -1 for all cores. A user defined operation must
+                      be picklable to be used with n_jobs > 1.
+    seed            : None, int, RandomState or Generator
+                      seed for the permutations. If None the global numpy
+                      random state is used.
 
     Attributes
     ----------
@@ -157,7 +165,8 @@ class Gamma(object):
 
 
     """
-    def __init__(self, y, w, operation='c', standardize='no', permutations=PERMUTATIONS):
+    def __init__(self, y, w, operation='c', standardize='no', permutations=PERMUTATIONS,
+                 n_jobs=1, seed=None):
         y = np.asarray(y).flatten()
         self.w = w
         self.y = y
@@ -172,9 +181,13 @@ class Gamma(object):
         self.g = self.__calc(self.y, self.op)
 
         if permutations:
-            sim = [self.__calc(np.random.permutation(self.y), self.op)
-                   for i in range(permutations)]
-            self.sim_g = np.array(sim)
+            batchsize = None
+            if self.op == 'a':
+                # absolute differences are evaluated link by link
+                batchsize = max(1, BATCH_ELEMENTS // max(self.w.sparse.nnz, 1))
+            self.sim_g = simulate(self._calc_batch, self.y, permutations,
+                                  n_jobs=n_jobs, batchsize=batchsize,
+                                  seed=seed)
             self.min_g = np.min(self.sim_g)
             self.mean_g = np.mean(self.sim_g)
             self.max_g = np.max(self.sim_g)
@@ -223,6 +236,25 @@ class Gamma(object):
             g = zs.sum()
         return g
 
+    def _calc_batch(self, Z):
+        """Gamma for each column of an (n, b) array of permuted y."""
+        op = self.op
+        sparse = self.w.sparse
+        if op == 'c':
+            return (Z * (sparse * Z)).sum(0)
+        elif op == 's':
+            wsum = (np.asarray(sparse.sum(1)).flatten() +
+                    np.asarray(sparse.sum(0)).flatten())
+            Z = Z.astype(float)
+            return ((Z * Z * wsum[:, None]).sum(0) -
+                    2.0 * (Z * (sparse * Z)).sum(0))
+        elif op == 'a':
+            links = sparse.tocoo()
+            diffs = np.abs(Z[links.row] - Z[links.col])
+            return (links.data[:, None] * diffs).sum(0)
+        return np.array([self.__calc(Z[:, j], op)
+                         for j in range(Z.shape[1])])
+
     def __pseudop(self, sim, g):
         above = sim >= g
         larger = above.sum()
@@ -7,6 +7,7 @@ import numpy as np
 import scipy.stats as stats
 from pysal.lib import weights
 from .tabular import _univariate_handler
+from .permutation import simulate
 
 __all__ = ['Geary']
 
@@ -29,6 +30,12 @@ class Geary(object):
     permutations   : int
                      number of random permutations for calculation of
                      pseudo-p_values
+    n_jobs         : int
+                     number of processes to distribute the permutations
+                     over, -1 for all cores
+    seed           : None, int, RandomState or Generator
+                     seed for the permutations. If None the global numpy
+                     random state is used.
 
     Attributes
     ----------
@@ -98,7 +105,8 @@ class Geary(object):
     Technical details and derivations can be found in :cite:`cliff81`.
 
     """
-    def __init__(self, y, w, transformation="r", permutations=999):
+    def __init__(self, y, w, transformation="r", permutations=999, n_jobs=1,
+                 seed=None):
         if not isinstance(w, weights.W):
             raise TypeError('w must be a pysal weights object, got {}'
                             ' instead'.format(type(w)))
@@ -115,6 +123,10 @@ class Geary(object):
         yd = y - y.mean()
         yss = sum(yd * yd)
         self.den = yss * self.w.s0 * 2.0
+        # sum_ij w_ij (y_i - y_j)^2 = sum_i y_i^2 (w_i. + w_.i) - 2 y'Wy
+        sparse = self.w.sparse
+        self._wsum = (np.asarray(sparse.sum(1)).flatten() +
+                      np.asarray(sparse.sum(0)).flatten())
         self.C = self.__calc(y)
         de = self.C - 1.0
         self.EC = 1.0
@@ -129,9 +141,9 @@ class Geary(object):
 
 
         if permutations:
-            sim = [self.__calc(np.random.permutation(self.y))
-                   for i in range(permutations)]
-            self.sim = sim = np.array(sim)
+            sim = simulate(self._calc_batch, self.y, permutations,
+                           n_jobs=n_jobs, seed=seed)
+            self.sim = sim
             above = sim >= self.C
             larger = sum(above)
             if (permutations - larger) < larger:
@@ -174,15 +186,14 @@ class Geary(object):
         self.seC_norm = vc_norm ** (0.5)
 
     def __calc(self, y):
-        ys = np.zeros(y.shape)
-        y2 = y ** 2
-        for i, i0 in enumerate(self.w.id_order):
-            neighbors = self.w.neighbor_offsets[i0]
-            wijs = self.w.weights[i0]
-            z = list(zip(neighbors, wijs))
-            ys[i] = sum([wij * (y2[i] - 2 * y[i] * y[j] + y2[j])
-                         for j, wij in z])
-        a = (self.n - 1) * sum(ys)
+        return self._calc_batch(y.reshape(-1, 1))[0]
+
+    def _calc_batch(self, Y):
+        """Geary's C for each column of an (n, b) array of permuted y."""
+        Y = Y.astype(float)
+        ss = (Y * Y * self._wsum[:, None]).sum(0)
+        cross = (Y * (self.w.sparse * Y)).sum(0)
+        a = (self.n - 1) * (ss - 2 * cross)
         return a / self.den
 
     @classmethod
@@ -7,6 +7,7 @@ __all__ = ['G', 'G_Local']
 from pysal.lib.common import np, stats 
 from pysal.lib.weights.spatial_lag import lag_spatial as slag
 from .tabular import _univariate_handler
+from .permutation import simulate
 
 PERMUTATIONS = 999
 
@@ -23,6 +24,12 @@ class G(object):
                    DistanceBand W spatial weights based on distance band
     permutations  : int
                     the number of random permutations for calculating pseudo p_values
+    n_jobs        : int
+                    number of processes to distribute the permutations over,
+                    -1 for all cores
+    seed          : None, int, RandomState or Generator
+                    seed for the permutations. If None the global numpy
+                    random state is used.
 
     Attributes
     ----------
@@ -97,7 +104,7 @@ class G(object):
 
     """
 
-    def __init__(self, y, w, permutations=PERMUTATIONS):
+    def __init__(self, y, w, permutations=PERMUTATIONS, n_jobs=1, seed=None):
         y = np.asarray(y).flatten()
         self.n = len(y)
         self.y = y
@@ -113,9 +120,9 @@ class G(object):
         self.p_norm = 1.0 - stats.norm.cdf(np.abs(self.z_norm))
 
         if permutations:
-            sim = [self.__calc(np.random.permutation(self.y))
-                   for i in range(permutations)]
-            self.sim = sim = np.array(sim)
+            sim = simulate(self._calc_batch, self.y, permutations,
+                           n_jobs=n_jobs, seed=seed)
+            self.sim = sim
             above = sim >= self.G
             larger = sum(above)
             if (self.permutations - larger) < larger:
@@ -164,6 +171,10 @@ class G(object):
         self.num = y * yl
         return self.num.sum() / self.den_sum
 
+    def _calc_batch(self, Y):
+        """G for each column of an (n, b) array of permuted y."""
+        return (Y * (self.w.sparse * Y)).sum(0) / self.den_sum
+
     @property
     def _statistic(self):
         """ Standardized accessor for pysal.explore.esda statistics"""
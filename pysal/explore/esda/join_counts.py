@@ -6,6 +6,7 @@ __author__ = "Sergio J. Rey <srey@asu.edu> , Luc Anselin <luc.anselin@asu.edu>"
 
 from pysal.lib.weights.spatial_lag import lag_spatial
 from .tabular import _univariate_handler
+from .permutation import simulate
 import numpy as np
 
 __all__ = ['Join_Counts']
@@ -26,6 +27,12 @@ class Join_Counts(object):
                       spatial weights instance
     permutations    : int
                       number of random permutations for calculation of pseudo-p_values
+    n_jobs          : int
+                      number of processes to distribute the permutations
+                      over, -1 for all cores
+    seed            : None, int, RandomState or Generator
+                      seed for the permutations. If None the global numpy
+                      random state is used.
 
     Attributes
     ----------
@@ -122,7 +129,7 @@ class Join_Counts(object):
     Technical details and derivations can be found in :cite:`cliff81`.
 
     """
-    def __init__(self, y, w, permutations=PERMUTATIONS):
+    def __init__(self, y, w, permutations=PERMUTATIONS, n_jobs=1, seed=None):
         y = np.asarray(y).flatten()
         w.transformation = 'b'  # ensure we have binary weights
         self.w = w
@@ -132,9 +139,8 @@ class Join_Counts(object):
         self.bb, self.ww, self.bw = self.__calc(self.y)
 
         if permutations:
-            sim = [self.__calc(np.random.permutation(self.y))
-                   for i in range(permutations)]
-            sim_jc = np.array(sim)
+            sim_jc = simulate(self._calc_batch, self.y, permutations,
+                              n_jobs=n_jobs, seed=seed)
             self.sim_bb = sim_jc[:, 0]
             self.min_bb = np.min(self.sim_bb)
             self.mean_bb = np.mean(self.sim_bb)
@@ -157,6 +163,16 @@ class Join_Counts(object):
         bw = self.J - (bb + ww)
         return (bb, ww, bw)
 
+    def _calc_batch(self, Z):
+        """(bb, ww, bw) join counts, one row per column of an (n, b) array
+        of permuted y."""
+        sparse = self.w.sparse
+        bb = (Z * (sparse * Z)).sum(0) / 2.0
+        Zw = 1 - Z
+        ww = (Zw * (sparse * Zw)).sum(0) / 2.0
+        bw = self.J - (bb + ww)
+        return np.column_stack((bb, ww, bw))
+
     def __pseudop(self, sim, jc):
         above = sim >= jc
         larger = sum(above)
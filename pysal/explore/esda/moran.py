@@ -7,11 +7,13 @@ __author__ = "Sergio J. Rey <srey@asu.edu>, \
 from pysal.lib.weights.spatial_lag import lag_spatial as slag
 from .smoothing import assuncao_rate
 from .tabular import _univariate_handler, _bivariate_handler
+from .crand import crand_lags
+from .permutation import simulate, _get_rng, _worker_pool, BATCH_ELEMENTS
 import scipy.stats as stats
 import numpy as np
 
 __all__ = ["Moran", "Moran_Local", "Moran_BV", "Moran_BV_matrix",
-           "Moran_Local_BV", "Moran_Rate", "Moran_Local_Rate"]
+           "Moran_Batch", "Moran_Local_BV", "Moran_Rate", "Moran_Local_Rate"]
 
 PERMUTATIONS = 999
 
@@ -37,6 +39,12 @@ class Moran(object):
     two_tailed      : boolean
                       If True (default) analytical p-values for Moran are two
                       tailed, otherwise if False, they are one-tailed.
+    n_jobs          : int
+                      number of processes to distribute the permutations
+                      over, -1 for all cores
+    seed            : None, int, RandomState or Generator
+                      seed for the permutations. If None the global numpy
+                      random state is used.
 
     Attributes
     ----------
@@ -136,7 +144,7 @@ class Moran(object):
 
     """
     def __init__(self, y, w, transformation="r", permutations=PERMUTATIONS,
-                 two_tailed=True):
+                 two_tailed=True, n_jobs=1, seed=None):
         y = np.asarray(y).flatten()
         self.y = y
         w.transform = transformation
@@ -159,9 +167,9 @@ class Moran(object):
             self.p_rand *= 2.
 
         if permutations:
-            sim = [self.__calc(np.random.permutation(self.z))
-                   for i in range(permutations)]
-            self.sim = sim = np.array(sim)
+            sim = simulate(self._calc_batch, self.z, permutations,
+                           n_jobs=n_jobs, seed=seed)
+            self.sim = sim
             above = sim >= self.I
             larger = above.sum()
             if (self.permutations - larger) < larger:
@@ -216,6 +224,11 @@ class Moran(object):
         inum = (z * zl).sum()
         return self.n / self.w.s0 * inum / self.z2ss
 
+    def _calc_batch(self, Z):
+        """Moran's I for each column of an (n, b) array of permuted z."""
+        inum = (Z * (self.w.sparse * Z)).sum(0)
+        return self.n / self.w.s0 * inum / self.z2ss
+
     @property
     def _statistic(self):
         """More consistent hidden attribute to access ESDA statistics"""
@@ -285,6 +298,12 @@ class Moran_BV(object):
     permutations    : int
                       number of random permutations for calculation of pseudo
                       p_values
+    n_jobs          : int
+                      number of processes to distribute the permutations
+                      over, -1 for all cores
+    seed            : None, int, RandomState or Generator
+                      seed for the permutations. If None the global numpy
+                      random state is used.
 
     Attributes
     ----------
@@ -369,7 +388,8 @@ class Moran_BV(object):
 
 
     """
-    def __init__(self, x, y, w, transformation="r", permutations=PERMUTATIONS):
+    def __init__(self, x, y, w, transformation="r", permutations=PERMUTATIONS,
+                 n_jobs=1, seed=None):
         x = np.asarray(x).flatten()
         y = np.asarray(y).flatten()
         zy = (y - y.mean()) / y.std(ddof=1)
@@ -384,9 +404,11 @@ class Moran_BV(object):
         self.w = w
         self.I = self.__calc(zy)
         if permutations:
-            nrp = np.random.permutation
-            sim = [self.__calc(nrp(zy)) for i in range(permutations)]
-            self.sim = sim = np.array(sim)
+            # zx'Wzy = (W'zx)'zy, so each permutation reduces to a dot product
+            self._wtzx = self.w.sparse.T * zx
+            sim = simulate(self._calc_batch, zy, permutations,
+                           n_jobs=n_jobs, seed=seed)
+            self.sim = sim
             above = sim >= self.I
             larger = above.sum()
             if (permutations - larger) < larger:
@@ -406,6 +428,11 @@ class Moran_BV(object):
         self.num = (self.zx * wzy).sum()
         return self.num / self.den
 
+    def _calc_batch(self, Zy):
+        """Bivariate Moran's I for each column of an (n, b) array of
+        permuted zy."""
+        return self._wtzx.dot(Zy) / self.den
+
     @property
     def _statistic(self):
         """More consistent hidden attribute to access ESDA statistics"""
@@ -541,10 +568,10 @@ def _Moran_BV_Matrix_array(variables, w, permutations=0, varnames=None):
     """
     Base calculation for MORAN_BV_Matrix
     """
+    k = len(variables)
     if varnames is None:
         varnames = ['x{}'.format(i) for i in range(k)]
 
-    k = len(variables)
     rk = list(range(0, k - 1))
     results = {}
     for i in rk:
@@ -558,6 +585,268 @@ def _Moran_BV_Matrix_array(variables, w, permutations=0, varnames=None):
     return results
 
 
+class Moran_Batch(object):
+    """
+    Univariate and bivariate Moran's I for many variables on a common W
+
+    The weights are transformed and their moments computed once, and the
+    spatial lags of all k variables are obtained with a single sparse
+    matrix product. Permutation inference applies the same random
+    permutation of observations to all columns, so each permutation costs
+    one sparse product with an (n, k) matrix.
+
+    Parameters
+    ----------
+    Y               : array or pandas.DataFrame
+                      (n, k) variables measured across n spatial units
+    w               : W
+                      spatial weights instance
+    transformation  : {'R', 'B', 'D', 'U', 'V'}
+                      weights transformation, default is row-standardized "r".
+                      Other options include
+                      "B": binary,
+                      "D": doubly-standardized,
+                      "U": untransformed (general weights),
+                      "V": variance-stabilizing.
+    permutations    : int
+                      number of random permutations for calculation of
+                      pseudo p_values
+    two_tailed      : boolean
+                      If True (default) analytical p-values are two tailed,
+                      otherwise they are one-tailed.
+    bivariate       : boolean
+                      If True (default), also compute the (k, k) matrix of
+                      bivariate Moran's I and its permutation inference.
+    varnames        : list
+                      names of the k variables. If Y is a pandas.DataFrame
+                      its column names are used.
+    n_jobs          : int
+                      number of processes for the permutations. -1 uses all
+                      available cores.
+    seed            : None, int, RandomState or Generator
+                      seed for the permutations. If None the global numpy
+                      random state is used.
+
+    Attributes
+    ----------
+    k            : int
+                   number of variables
+    varnames     : list
+                   names of the variables
+    I            : array
+                   (k,) values of Moran's I
+    EI           : float
+                   expected value under normality assumption
+    VI_norm      : float
+                   variance of I under normality assumption
+    seI_norm     : float
+                   standard deviation of I under normality assumption
+    z_norm       : array
+                   (k,) z-values of I under normality assumption
+    p_norm       : array
+                   (k,) p-values of I under normality assumption
+    VI_rand      : array
+                   (k,) variances of I under randomization assumption
+    seI_rand     : array
+                   (k,) standard deviations of I under randomization
+    z_rand       : array
+                   (k,) z-values of I under randomization assumption
+    p_rand       : array
+                   (k,) p-values of I under randomization assumption
+    sim          : array
+                   (if permutations>0)
+                   (permutations, k) I values for permuted samples
+    p_sim        : array
+                   (if permutations>0)
+                   (k,) p-values based on permutations (one-tailed), as in
+                   Moran
+    EI_sim       : array
+                   (if permutations>0)
+                   (k,) average values of I from permutations
+    VI_sim       : array
+                   (if permutations>0)
+                   (k,) variances of I from permutations
+    seI_sim      : array
+                   (if permutations>0)
+                   (k,) standard deviations of I under permutations
+    z_sim        : array
+                   (if permutations>0)
+                   (k,) standardized I based on permutations
+    p_z_sim      : array
+                   (if permutations>0)
+                   (k,) p-values based on standard normal approximation
+                   from permutations
+    I_bv         : array
+                   (if bivariate)
+                   (k, k) bivariate Moran's I, I_bv[i, j] is the value of
+                   Moran_BV(Y[:, i], Y[:, j], w)
+    p_sim_bv     : array
+                   (if bivariate and permutations>0)
+                   (k, k) p-values based on permutations (one-tailed)
+    EI_sim_bv    : array
+                   (if bivariate and permutations>0)
+                   (k, k) average values of I_bv from permutations
+    seI_sim_bv   : array
+                   (if bivariate and permutations>0)
+                   (k, k) standard deviations of I_bv under permutations
+    z_sim_bv     : array
+                   (if bivariate and permutations>0)
+                   (k, k) standardized I_bv based on permutations
+    p_z_sim_bv   : array
+                   (if bivariate and permutations>0)
+                   (k, k) p-values based on standard normal approximation
+                   from permutations
+
+    Notes
+    -----
+    Bivariate permutation results are simulated and accumulated in chunks
+    of permutations, so memory does not grow with permutations * k * k.
+
+    Examples
+    --------
+    >>> import pysal.lib
+    >>> import numpy as np
+    >>> f = pysal.lib.io.open(pysal.lib.examples.get_path("sids2.dbf"))
+    >>> varnames = ['SIDR74',  'SIDR79',  'NWR74',  'NWR79']
+    >>> Y = np.array([f.by_col[var] for var in varnames]).T
+    >>> w = pysal.lib.io.open(pysal.lib.examples.get_path("sids2.gal")).read()
+    >>> from pysal.explore.esda.moran import Moran_Batch
+    >>> mb = Moran_Batch(Y, w, varnames=varnames, permutations=0)
+    >>> round(mb.I[0], 3)
+    0.248
+    >>> round(mb.I_bv[0, 1], 7)
+    0.1936261
+    >>> round(mb.I_bv[3, 0], 7)
+    0.3770138
+    """
+    def __init__(self, Y, w, transformation="r", permutations=PERMUTATIONS,
+                 two_tailed=True, bivariate=True, varnames=None, n_jobs=1,
+                 seed=None):
+        if hasattr(Y, 'columns'):
+            varnames = [str(c) for c in Y.columns]
+            Y = Y.values
+        Y = np.asarray(Y, dtype=float)
+        if Y.ndim == 1:
+            Y = Y.reshape(-1, 1)
+        n, k = Y.shape
+        if varnames is None:
+            varnames = ['x{}'.format(i) for i in range(k)]
+        self.Y = Y
+        self.n = n
+        self.k = k
+        self.varnames = varnames
+        w.transform = transformation
+        self.w = w
+        self.permutations = permutations
+        sparse = w.sparse
+        Z = (Y - Y.mean(axis=0)) / Y.std(axis=0, ddof=1)
+        self.Z = Z
+        self.den = n - 1.  # z'z for each column
+        self.__moments()
+        WZ = sparse * Z
+        self.I = self.__calc(Z, WZ)
+        self.z_norm = (self.I - self.EI) / self.seI_norm
+        self.z_rand = (self.I - self.EI) / self.seI_rand
+        self.p_norm = stats.norm.sf(np.abs(self.z_norm))
+        self.p_rand = stats.norm.sf(np.abs(self.z_rand))
+        if two_tailed:
+            self.p_norm *= 2.
+            self.p_rand *= 2.
+        if bivariate:
+            self.I_bv = Z.T.dot(WZ) / self.den
+
+        self._bivariate = bivariate
+
+        if permutations:
+            rng = _get_rng(seed)
+            sim = np.zeros((permutations, k))
+            chunk = permutations
+            if bivariate:
+                larger_bv = np.zeros((k, k))
+                sum_bv = np.zeros((k, k))
+                sumsq_bv = np.zeros((k, k))
+                chunk = max(1, BATCH_ELEMENTS // (k + k * k))
+            # processes are started once for all the chunks
+            pool = None
+            if n_jobs != 1 and chunk < permutations:
+                pool = _worker_pool(self._calc_batch, Z, n_jobs)
+            try:
+                for start in range(0, permutations, chunk):
+                    size = min(chunk, permutations - start)
+                    res = simulate(self._calc_batch, Z, size, n_jobs=n_jobs,
+                                   seed=rng, pool=pool)
+                    sim[start:start + size] = res[:, :k]
+                    if bivariate:
+                        Ip = res[:, k:].reshape(size, k, k)
+                        larger_bv += (Ip >= self.I_bv).sum(0)
+                        sum_bv += Ip.sum(0)
+                        sumsq_bv += (Ip * Ip).sum(0)
+            finally:
+                if pool is not None:
+                    pool.close()
+                    pool.join()
+            self.sim = sim
+            larger = (sim >= self.I).sum(0)
+            low_extreme = (permutations - larger) < larger
+            larger[low_extreme] = permutations - larger[low_extreme]
+            self.p_sim = (larger + 1.) / (permutations + 1.)
+            self.EI_sim = sim.mean(0)
+            self.seI_sim = sim.std(0)
+            self.VI_sim = self.seI_sim ** 2
+            self.z_sim = (self.I - self.EI_sim) / self.seI_sim
+            self.p_z_sim = stats.norm.sf(np.abs(self.z_sim))
+            if bivariate:
+                low_extreme = (permutations - larger_bv) < larger_bv
+                larger_bv[low_extreme] = (permutations -
+                                          larger_bv[low_extreme])
+                self.p_sim_bv = (larger_bv + 1.) / (permutations + 1.)
+                self.EI_sim_bv = sum_bv / permutations
+                VI_sim_bv = sumsq_bv / permutations - self.EI_sim_bv ** 2
+                self.seI_sim_bv = np.sqrt(np.maximum(VI_sim_bv, 0))
+                self.z_sim_bv = (self.I_bv - self.EI_sim_bv) / self.seI_sim_bv
+                self.p_z_sim_bv = stats.norm.sf(np.abs(self.z_sim_bv))
+
+    def __moments(self):
+        n = self.n
+        w = self.w
+        n2 = n * n
+        s0 = w.s0
+        s1 = w.s1
+        s2 = w.s2
+        s02 = s0 * s0
+        self.EI = -1. / (n - 1)
+        v_num = n2 * s1 - n * s2 + 3 * s02
+        v_den = (n - 1) * (n + 1) * s02
+        self.VI_norm = v_num / v_den - (1.0 / (n - 1)) ** 2
+        self.seI_norm = self.VI_norm ** (1 / 2.)
+
+        # variance under randomization, kurtosis is column specific
+        z = self.Z
+        z2 = z * z
+        k = (z2 * z2).sum(0) / n / ((z2.sum(0) / n) ** 2)
+        EI = self.EI
+        A = n * ((n2 - 3 * n + 3) * s1 - n * s2 + 3 * s02)
+        B = k * ((n2 - n) * s1 - 2 * n * s2 + 6 * s02)
+        VIR = (A - B) / ((n - 1) * (n - 2) * (n - 3) * s02) - EI * EI
+        self.VI_rand = VIR
+        self.seI_rand = VIR ** (1 / 2.)
+
+    def __calc(self, Z, WZ):
+        return self.n / self.w.s0 * (Z * WZ).sum(0) / self.den
+
+    def _calc_batch(self, Zp):
+        """Moran's I and, if computed, the flattened bivariate Moran's I for
+        each permutation of an (n, b, k) array of permuted Z."""
+        n, b, k = Zp.shape
+        WZp = (self.w.sparse * Zp.reshape(n, b * k)).reshape(n, b, k)
+        I = self.__calc(Zp, WZp)
+        if not self._bivariate:
+            return I
+        Ip = np.einsum('ij,ibl->bjl', self.Z, WZp) / self.den
+        return np.hstack((I, Ip.reshape(b, k * k)))
+
+
+
 class Moran_Rate(Moran):
     """
     Adjusted Moran's I Global Autocorrelation Statistic for Rate
@@ -589,6 +878,11 @@ class Moran_Rate(Moran):
     permutations    : int
                       number of random permutations for calculation of pseudo
                       p_values
+    n_jobs          : int
+                      number of processes to distribute the permutations
+                      over, -1 for all cores
+    seed            : None, int, RandomState or Generator
+                      seed for the permutations
 
     Attributes
     ----------
@@ -665,7 +959,8 @@ class Moran_Rate(Moran):
     """
 
     def __init__(self, e, b, w, adjusted=True, transformation="r",
-                 permutations=PERMUTATIONS, two_tailed=True):
+                 permutations=PERMUTATIONS, two_tailed=True, n_jobs=1,
+                 seed=None):
         e = np.asarray(e).flatten()
         b = np.asarray(b).flatten()
         if adjusted:
@@ -673,7 +968,8 @@ class Moran_Rate(Moran):
         else:
             y = e * 1.0 / b
         Moran.__init__(self, y, w, transformation=transformation,
-                       permutations=permutations, two_tailed=two_tailed)
+                       permutations=permutations, two_tailed=two_tailed,
+                       n_jobs=n_jobs, seed=seed)
 
     @classmethod
     def by_col(cls, df, events, populations, w=None, inplace=False,
@@ -781,6 +1077,23 @@ class Moran_Local(object):
                      (default=False)
                      If True use GeoDa scheme: HH=1, LL=2, LH=3, HL=4
                      If False use PySAL Scheme: HH=1, LH=2, LL=3, HL=4
+    engine         : {'loop', 'batch'}
+                     conditional randomization engine. 'loop' (default)
+                     draws a separate shuffle for every observation.
+                     'batch' draws one set of random neighbor ids for all
+                     observations and evaluates them in blocks of
+                     observations sharing a cardinality, which is much
+                     faster for large n.
+    n_jobs         : int
+                     number of processes used by the 'batch' engine,
+                     -1 for all cores
+    chunksize      : int
+                     maximum number of observations per block for the
+                     'batch' engine. If None, blocks are sized to bound
+                     memory use.
+    seed           : None, int or RandomState
+                     seed for the permutations. If None the global numpy
+                     random state is used.
 
     Attributes
     ----------
@@ -855,7 +1168,8 @@ class Moran_Local(object):
     moved into unittests that are conditional on architectures
     """
     def __init__(self, y, w, transformation="r", permutations=PERMUTATIONS,
-                 geoda_quads=False):
+                 geoda_quads=False, engine='loop', n_jobs=1, chunksize=None,
+                 seed=None):
         y = np.asarray(y).flatten()
         self.y = y
         n = len(y)
@@ -881,7 +1195,13 @@ class Moran_Local(object):
         self.quads = quads
         self.__quads()
         if permutations:
-            self.__crand()
+            if engine == 'batch':
+                self.__crand_batch(n_jobs, chunksize, seed)
+            elif engine == 'loop':
+                self.__crand(seed)
+            else:
+                raise ValueError("engine must be 'loop' or 'batch', "
+                                 "got '{}'".format(engine))
             sim = np.transpose(self.rlisas)
             above = sim >= self.Is
             larger = above.sum(0)
@@ -899,7 +1219,7 @@ class Moran_Local(object):
         zl = slag(w, z)
         return self.n_1 * self.z * zl / self.den
 
-    def __crand(self):
+    def __crand(self, seed=None):
         """
         conditional randomization
 
@@ -912,13 +1232,14 @@ class Moran_Local(object):
         neighbors to i in each randomization.
 
         """
+        rng = _get_rng(seed)
         z = self.z
         lisas = np.zeros((self.n, self.permutations))
         n_1 = self.n - 1
         prange = list(range(self.permutations))
         k = self.w.max_neighbors + 1
         nn = self.n - 1
-        rids = np.array([np.random.permutation(nn)[0:k] for i in prange])
+        rids = np.array([rng.permutation(nn)[0:k] for i in prange])
         ids = np.arange(self.w.n)
         ido = self.w.id_order
         w = [self.w.weights[ido[i]] for i in ids]
@@ -926,11 +1247,21 @@ class Moran_Local(object):
 
         for i in range(self.w.n):
             idsi = ids[ids != i]
-            np.random.shuffle(idsi)
+            rng.shuffle(idsi)
             tmp = z[idsi[rids[:, 0:wc[i]]]]
             lisas[i] = z[i] * (w[i] * tmp).sum(1)
         self.rlisas = (n_1 / self.den) * lisas
 
+    def __crand_batch(self, n_jobs=1, chunksize=None, seed=None):
+        """
+        conditional randomization using the batched engine in
+        :mod:`pysal.explore.esda.crand`
+
+        """
+        lags = crand_lags(self.w, self.z, self.permutations, n_jobs=n_jobs,
+                          chunksize=chunksize, seed=seed)
+        self.rlisas = (self.n_1 / self.den) * self.z[:, None] * lags
+
     def __quads(self):
         zl = slag(self.w, self.z)
         zp = self.z > 0
@@ -1016,6 +1347,23 @@ class Moran_Local_BV(object):
                      (default=False)
                      If True use GeoDa scheme: HH=1, LL=2, LH=3, HL=4
                      If False use PySAL Scheme: HH=1, LH=2, LL=3, HL=4
+    engine         : {'loop', 'batch'}
+                     conditional randomization engine. 'loop' (default)
+                     draws a separate shuffle for every observation.
+                     'batch' draws one set of random neighbor ids for all
+                     observations and evaluates them in blocks of
+                     observations sharing a cardinality, which is much
+                     faster for large n.
+    n_jobs         : int
+                     number of processes used by the 'batch' engine,
+                     -1 for all cores
+    chunksize      : int
+                     maximum number of observations per block for the
+                     'batch' engine. If None, blocks are sized to bound
+                     memory use.
+    seed           : None, int or RandomState
+                     seed for the permutations. If None the global numpy
+                     random state is used.
 
     Attributes
     ----------
@@ -1087,7 +1435,8 @@ class Moran_Local_BV(object):
     moved into unittests that are conditional on architectures
     """
     def __init__(self, x, y, w, transformation="r", permutations=PERMUTATIONS,
-                 geoda_quads=False):
+                 geoda_quads=False, engine='loop', n_jobs=1, chunksize=None,
+                 seed=None):
         x = np.asarray(x).flatten()
         y = np.asarray(y).flatten()
         self.y = y
@@ -1119,7 +1468,13 @@ class Moran_Local_BV(object):
         self.quads = quads
         self.__quads()
         if permutations:
-            self.__crand()
+            if engine == 'batch':
+                self.__crand_batch(n_jobs, chunksize, seed)
+            elif engine == 'loop':
+                self.__crand(seed)
+            else:
+                raise ValueError("engine must be 'loop' or 'batch', "
+                                 "got '{}'".format(engine))
             sim = np.transpose(self.rlisas)
             above = sim >= self.Is
             larger = above.sum(0)
@@ -1137,7 +1492,7 @@ class Moran_Local_BV(object):
         zly = slag(w, zy)
         return self.n_1 * self.zx * zly / self.den
 
-    def __crand(self):
+    def __crand(self, seed=None):
         """
         conditional randomization
 
@@ -1150,12 +1505,13 @@ class Moran_Local_BV(object):
         neighbors to i in each randomization.
 
         """
+        rng = _get_rng(seed)
         lisas = np.zeros((self.n, self.permutations))
         n_1 = self.n - 1
         prange = list(range(self.permutations))
         k = self.w.max_neighbors + 1
         nn = self.n - 1
-        rids = np.array([np.random.permutation(nn)[0:k] for i in prange])
+        rids = np.array([rng.permutation(nn)[0:k] for i in prange])
         ids = np.arange(self.w.n)
         ido = self.w.id_order
         w = [self.w.weights[ido[i]] for i in ids]
@@ -1165,11 +1521,21 @@ class Moran_Local_BV(object):
         zy = self.zy
         for i in range(self.w.n):
             idsi = ids[ids != i]
-            np.random.shuffle(idsi)
+            rng.shuffle(idsi)
             tmp = zy[idsi[rids[:, 0:wc[i]]]]
             lisas[i] = zx[i] * (w[i] * tmp).sum(1)
         self.rlisas = (n_1 / self.den) * lisas
 
+    def __crand_batch(self, n_jobs=1, chunksize=None, seed=None):
+        """
+        conditional randomization using the batched engine in
+        :mod:`pysal.explore.esda.crand`
+
+        """
+        lags = crand_lags(self.w, self.zy, self.permutations, n_jobs=n_jobs,
+                          chunksize=chunksize, seed=seed)
+        self.rlisas = (self.n_1 / self.den) * self.zx[:, None] * lags
+
     def __quads(self):
         zl = slag(self.w, self.zy)
         zp = self.zx > 0
@@ -1264,6 +1630,15 @@ class Moran_Local_Rate(Moran_Local):
                      (default=False)
                      If True use GeoDa scheme: HH=1, LL=2, LH=3, HL=4
                      If False use PySAL Scheme: HH=1, LH=2, LL=3, HL=4
+    engine         : {'loop', 'batch'}
+                     conditional randomization engine, see Moran_Local
+    n_jobs         : int
+                     number of processes used by the 'batch' engine
+    chunksize      : int
+                     maximum number of observations per block for the
+                     'batch' engine
+    seed           : None, int or RandomState
+                     seed for the permutations
     Attributes
     ----------
     y            : array
@@ -1331,7 +1706,8 @@ class Moran_Local_Rate(Moran_Local):
     """
 
     def __init__(self, e, b, w, adjusted=True, transformation="r",
-                 permutations=PERMUTATIONS, geoda_quads=False):
+                 permutations=PERMUTATIONS, geoda_quads=False, engine='loop',
+                 n_jobs=1, chunksize=None, seed=None):
         e = np.asarray(e).flatten()
         b = np.asarray(b).flatten()
         if adjusted:
@@ -1341,7 +1717,8 @@ class Moran_Local_Rate(Moran_Local):
         Moran_Local.__init__(self, y, w,
                              transformation=transformation,
                              permutations=permutations,
-                             geoda_quads=geoda_quads)
+                             geoda_quads=geoda_quads, engine=engine,
+                             n_jobs=n_jobs, chunksize=chunksize, seed=seed)
 
     @classmethod
     def by_col(cls, df, events, populations, w=None, inplace=False,
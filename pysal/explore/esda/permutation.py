@@ -0,0 +1,205 @@
+"""
+Permutation inference for global spatial autocorrelation statistics
+
+"""
+import multiprocessing as mp
+import numpy as np
+
+__all__ = ['permutation_matrix', 'simulate']
+
+# upper bound on the number of permuted values (n x batch size) held in
+# memory for a single batch
+BATCH_ELEMENTS = 2 ** 22
+
+# shared state for worker processes, set by _init_worker
+_FUNC = None
+_Y = None
+
+
+def _get_rng(seed=None):
+    """
+    Resolve a seed specification into a random number generator.
+
+    Parameters
+    ----------
+    seed    : None, int, numpy.random.RandomState or numpy.random.Generator
+              If None, the global numpy random state is used so that
+              ``np.random.seed`` controls the draws. An integer seeds a
+              fresh RandomState. Generator objects are used as given.
+
+    Returns
+    -------
+    rng     : object exposing ``permutation`` and ``randint``/``integers``
+    """
+    if seed is None:
+        return np.random.mtrand._rand
+    if isinstance(seed, (int, np.integer)):
+        return np.random.RandomState(seed)
+    return seed
+
+
+def permutation_matrix(n, size, seed=None):
+    """
+    Matrix of random permutations of ``range(n)``.
+
+    Parameters
+    ----------
+    n       : int
+              number of observations
+    size    : int
+              number of permutations
+    seed    : None, int, RandomState or Generator
+              source of randomness
+
+    Returns
+    -------
+    ids     : array
+              (size, n) array, each row a permutation of ``range(n)``.
+              With a RandomState, row i permutes values exactly as the i-th
+              call to ``np.random.permutation`` would, so seeded results
+              match those of a loop over permutations.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from pysal.explore.esda.permutation import permutation_matrix
+    >>> y = np.arange(10.) * 2
+    >>> np.random.seed(12345)
+    >>> ids = permutation_matrix(10, 3)
+    >>> np.random.seed(12345)
+    >>> np.allclose(y[ids[2]], [np.random.permutation(y) for i in range(3)][2])
+    True
+    """
+    rng = _get_rng(seed)
+    if hasattr(rng, 'permuted'):
+        return rng.permuted(np.tile(np.arange(n), (size, 1)), axis=1)
+    return np.array([rng.permutation(n) for i in range(size)]).reshape(size, n)
+
+
+def _values(y):
+    """Values to permute: a vector, or an (n, k) array permuted by rows."""
+    y = np.asarray(y)
+    if y.ndim != 2:
+        y = y.flatten()
+    return y
+
+
+def _init_worker(func, y):
+    global _FUNC, _Y
+    _FUNC = func
+    _Y = y
+
+
+def _worker_pool(func, y, n_jobs):
+    """
+    Process pool for simulate with the given func and y, which can be
+    passed to several calls to simulate so that processes are only started
+    once. The caller closes it.
+    """
+    if n_jobs == -1:
+        n_jobs = mp.cpu_count()
+    return mp.Pool(n_jobs, initializer=_init_worker,
+                   initargs=(func, _values(y)))
+
+
+def _batch(args):
+    """Evaluate the statistic on one batch of permutations."""
+    seed, size = args
+    ids = permutation_matrix(_Y.shape[0], size, seed)
+    return _FUNC(_Y[ids.T])
+
+
+def simulate(func, y, permutations, n_jobs=1, batchsize=None, seed=None,
+             pool=None):
+    """
+    Reference distribution of a statistic under random permutation of y.
+
+    Permutations are drawn in batches as 2-D index matrices so that the
+    statistic is evaluated on an (n, batchsize) matrix of permuted values at
+    once, typically with a sparse-matrix by dense-matrix product
+    ``w.sparse * Y``.
+
+    Parameters
+    ----------
+    func         : callable
+                   maps an (n, b) array of permuted values (one permutation
+                   per column) to an array with b rows holding the
+                   statistic(s) for each permutation. Must be picklable if
+                   n_jobs > 1.
+    y            : array
+                   (n,) values to permute, or (n, k) array whose rows are
+                   permuted together, in which case func is given (n, b, k)
+                   arrays
+    permutations : int
+                   number of random permutations
+    n_jobs       : int
+                   number of processes to distribute batches over. -1 uses
+                   all available cores.
+    batchsize    : int
+                   number of permutations per batch. If None, it is set so
+                   that each batch holds at most BATCH_ELEMENTS values and,
+                   if n_jobs > 1, so that there are at least n_jobs batches.
+    seed         : None, int, RandomState or Generator
+                   source of randomness. With n_jobs=1 the permutations are
+                   drawn from seed directly; with n_jobs > 1 each batch is
+                   drawn from its own seed, itself drawn from seed, so
+                   results are reproducible for a given seed and batchsize
+                   regardless of the number of processes.
+    pool         : multiprocessing.Pool
+                   pool of n_jobs processes made by _worker_pool for the
+                   same func and y, used instead of starting one; it is left
+                   open
+
+    Returns
+    -------
+    sim          : array
+                   (permutations,) or (permutations, m) simulated values
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from pysal.lib.weights import lat2W
+    >>> from pysal.explore.esda.permutation import simulate
+    >>> w = lat2W(5, 5)
+    >>> z = np.arange(25.) - 12
+    >>> def cross_product(Z):
+    ...     return (Z * (w.sparse * Z)).sum(0)
+    >>> sim = simulate(cross_product, z, 99, seed=12345)
+    >>> sim.shape
+    (99,)
+    >>> np.allclose(sim, simulate(cross_product, z, 99, seed=12345,
+    ...                           batchsize=7))
+    True
+    """
+    y = _values(y)
+    n = y.shape[0]
+    if n_jobs == -1:
+        n_jobs = mp.cpu_count()
+    if batchsize is None:
+        batchsize = max(1, BATCH_ELEMENTS // max(y.size, 1))
+        if n_jobs > 1:
+            # at least one batch for each process
+            batchsize = min(batchsize, -(-permutations // n_jobs))
+    sizes = [min(batchsize, permutations - start)
+             for start in range(0, permutations, batchsize)]
+    rng = _get_rng(seed)
+    if n_jobs > 1 and len(sizes) > 1:
+        high = np.iinfo(np.int32).max
+        if hasattr(rng, 'integers'):
+            seeds = rng.integers(0, high, size=len(sizes))
+        else:
+            seeds = rng.randint(0, high, size=len(sizes))
+        tasks = list(zip(seeds.tolist(), sizes))
+        if pool is None:
+            P = _worker_pool(func, y, n_jobs)
+            results = P.map(_batch, tasks)
+            P.close()
+            P.join()
+        else:
+            results = pool.map(_batch, tasks)
+    else:
+        results = []
+        for size in sizes:
+            ids = permutation_matrix(n, size, rng)
+            results.append(func(y[ids.T]))
+    return np.concatenate([np.asarray(r) for r in results])
@@ -0,0 +1,64 @@
+import unittest
+import pysal.lib
+from pysal.lib.common import RTOL, ATOL
+from .. import crand
+from .. import moran
+import numpy as np
+
+
+class Crand_Tester(unittest.TestCase):
+    def setUp(self):
+        self.w = pysal.lib.io.open(pysal.lib.examples.get_path("desmith.gal")).read()
+        f = pysal.lib.io.open(pysal.lib.examples.get_path("desmith.txt"))
+        self.y = np.array(f.by_col['z'])
+
+    def test_excludes_focal(self):
+        n = 8
+        neighbors = {i: [j for j in range(n) if j != i] for i in range(n)}
+        w = pysal.lib.weights.W(neighbors)
+        z = np.arange(n, dtype=float)
+        lags = crand.crand_lags(w, z, 49, seed=1)
+        expected = (z.sum() - z)[:, None] * np.ones((1, 49))
+        np.testing.assert_allclose(lags, expected, rtol=RTOL, atol=ATOL)
+
+    def test_reproducible(self):
+        self.w.transform = 'r'
+        a = crand.crand_lags(self.w, self.y, 99, seed=123)
+        b = crand.crand_lags(self.w, self.y, 99, seed=123, chunksize=2)
+        c = crand.crand_lags(self.w, self.y, 99, seed=123, n_jobs=2)
+        self.assertEqual(a.shape, (self.w.n, 99))
+        np.testing.assert_allclose(a, b, rtol=RTOL, atol=ATOL)
+        np.testing.assert_allclose(a, c, rtol=RTOL, atol=ATOL)
+
+    def test_islands(self):
+        w = pysal.lib.weights.W({0: [1], 1: [0], 2: []}, silence_warnings=True)
+        lags = crand.crand_lags(w, np.array([1., 2., 3.]), 9, seed=0)
+        np.testing.assert_allclose(lags[2], np.zeros(9))
+
+    def test_moran_local_batch(self):
+        lm = moran.Moran_Local(self.y, self.w, permutations=99,
+                               engine='batch', seed=10)
+        lm2 = moran.Moran_Local(self.y, self.w, permutations=99,
+                                engine='batch', seed=10, n_jobs=2)
+        self.assertEqual(lm.sim.shape, (99, self.w.n))
+        np.testing.assert_allclose(lm.p_sim, lm2.p_sim)
+        np.testing.assert_allclose(lm.Is, moran.Moran_Local(
+            self.y, self.w, permutations=0).Is, rtol=RTOL, atol=ATOL)
+
+    def test_moran_local_bv_batch(self):
+        x = self.y[::-1]
+        lm = moran.Moran_Local_BV(x, self.y, self.w, permutations=99,
+                                  engine='batch', seed=10)
+        self.assertEqual(lm.sim.shape, (99, self.w.n))
+        self.assertTrue(((lm.p_sim > 0) & (lm.p_sim <= 0.5)).all())
+
+    def test_bad_engine(self):
+        self.assertRaises(ValueError, moran.Moran_Local, self.y, self.w,
+                          engine='numba')
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(Crand_Tester)
+
+if __name__ == '__main__':
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
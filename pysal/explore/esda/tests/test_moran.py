@@ -93,6 +93,88 @@ class Moran_BV_matrix_Tester(unittest.TestCase):
         self.assertAlmostEqual(res[(0, 1)].I, 0.19362610652874668)
         self.assertAlmostEqual(res[(3, 0)].I, 0.37701382542927858)
 
+class Moran_Batch_Tester(unittest.TestCase):
+    def setUp(self):
+        f = pysal.lib.io.open(pysal.lib.examples.get_path("sids2.dbf"))
+        varnames = ['SIDR74', 'SIDR79', 'NWR74', 'NWR79']
+        self.names = varnames
+        self.Y = np.array([f.by_col[var] for var in varnames]).T
+        self.w = pysal.lib.io.open(pysal.lib.examples.get_path("sids2.gal")).read()
+
+    def test_Moran_Batch(self):
+        mb = moran.Moran_Batch(self.Y, self.w, permutations=99, seed=10)
+        for i in range(mb.k):
+            mi = moran.Moran(self.Y[:, i], self.w, permutations=99, seed=10)
+            np.testing.assert_allclose(mb.I[i], mi.I, rtol=RTOL, atol=ATOL)
+            np.testing.assert_allclose(mb.z_rand[i], mi.z_rand, rtol=RTOL,
+                                       atol=ATOL)
+            np.testing.assert_allclose(mb.p_norm[i], mi.p_norm, rtol=RTOL,
+                                       atol=ATOL)
+            np.testing.assert_allclose(mb.sim[:, i], mi.sim, rtol=RTOL,
+                                       atol=ATOL)
+            self.assertAlmostEqual(mb.p_sim[i], mi.p_sim)
+
+    def test_parallel(self):
+        mb = moran.Moran_Batch(self.Y, self.w, permutations=99, n_jobs=2,
+                               seed=10)
+        mi = moran.Moran(self.Y[:, 0], self.w, permutations=99, n_jobs=2,
+                         seed=10)
+        np.testing.assert_allclose(mb.sim[:, 0], mi.sim, rtol=RTOL, atol=ATOL)
+
+    def test_chunks(self):
+        # bivariate permutations in many chunks, run serially or through a
+        # single pool
+        whole = moran.Moran_Batch(self.Y, self.w, permutations=19, seed=4)
+        pools = []
+        worker_pool = moran._worker_pool
+        batch_elements = moran.BATCH_ELEMENTS
+
+        def counted(*args):
+            pools.append(worker_pool(*args))
+            return pools[-1]
+        moran._worker_pool = counted
+        moran.BATCH_ELEMENTS = 3 * (4 + 16)
+        try:
+            chunked = moran.Moran_Batch(self.Y, self.w, permutations=19,
+                                        seed=4)
+            parallel = moran.Moran_Batch(self.Y, self.w, permutations=19,
+                                         n_jobs=2, seed=4)
+        finally:
+            moran._worker_pool = worker_pool
+            moran.BATCH_ELEMENTS = batch_elements
+        self.assertEqual(len(pools), 1)
+        np.testing.assert_allclose(chunked.sim, whole.sim, rtol=RTOL,
+                                   atol=ATOL)
+        np.testing.assert_allclose(chunked.EI_sim_bv, whole.EI_sim_bv,
+                                   rtol=RTOL, atol=ATOL)
+        self.assertEqual(parallel.sim.shape, (19, 4))
+        self.assertEqual(parallel.p_sim_bv.shape, (4, 4))
+
+    def test_bivariate(self):
+        mb = moran.Moran_Batch(self.Y, self.w, varnames=self.names,
+                               permutations=99, seed=1)
+        res = moran.Moran_BV_matrix([self.Y[:, i] for i in range(4)],
+                                    self.w, varnames=self.names)
+        for (i, j), mbv in res.items():
+            self.assertAlmostEqual(mb.I_bv[i, j], mbv.I)
+        bv = moran.Moran_BV(self.Y[:, 0], self.Y[:, 1], self.w,
+                            permutations=99, seed=1)
+        self.assertAlmostEqual(mb.p_sim_bv[0, 1], bv.p_sim)
+        np.testing.assert_allclose(mb.EI_sim_bv[0, 1], bv.EI_sim,
+                                   rtol=RTOL, atol=ATOL)
+        np.testing.assert_allclose(mb.seI_sim_bv[0, 1], bv.seI_sim,
+                                   rtol=RTOL, atol=ATOL)
+
+    @unittest.skipIf(PANDAS_EXTINCT, 'missing pandas')
+    def test_dataframe(self):
+        df = pandas.DataFrame(self.Y, columns=self.names)
+        mb = moran.Moran_Batch(df, self.w, permutations=0, bivariate=False)
+        self.assertEqual(mb.varnames, self.names)
+        self.assertFalse(hasattr(mb, 'I_bv'))
+        np.testing.assert_allclose(mb.I[0], 0.24772519320480135,
+                                   rtol=RTOL, atol=ATOL)
+
+
 class Moran_Local_Tester(unittest.TestCase):
     def setUp(self):
         np.random.seed(10)
@@ -175,7 +257,7 @@ class Moran_Local_Rate_Tester(unittest.TestCase):
 
 suite = unittest.TestSuite()
 test_classes = [Moran_Tester, Moran_Rate_Tester,
-                Moran_BV_matrix_Tester, Moran_Local_Tester,
+                Moran_BV_matrix_Tester, Moran_Batch_Tester, Moran_Local_Tester,
                 Moran_Local_BV_Tester, Moran_Local_Rate_Tester]
 for i in test_classes:
     a = unittest.TestLoader().loadTestsFromTestCase(i)
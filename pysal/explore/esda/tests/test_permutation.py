@@ -0,0 +1,116 @@
+import unittest
+from functools import partial
+import pysal.lib
+from pysal.lib.common import RTOL, ATOL
+from .. import permutation
+from ..moran import Moran, Moran_BV
+from ..geary import Geary
+from ..gamma import Gamma
+from ..getisord import G
+from ..join_counts import Join_Counts
+import numpy as np
+
+
+def _sum_products(Z, w):
+    return (Z * (w.sparse * Z)).sum(0)
+
+
+class Permutation_Tester(unittest.TestCase):
+    def setUp(self):
+        self.w = pysal.lib.io.open(pysal.lib.examples.get_path("stl.gal")).read()
+        f = pysal.lib.io.open(pysal.lib.examples.get_path("stl_hom.txt"))
+        self.y = np.array(f.by_col['HR8893'])
+
+    def test_permutation_matrix(self):
+        np.random.seed(10)
+        ids = permutation.permutation_matrix(self.w.n, 5)
+        np.random.seed(10)
+        loop = np.array([np.random.permutation(self.y) for i in range(5)])
+        np.testing.assert_allclose(self.y[ids], loop)
+        self.assertTrue((np.sort(ids, axis=1) == np.arange(self.w.n)).all())
+
+    def test_simulate(self):
+        func = lambda Z: _sum_products(Z, self.w)
+        a = permutation.simulate(func, self.y, 99, seed=1)
+        b = permutation.simulate(func, self.y, 99, seed=1, batchsize=10)
+        self.assertEqual(a.shape, (99,))
+        np.testing.assert_allclose(a, b, rtol=RTOL, atol=ATOL)
+
+    @unittest.skipIf(not hasattr(np.random, 'default_rng'),
+                     'numpy.random.Generator not available')
+    def test_generator(self):
+        func = lambda Z: _sum_products(Z, self.w)
+        a = permutation.simulate(func, self.y, 99,
+                                 seed=np.random.default_rng(3))
+        b = permutation.simulate(func, self.y, 99,
+                                 seed=np.random.default_rng(3))
+        np.testing.assert_allclose(a, b)
+
+    def test_parallel(self):
+        func = partial(_sum_products, w=self.w)
+        serial = permutation.simulate(func, self.y, 99, seed=5, batchsize=10)
+        a = permutation.simulate(func, self.y, 99, n_jobs=2, seed=5,
+                                 batchsize=10)
+        b = permutation.simulate(func, self.y, 99, n_jobs=3, seed=5,
+                                 batchsize=10)
+        self.assertEqual(a.shape, (99,))
+        # batches drawn in the worker processes from their own seeds
+        self.assertFalse(np.allclose(a, serial))
+        np.testing.assert_allclose(a, b, rtol=RTOL, atol=ATOL)
+        # without a batchsize, n_jobs still splits the permutations
+        mi = Moran(self.y, self.w, permutations=99, n_jobs=2, seed=5)
+        mi2 = Moran(self.y, self.w, permutations=99, seed=5)
+        self.assertEqual(mi.sim.shape, (99,))
+        self.assertFalse(np.allclose(mi.sim, mi2.sim))
+        mi3 = Moran(self.y, self.w, permutations=99, n_jobs=2, seed=5)
+        np.testing.assert_allclose(mi.sim, mi3.sim, rtol=RTOL, atol=ATOL)
+
+    def test_matches_loop(self):
+        np.random.seed(12345)
+        sims = [np.random.permutation(self.y) for i in range(19)]
+        mi = Moran(self.y, self.w, permutations=19, seed=12345)
+        z = self.y - self.y.mean()
+        loop = [(zp * (self.w.sparse * zp)).sum() for zp in
+                (s - self.y.mean() for s in sims)]
+        loop = np.array(loop) * self.w.n / self.w.s0 / (z * z).sum()
+        np.testing.assert_allclose(mi.sim, loop, rtol=RTOL, atol=ATOL)
+
+    def test_statistics(self):
+        x = self.y[::-1]
+        for stat in (Moran(self.y, self.w, permutations=9, seed=1),
+                     Moran_BV(x, self.y, self.w, permutations=9, seed=1),
+                     Geary(self.y, self.w, permutations=9, seed=1),
+                     G(self.y, self.w, permutations=9, seed=1)):
+            self.assertEqual(stat.sim.shape, (9,))
+            self.assertTrue(0 < stat.p_sim <= 0.5)
+        for op in ('c', 's', 'a'):
+            g = Gamma(self.y, self.w, operation=op, permutations=9, seed=1)
+            g0 = Gamma(self.y, self.w, operation=op, permutations=0)
+            self.assertEqual(g.sim_g.shape, (9,))
+            np.testing.assert_allclose(g.g, g0.g, rtol=RTOL, atol=ATOL)
+        yb = (self.y > self.y.mean()) * 1
+        jc = Join_Counts(yb, self.w, permutations=9, seed=1)
+        rng = np.random.RandomState(1)
+        bb = [(z * (self.w.sparse * z)).sum() / 2. for z in
+              (rng.permutation(yb) for i in range(9))]
+        np.testing.assert_allclose(jc.sim_bb, bb, rtol=RTOL, atol=ATOL)
+
+    def test_gamma_ops_match(self):
+        # the vectorized squared and absolute difference operations agree
+        # with the user defined operation path
+        w = pysal.lib.io.open(pysal.lib.examples.get_path("stl.gal")).read()
+        sq = lambda z, i, j: (z[i] - z[j]) ** 2
+        ab = lambda z, i, j: abs(z[i] - z[j])
+        for op, func in (('s', sq), ('a', ab)):
+            g1 = Gamma(self.y, w, operation=op, permutations=19, seed=2)
+            g2 = Gamma(self.y, w, operation=func, permutations=19, seed=2)
+            np.testing.assert_allclose(g1.g, g2.g, rtol=RTOL, atol=ATOL)
+            np.testing.assert_allclose(g1.sim_g, g2.sim_g, rtol=RTOL,
+                                       atol=ATOL)
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(Permutation_Tester)
+
+if __name__ == '__main__':
+    runner = unittest.TextTestRunner()
+    runner.run(suite)
@@ -3,12 +3,17 @@ Distance statistics for planar point patterns
 
 """
 __author__ = "Serge Rey sjsrey@gmail.com"
-__all__ = ['DStatistic', 'G', 'F', 'J', 'K', 'L', 'Envelopes', 'Genv', 'Fenv', 'Jenv', 'Kenv', 'Lenv']
+__all__ = ['DStatistic', 'G', 'F', 'J', 'K', 'L', 'Envelopes', 'Genv', 'Fenv',
+           'Jenv', 'Kenv', 'Lenv', 'EnvelopeBounds']
 
 from .process import PoissonPointProcess as csr
+import multiprocessing as mp
 import numpy as np
 from matplotlib import pyplot as plt
 
+# upper bound on the number of realizations evaluated at once by Envelopes
+CHUNK_REALIZATIONS = 100
+
 
 class DStatistic(object):
     """
@@ -235,6 +240,9 @@ class K(DStatistic):
     d          : sequence
                  The distance domain sequence.
                  If d is specified, intervals, dmin and dmax are ignored.
+    edge_correction : string
+                 None (default) for no edge correction, "border" or
+                 "translation".
 
     Attributes
     ----------
@@ -244,8 +252,9 @@ class K(DStatistic):
                  K function over d.
 
     """
-    def __init__(self, pp, intervals=10, dmin=0.0, dmax=None, d=None):
-        res = _k(pp, intervals, dmin, dmax, d)
+    def __init__(self, pp, intervals=10, dmin=0.0, dmax=None, d=None,
+                 edge_correction=None):
+        res = _k(pp, intervals, dmin, dmax, d, edge_correction)
         self.d = res[:, 0]
         self.k = self._stat = res[:, 1]
         self.ev = np.pi * self.d * self.d
@@ -269,6 +278,9 @@ class L(DStatistic):
     d          : sequence
                  The distance domain sequence.
                  If d is specified, intervals, dmin and dmax are ignored.
+    edge_correction : string
+                 None (default) for no edge correction, "border" or
+                 "translation".
 
     Attributes
     ----------
@@ -277,8 +289,9 @@ class L(DStatistic):
     l          : array
                  L function over d.
     """
-    def __init__(self, pp, intervals=10, dmin=0.0, dmax=None, d=None):
-        res = _l(pp, intervals, dmin, dmax, d)
+    def __init__(self, pp, intervals=10, dmin=0.0, dmax=None, d=None,
+                 edge_correction=None):
+        res = _l(pp, intervals, dmin, dmax, d, edge_correction)
         self.d = res[:, 0]
         self.l = self._stat = res[:, 1]
         super(L, self).__init__(name="L")
@@ -433,7 +446,7 @@ def _j(pp, n=100, intervals=10, dmin=0.0, dmax=None, d=None):
     return np.vstack((F[:last_id, 0], GC[:last_id]/FC[:last_id])).T
 
 
-def _k(pp, intervals=10, dmin=0.0, dmax=None, d=None):
+def _k(pp, intervals=10, dmin=0.0, dmax=None, d=None, edge_correction=None):
     """
     Interevent K function.
 
@@ -453,6 +466,12 @@ def _k(pp, intervals=10, dmin=0.0, dmax=None, d=None):
     d        : sequence
                The distance domain sequence. If d is specified, intervals, dmin
                and dmax are ignored.
+    edge_correction : string
+               None (default) for no correction, "border" to only count
+               neighbors of the events at least d away from the window
+               boundary, or "translation" to weight each pair by the inverse
+               of the share of the window's bounding box it can be
+               translated within.
 
     Returns
     -------
@@ -465,6 +484,9 @@ def _k(pp, intervals=10, dmin=0.0, dmax=None, d=None):
     -----
     See :class:`.K`
 
+    All pairs of events up to the largest distance of the domain are found
+    once, and the function is accumulated over their sorted distances.
+
     """
 
     if d is None:
@@ -475,12 +497,70 @@ def _k(pp, intervals=10, dmin=0.0, dmax=None, d=None):
         if dmax:
             w = dmax/intervals
         d = [w*i for i in range(intervals + 2)]
+    d = np.asarray(d, dtype=float)
     den = pp.lambda_window * pp.n * 2.
-    kcdf = np.asarray([(di, len(pp.tree.query_pairs(di))/den) for di in d])
+    i, j, dij = _pairs(pp, d.max() if d.shape[0] else 0.)
+    order = np.argsort(dij, kind='mergesort')
+    dij = dij[order]
+
+    if edge_correction is None:
+        pairs = np.searchsorted(dij, d, side='right')
+    elif edge_correction == 'border':
+        # an ordered pair (i, j) counts at d when dij <= d <= b_i, b_i being
+        # the distance from event i to the window boundary
+        b = pp.window.boundary_distances(pp.points)
+        bi = np.concatenate((b[i[order]], b[j[order]]))
+        rij = np.concatenate((dij, dij))
+        valid = bi >= rij
+        ordered = (np.searchsorted(np.sort(rij[valid]), d, side='right') -
+                   np.searchsorted(np.sort(bi[valid]), d, side='left'))
+        focal = pp.n - np.searchsorted(np.sort(b), d, side='left')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pairs = ordered / 2. * pp.n / focal
+    elif edge_correction == 'translation':
+        l, b, r, t = pp.window.bbox
+        width, height = r - l, t - b
+        xy = np.asarray(pp.points)
+        dx = np.abs(xy[i, 0] - xy[j, 0])[order]
+        dy = np.abs(xy[i, 1] - xy[j, 1])[order]
+        weights = width * height / ((width - dx) * (height - dy))
+        cum = np.concatenate(([0.], np.cumsum(weights)))
+        pairs = cum[np.searchsorted(dij, d, side='right')]
+    else:
+        raise ValueError("edge_correction must be None, 'border' or "
+                         "'translation', not {!r}".format(edge_correction))
+    kcdf = np.column_stack((d, pairs / den))
     return kcdf
 
 
-def _l(pp, intervals=10, dmin=0.0, dmax=None, d=None):
+def _pairs(pp, dmax):
+    """
+    Pairs of events within a distance of each other.
+
+    Parameters
+    ----------
+    pp       : :class:`.PointPattern`
+               Point Pattern instance.
+    dmax     : float
+               Largest distance between the events of a pair.
+
+    Returns
+    -------
+    i, j     : array
+               (npairs,) indices of the events of each pair, i < j.
+    dij      : array
+               (npairs,) distances between them.
+
+    """
+    pairs = pp.tree.query_pairs(dmax, output_type='ndarray')
+    pairs = np.asarray(pairs, dtype=int).reshape(-1, 2)
+    i, j = pairs[:, 0], pairs[:, 1]
+    xy = np.asarray(pp.points)
+    dij = np.hypot(xy[i, 0] - xy[j, 0], xy[i, 1] - xy[j, 1])
+    return i, j, dij
+
+
+def _l(pp, intervals=10, dmin=0.0, dmax=None, d=None, edge_correction=None):
     """
     Interevent L function.
 
@@ -500,6 +580,8 @@ def _l(pp, intervals=10, dmin=0.0, dmax=None, d=None):
     d        : sequence
                The distance domain sequence. If d is specified, intervals, dmin
                and dmax are ignored.
+    edge_correction : string
+               None, "border" or "translation", see :func:`_k`.
 
     Returns
     -------
@@ -514,11 +596,108 @@ def _l(pp, intervals=10, dmin=0.0, dmax=None, d=None):
 
     """
 
-    kf = _k(pp, intervals, dmin, dmax, d)
+    kf = _k(pp, intervals, dmin, dmax, d, edge_correction)
     kf[:, 1] = np.sqrt(kf[:, 1] / np.pi) - kf[:, 0]
     return kf
 
 
+def _init_worker(envelope):
+    global _ENVELOPE
+    _ENVELOPE = envelope
+
+
+def _chunk(args):
+    """Evaluate the function on one chunk of realizations."""
+    reals, seed = args
+    np.random.seed(seed)
+    return _ENVELOPE._simulated(reals)
+
+
+class EnvelopeBounds(object):
+    """
+    Streaming aggregation of simulated function values into envelopes.
+
+    The bounds are the order statistics of ranks ``int(nres * pct / 2)`` and
+    ``int(nres * (1 - pct / 2))`` at each distance, as when all simulations
+    are sorted, but only the values below the first and above the second
+    rank are kept while simulations are added, along with a running sum for
+    the mean.
+
+    Parameters
+    ----------
+    nres        : int
+                  Total number of simulations.
+    pct         : float
+                  1-alpha, alpha is the significance level.
+    nd          : int
+                  Length of the distance domain sequence.
+
+    Attributes
+    ----------
+    low         : array
+                  (nd,) lower bound of the simulation envelope.
+    high        : array
+                  (nd,) higher bound of the simulation envelope.
+    mean        : array
+                  (nd,) mean of the simulations.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from pysal.explore.pointpats.distance_statistics import EnvelopeBounds
+    >>> sims = np.random.uniform(size=(999, 5))
+    >>> bounds = EnvelopeBounds(999, 0.05, 5)
+    >>> for start in range(0, 999, 100):
+    ...     bounds.update(sims[start:start + 100])
+    >>> sims.sort(axis=0)
+    >>> np.array_equal(bounds.low, sims[24]), np.array_equal(bounds.high, sims[974])
+    (True, True)
+    """
+    def __init__(self, nres, pct, nd):
+        self.nres = nres
+        self.nlow = int(nres * pct / 2.) + 1
+        self.nhigh = nres - int(nres * (1 - pct / 2.))
+        self._low = np.empty((0, nd))
+        self._high = np.empty((0, nd))
+        self._sum = np.zeros(nd)
+        self.count = 0
+
+    def update(self, sims):
+        """
+        Add simulated values.
+
+        Parameters
+        ----------
+        sims    : array
+                  (nsims, nd) simulated function values.
+        """
+        sims = np.asarray(sims, dtype=float)
+        self._sum += sims.sum(axis=0)
+        self.count += sims.shape[0]
+        low = np.vstack((self._low, sims))
+        if low.shape[0] > self.nlow:
+            low = np.partition(low, self.nlow - 1, axis=0)[:self.nlow]
+        self._low = low
+        if self.nhigh > 0:
+            high = np.vstack((self._high, sims))
+            if high.shape[0] > self.nhigh:
+                kth = high.shape[0] - self.nhigh
+                high = np.partition(high, kth, axis=0)[kth:]
+            self._high = high
+
+    @property
+    def low(self):
+        return self._low.max(axis=0)
+
+    @property
+    def high(self):
+        return self._high.min(axis=0)
+
+    @property
+    def mean(self):
+        return self._sum / self.count
+
+
 class Envelopes(object):
     """
     Abstract base class for simulation envelopes.
@@ -541,6 +720,9 @@ class Envelopes(object):
                   1-alpha is the confidence level for the envelope.
     realizations: :class:`.PointProcess`
                   Point process instance with more than 1 realizations.
+    n_jobs      : int
+                  Number of processes the realizations are evaluated on. -1
+                  uses all available cores. Default is 1.
 
     Attributes
     ----------
@@ -566,6 +748,7 @@ class Envelopes(object):
     def __init__(self, *args,  **kwargs):
         # setup arguments
         self.name = kwargs['name']
+        self.n_jobs = kwargs.get('n_jobs', 1)
 
         # calculate observed function
         self.pp = args[0]
@@ -577,28 +760,47 @@ class Envelopes(object):
 
     def mapper(self, realizations):
         reals = realizations.realizations
-        res = np.asarray([self.calc(reals[p]) for p in reals])
-
-        # When calculating the J function for all the simulations, the length
-        # of the returned interval domains might be different.
-
-        if self.name == "J":
-            res = []
-            for p in reals:
-                j = self.calc(reals[p])
-                if j.shape[0] < self.d.shape[0]:
-                    diff = self.d.shape[0]-j.shape[0]
-                    for i in range(diff):
-                        j = np.append(j, [[self.d[i+diff], np.inf]], axis=0)
-                res.append(j)
-            res = np.array(res)
-
-        res = res[:, :, -1]
-        res.sort(axis=0)
-        nres = len(res)
-        self.low = res[np.int(nres * self.pct/2.)]
-        self.high = res[np.int(nres * (1-self.pct/2.))]
-        self.mean = res.mean(axis=0)
+        reals = [reals[p] for p in reals]
+        nres = len(reals)
+        bounds = EnvelopeBounds(nres, self.pct, self.d.shape[0])
+
+        # Realizations are evaluated in chunks, serially or over a pool of
+        # processes, and only the simulated values needed for the bounds are
+        # kept.
+        n_jobs = mp.cpu_count() if self.n_jobs == -1 else self.n_jobs
+        size = max(1, min(CHUNK_REALIZATIONS,
+                          -(-nres // (4 * max(n_jobs, 1)))))
+        chunks = [reals[i:i + size] for i in range(0, nres, size)]
+        if n_jobs > 1 and len(chunks) > 1:
+            # F and J draw random points: each chunk gets its own seed
+            seeds = np.random.randint(0, np.iinfo(np.int32).max,
+                                      size=len(chunks))
+            P = mp.Pool(n_jobs, initializer=_init_worker, initargs=(self,))
+            for res in P.imap(_chunk, list(zip(chunks, seeds.tolist()))):
+                bounds.update(res)
+            P.close()
+            P.join()
+        else:
+            for chunk in chunks:
+                bounds.update(self._simulated(chunk))
+        self.low = bounds.low
+        self.high = bounds.high
+        self.mean = bounds.mean
+
+    def _simulated(self, reals):
+        """
+        Function values over the domain for a sequence of realizations.
+
+        When calculating the J function for the simulations, the length of
+        the returned interval domains might be shorter; the missing values
+        are set to inf.
+        """
+        res = np.empty((len(reals), self.d.shape[0]))
+        res[:] = np.inf
+        for r, real in enumerate(reals):
+            values = self.calc(real)[:, -1]
+            res[r, :values.shape[0]] = values
+        return res
 
     def calc(self, *args, **kwargs):
         print('implement in subclass')
@@ -639,6 +841,9 @@ class Genv(Envelopes):
                   which means 95% confidence level for the envelopes.
     realizations: :class:`.PointProcess`
                   Point process instance with more than 1 realizations.
+    n_jobs      : int
+                  Number of processes the realizations are evaluated on. -1
+                  uses all available cores. Default is 1.
 
     Attributes
     ----------
@@ -677,14 +882,15 @@ class Genv(Envelopes):
     """
 
     def __init__(self, pp, intervals=10, dmin=0.0, dmax=None, d=None, pct=0.05,
-                 realizations=None):
+                 realizations=None, n_jobs=1):
         self.pp = pp
         self.intervals = intervals
         self.dmin = dmin
         self.dmax = dmax
         self.d = d
         self.pct = pct
-        super(Genv, self).__init__(pp, realizations=realizations, name="G")
+        super(Genv, self).__init__(pp, realizations=realizations, name="G",
+                                   n_jobs=n_jobs)
 
     def calc(self, *args, **kwargs):
         pp = args[0]
@@ -717,6 +923,9 @@ class Fenv(Envelopes):
                   which means 95% confidence level for the envelopes.
     realizations: :class:`.PointProcess`
                   Point process instance with more than 1 realizations.
+    n_jobs      : int
+                  Number of processes the realizations are evaluated on. -1
+                  uses all available cores. Default is 1.
 
     Attributes
     ----------
@@ -754,7 +963,7 @@ class Fenv(Envelopes):
 
     """
     def __init__(self, pp, n=100, intervals=10, dmin=0.0, dmax=None, d=None,
-                 pct=0.05, realizations=None):
+                 pct=0.05, realizations=None, n_jobs=1):
         self.pp = pp
         self.n = n
         self.intervals = intervals
@@ -762,7 +971,8 @@ class Fenv(Envelopes):
         self.dmax = dmax
         self.d = d
         self.pct = pct
-        super(Fenv, self).__init__(pp, realizations=realizations, name="F")
+        super(Fenv, self).__init__(pp, realizations=realizations, name="F",
+                                   n_jobs=n_jobs)
 
     def calc(self, *args, **kwargs):
         pp = args[0]
@@ -795,6 +1005,9 @@ class Jenv(Envelopes):
                   which means 95% confidence level for the envelopes.
     realizations: :class:`.PointProcess`
                   Point process instance with more than 1 realizations.
+    n_jobs      : int
+                  Number of processes the realizations are evaluated on. -1
+                  uses all available cores. Default is 1.
 
     Attributes
     ----------
@@ -832,7 +1045,7 @@ class Jenv(Envelopes):
 
     """
     def __init__(self, pp, n=100, intervals=10, dmin=0.0, dmax=None, d=None,
-                 pct=0.05, realizations=None):
+                 pct=0.05, realizations=None, n_jobs=1):
         self.pp = pp
         self.n = n
         self.intervals = intervals
@@ -840,7 +1053,8 @@ class Jenv(Envelopes):
         self.dmax = dmax
         self.d = d
         self.pct = pct
-        super(Jenv, self).__init__(pp, realizations=realizations, name="J")
+        super(Jenv, self).__init__(pp, realizations=realizations, name="J",
+                                   n_jobs=n_jobs)
 
     def calc(self, *args, **kwargs):
         pp = args[0]
@@ -871,6 +1085,12 @@ class Kenv(Envelopes):
                   which means 95% confidence level for the envelope.
     realizations: :class:`.PointProcess`
                   Point process instance with more than 1 realizations.
+    edge_correction : string
+                  None (default) for no edge correction, "border" or
+                  "translation".
+    n_jobs      : int
+                  Number of processes the realizations are evaluated on. -1
+                  uses all available cores. Default is 1.
 
     Attributes
     ----------
@@ -908,19 +1128,22 @@ class Kenv(Envelopes):
 
     """
     def __init__(self, pp, intervals=10, dmin=0.0, dmax=None, d=None,
-                 pct=0.05, realizations=None):
+                 pct=0.05, realizations=None, edge_correction=None,
+                 n_jobs=1):
         self.pp = pp
+        self.edge_correction = edge_correction
         self.intervals = intervals
         self.dmin = dmin
         self.dmax = dmax
         self.d = d
         self.pct = pct
-        super(Kenv, self).__init__(pp, realizations=realizations, name="K")
+        super(Kenv, self).__init__(pp, realizations=realizations, name="K",
+                                   n_jobs=n_jobs)
 
     def calc(self, *args, **kwargs):
         pp = args[0]
         return _k(pp, intervals=self.intervals, dmin=self.dmin, dmax=self.dmax,
-                  d=self.d)
+                  d=self.d, edge_correction=self.edge_correction)
 
 
 class Lenv(Envelopes):
@@ -946,6 +1169,12 @@ class Lenv(Envelopes):
                   which means 95% confidence level for the envelopes.
     realizations: :class:`.PointProcess`
                   Point process instance with more than 1 realizations.
+    edge_correction : string
+                  None (default) for no edge correction, "border" or
+                  "translation".
+    n_jobs      : int
+                  Number of processes the realizations are evaluated on. -1
+                  uses all available cores. Default is 1.
 
     Attributes
     ----------
@@ -984,16 +1213,19 @@ class Lenv(Envelopes):
     """
 
     def __init__(self, pp, intervals=10, dmin=0.0, dmax=None, d=None,
-                 pct=0.05, realizations=None):
+                 pct=0.05, realizations=None, edge_correction=None,
+                 n_jobs=1):
         self.pp = pp
+        self.edge_correction = edge_correction
         self.intervals = intervals
         self.dmin = dmin
         self.dmax = dmax
         self.d = d
         self.pct = pct
-        super(Lenv, self).__init__(pp, realizations=realizations, name="L")
+        super(Lenv, self).__init__(pp, realizations=realizations, name="L",
+                                   n_jobs=n_jobs)
 
     def calc(self, *args, **kwargs):
         pp = args[0]
         return _l(pp, intervals=self.intervals, dmin=self.dmin, dmax=self.dmax,
-                  d=self.d)
+                  d=self.d, edge_correction=self.edge_correction)
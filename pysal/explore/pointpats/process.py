@@ -104,8 +104,18 @@ class PointProcess(object):
         self.args = args
         self.realizations = {}
         self.setup()
-        for sample in range(samples):
-            self.realizations[sample] = self.draw(self.parameters[sample])
+        if getattr(self, 'batched', False):
+            # rows are padded with nan past the size of their realization
+            sizes = [self.parameters[sample]['n'] for sample in range(samples)]
+            nmax = max(sizes) if sizes else 0
+            self.realizations_array = self.draw_batch(nmax, samples)
+            for sample, size in enumerate(sizes):
+                self.realizations_array[sample, size:] = np.nan
+                self.realizations[sample] = \
+                    self.realizations_array[sample, :size]
+        else:
+            for sample in range(samples):
+                self.realizations[sample] = self.draw(self.parameters[sample])
         if asPP:
             for sample in self.realizations:
                 points = self.realizations[sample]
@@ -131,12 +141,13 @@ class PointProcess(object):
         sample = []
         n = parameter['n']
         while c < n:
-            pnts = self.realize(n)
-            pnts = [ps.cg.shapes.Point((x, y)) for x, y in pnts]
-            pins = self.window.filter_contained(pnts)
-            sample.extend(pins)
-            c = len(sample)
-        return np.array([np.asarray(p) for p in sample[:n]])
+            pnts = np.asarray(self.realize(n), dtype=float).reshape(-1, 2)
+            pins = pnts[self.window.contains_points(pnts)]
+            sample.append(pins)
+            c += pins.shape[0]
+        if not sample:
+            return np.empty((0, 2))
+        return np.vstack(sample)[:n]
 
     def realize(self):
         pass
@@ -168,6 +179,10 @@ class PoissonPointProcess(PointProcess):
                     dictionary. If True, the data type is point
                     pattern as defined in pointpattern.py; if False,
                     the data type is an two-dimensional array.
+    batched       : bool
+                    If True, draw all realizations at once with
+                    :meth:`draw_batch` and keep them in
+                    "realizations_array". Default is False.
 
     Attributes
     ----------
@@ -187,6 +202,11 @@ class PoissonPointProcess(PointProcess):
                     2. randomly generated from a Possion process in
                     the case of lambda-conditioned process.
                     For example, {0:{'n':97},1:{'n':100},2:{'n':98}}
+    realizations_array : array
+                    (samples, n, 2) event points of all realizations,
+                    only if "batched" is True. With the
+                    :math:`\lambda`-conditioned process, n is the largest
+                    realization size and rows are padded with nan.
 
     Examples
     --------
@@ -235,10 +255,20 @@ class PoissonPointProcess(PointProcess):
     >>> samples2.realizations[1].n # the size of second realized point pattern
     13
 
+    3. Simulate 999 :math:`N`-conditioned csr realizations at once
+
+    >>> samples3 = PoissonPointProcess(window, 10, 999, batched=True)
+    >>> samples3.realizations_array.shape
+    (999, 10, 2)
+    >>> bool(window.contains_points(samples3.realizations_array).all())
+    True
+
     """
 
-    def __init__(self, window, n, samples, conditioning=False, asPP=False):
+    def __init__(self, window, n, samples, conditioning=False, asPP=False,
+                 batched=False):
         self.conditioning = conditioning
+        self.batched = batched
         super(PoissonPointProcess, self).__init__(window, n, samples, asPP)
 
     def setup(self):
@@ -279,7 +309,46 @@ class PoissonPointProcess(PointProcess):
         l, b, r, t = self.window.bbox
         xs = np.random.uniform(l, r, (n, 1))
         ys = np.random.uniform(b, t, (n, 1))
-        return zip(xs, ys)
+        return np.hstack((xs, ys))
+
+    def draw_batch(self, n, samples):
+        """
+        Generate all realizations at once within the given window.
+
+        Candidates for all samples are drawn in the bounding box of the
+        window and tested for containment together, then dealt out to the
+        realizations in order.
+
+        Parameters
+        ----------
+        n             : int
+                        Size of each realization.
+        samples       : int
+                        Number of realizations.
+
+        Returns
+        -------
+                      : array
+                        (samples, n, 2), point coordinates of each
+                        realization.
+
+        """
+
+        total = n * samples
+        pnts = np.empty((total, 2))
+        c = 0
+        drawn = 0
+        while c < total:
+            need = total - c
+            # ask for enough candidates given the share accepted so far
+            rate = c / float(drawn) if c else 1.
+            candidates = self.realize(int(np.ceil(need / max(rate, 1e-3))))
+            drawn += candidates.shape[0]
+            pins = candidates[self.window.contains_points(candidates)]
+            pins = pins[:need]
+            pnts[c:c + pins.shape[0]] = pins
+            c += pins.shape[0]
+        return pnts.reshape(samples, n, 2)
 
 
 class PoissonClusterPointProcess(PointProcess):
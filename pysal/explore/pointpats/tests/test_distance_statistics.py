@@ -3,6 +3,7 @@ import numpy as np
 
 from ..distance_statistics import *
 from ..pointpattern import PointPattern
+from ..process import PoissonPointProcess
 
 
 class TestDistanceStatistics(unittest.TestCase):
@@ -89,6 +90,46 @@ class TestDistanceStatistics(unittest.TestCase):
         np.testing.assert_array_almost_equal(k.ev, envelop)
         np.testing.assert_array_almost_equal(k.d, distance_domain_sequence)
 
+    def test_distance_statistics_K_single_pass(self):
+        k = K(self.pp, intervals=20)
+        den = self.pp.lambda_window * self.pp.n * 2.
+        known = [len(self.pp.tree.query_pairs(di)) / den for di in k.d]
+        np.testing.assert_array_almost_equal(k.k, known)
+
+    def test_distance_statistics_K_edge_correction(self):
+        k = K(self.pp, intervals=20)
+        for correction in ['border', 'translation']:
+            kc = K(self.pp, intervals=20, edge_correction=correction)
+            np.testing.assert_array_almost_equal(kc.d, k.d)
+            self.assertEqual(kc.k[0], 0.)
+        # no neighbors within the nearest neighbor distance, where the
+        # corrections leave the function at zero
+        small = K(self.pp, d=[self.pp.min_nnd * 0.9],
+                  edge_correction='border')
+        self.assertEqual(small.k[0], 0.)
+        kt = K(self.pp, intervals=20, edge_correction='translation')
+        self.assertTrue((kt.k >= k.k).all())
+        with self.assertRaises(ValueError):
+            K(self.pp, intervals=20, edge_correction='ripley')
+
+    def test_envelope_bounds(self):
+        sims = np.random.RandomState(0).uniform(size=(199, 7))
+        bounds = EnvelopeBounds(199, 0.1, 7)
+        for start in range(0, 199, 30):
+            bounds.update(sims[start:start + 30])
+        full = np.sort(sims, axis=0)
+        np.testing.assert_array_equal(bounds.low, full[int(199 * 0.05)])
+        np.testing.assert_array_equal(bounds.high, full[int(199 * 0.95)])
+        np.testing.assert_array_almost_equal(bounds.mean, sims.mean(axis=0))
+
+    def test_envelopes_n_jobs(self):
+        csrs = PoissonPointProcess(self.pp.window, 12, 20, asPP=True)
+        serial = Kenv(self.pp, intervals=10, realizations=csrs)
+        parallel = Kenv(self.pp, intervals=10, realizations=csrs, n_jobs=2)
+        np.testing.assert_array_almost_equal(serial.low, parallel.low)
+        np.testing.assert_array_almost_equal(serial.high, parallel.high)
+        np.testing.assert_array_almost_equal(serial.mean, parallel.mean)
+
     def test_distance_statistics_L(self):
         l = L(self.pp, intervals=20)
         distance_domain_sequence = [
@@ -0,0 +1,54 @@
+import unittest
+import numpy as np
+
+from ..window import Window, ring_contains_points
+from ..process import PoissonPointProcess
+
+
+class TestWindow(unittest.TestCase):
+
+    def setUp(self):
+        parts = [[(0, 0), (0, 10), (5, 6), (10, 10), (10, 0), (0, 0)],
+                 [(20, 0), (20, 5), (25, 5), (25, 0), (20, 0)]]
+        holes = [[(2, 2), (4, 2), (4, 4), (2, 4), (2, 2)]]
+        self.window = Window(parts, holes)
+        np.random.seed(12345)
+        points = np.random.uniform(-1, 26, (500, 2))
+        # points on the horizontals through vertices, and on vertices
+        self.points = np.vstack((points, [(1, 6), (5, 6), (1, 0), (21, 5),
+                                          (3, 3), (-1, 10), (10, 10)]))
+
+    def test_contains_points(self):
+        known = [bool(self.window.contains_point(p)) for p in self.points]
+        observed = self.window.contains_points(self.points)
+        self.assertEqual(observed.tolist(), known)
+
+    def test_filter_contained(self):
+        contained = self.window.filter_contained(self.points.tolist())
+        known = self.points[self.window.contains_points(self.points)]
+        np.testing.assert_array_equal(np.array(contained), known)
+
+    def test_ring_contains_points(self):
+        ring = np.array([(0, 0), (0, 1), (1, 1), (1, 0), (0, 0)], float)
+        points = self.points[:500] / 25.
+        observed = ring_contains_points(ring, points, chunk=3)
+        known = ((points > 0) & (points < 1)).all(axis=1)
+        np.testing.assert_array_equal(observed, known)
+
+    def test_draw_batch(self):
+        np.random.seed(5)
+        csr = PoissonPointProcess(self.window, 20, 50, batched=True)
+        self.assertEqual(csr.realizations_array.shape, (50, 20, 2))
+        pnts = csr.realizations_array.reshape(-1, 2)
+        self.assertTrue(self.window.contains_points(pnts).all())
+        np.testing.assert_array_equal(csr.realizations[3],
+                                      csr.realizations_array[3])
+        csr = PoissonPointProcess(self.window, 20, 5, conditioning=True,
+                                  batched=True)
+        for sample, parameter in csr.parameters.items():
+            self.assertEqual(csr.realizations[sample].shape,
+                             (parameter['n'], 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
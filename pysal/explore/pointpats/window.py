@@ -6,7 +6,8 @@ __author__ = "Serge Rey sjsrey@gmail.com"
 
 import pysal.lib as ps
 import numpy as np
-__all__ = ["as_window", "poly_from_bbox", "to_ccf", "Window"]
+__all__ = ["as_window", "poly_from_bbox", "to_ccf", "Window",
+           "ring_contains_points"]
 
 
 def poly_from_bbox(bbox):
@@ -68,4 +69,167 @@ class Window(ps.cg.Polygon):
             super(Window, self).__init__(parts)
 
     def filter_contained(self, points):
-        return [np.asarray(pnt) for pnt in points if self.contains_point(pnt)]
+        points = [np.asarray(pnt) for pnt in points]
+        if not points:
+            return []
+        inside = self.contains_points(np.array(points, dtype=float))
+        return [pnt for pnt, keep in zip(points, inside) if keep]
+
+    def contains_points(self, points):
+        """
+        Vectorized point containment.
+
+        Gives the same result as :meth:`contains_point` for each point, with
+        the same winding number test on every ring of the window.
+
+        Parameters
+        ----------
+        points: array_like
+                (n, 2) point coordinates.
+
+        Returns
+        -------
+        inside: array
+                (n,) boolean, True for the points in a part of the window
+                and in none of its holes.
+
+        Examples
+        --------
+        >>> from pysal.explore.pointpats import Window
+        >>> w = Window([[(0, 0), (0, 10), (10, 10), (10, 0), (0, 0)]],
+        ...            [[(2, 2), (4, 2), (4, 4), (2, 4), (2, 2)]])
+        >>> w.contains_points([(3., 3.), (1., 1.), (11., 1.)]).tolist()
+        [False, True, False]
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        parts, holes = self._rings()
+        inside = np.zeros(points.shape[0], dtype=bool)
+        for ring in parts:
+            inside |= ring_contains_points(ring, points)
+        for ring in holes:
+            inside &= ~ring_contains_points(ring, points)
+        return inside
+
+    def boundary_distances(self, points, chunk=2 ** 20):
+        """
+        Distances from points to the boundary of the window.
+
+        Parameters
+        ----------
+        points: array_like
+                (n, 2) point coordinates.
+        chunk:  int
+                Upper bound on the number of (edge, point) pairs measured at
+                once.
+
+        Returns
+        -------
+        dist:   array
+                (n,) distance from each point to the closest edge of any part
+                or hole of the window.
+
+        Examples
+        --------
+        >>> from pysal.explore.pointpats import Window
+        >>> w = Window([[(0, 0), (0, 10), (10, 10), (10, 0), (0, 0)]])
+        >>> w.boundary_distances([(3., 4.), (12., 10.)]).tolist()
+        [3.0, 2.0]
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        parts, holes = self._rings()
+        sqd = np.empty(points.shape[0])
+        sqd[:] = np.inf
+        if not points.shape[0]:
+            return sqd
+        size = max(1, chunk // points.shape[0])
+        for ring in parts + holes:
+            for start in range(0, ring.shape[0] - 1, size):
+                p0 = ring[start:min(start + size, ring.shape[0] - 1)]
+                p1 = ring[start + 1:start + 1 + p0.shape[0]]
+                v = p1 - p0
+                c2 = (v * v).sum(axis=1)[:, None]
+                wx = points[:, 0] - p0[:, 0, None]
+                wy = points[:, 1] - p0[:, 1, None]
+                c1 = wx * v[:, 0, None] + wy * v[:, 1, None]
+                b = np.clip(c1 / np.where(c2 > 0, c2, 1.), 0., 1.)
+                dx = wx - b * v[:, 0, None]
+                dy = wy - b * v[:, 1, None]
+                sqd = np.minimum(sqd, (dx * dx + dy * dy).min(axis=0))
+        return np.sqrt(sqd)
+
+    def _rings(self):
+        if not hasattr(self, '_ring_arrays'):
+            self._ring_arrays = (
+                [_ring_array(r) for r in self._part_rings],
+                [_ring_array(r) for r in self._hole_rings])
+        return self._ring_arrays
+
+
+def _ring_array(ring):
+    return np.array([tuple(v) for v in ring.vertices], dtype=float)
+
+
+def ring_contains_points(ring, points, chunk=2 ** 20):
+    """
+    Winding number test of many points against a closed ring.
+
+    Vectorized form of :meth:`pysal.lib.cg.Ring.contains_point`, including
+    its bounding box check and its handling of vertices on the horizontal
+    through a point.
+
+    Parameters
+    ----------
+    ring:   array
+            (k, 2) vertices of the ring, the first repeated last.
+    points: array
+            (n, 2) point coordinates.
+    chunk:  int
+            Upper bound on the number of (edge, point) pairs tested at once.
+
+    Returns
+    -------
+    inside: array
+            (n,) boolean, True for points with a non-zero winding number.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from pysal.explore.pointpats.window import ring_contains_points
+    >>> ring = np.array([(0, 0), (0, 1), (1, 1), (1, 0), (0, 0)], float)
+    >>> ring_contains_points(ring, np.array([(.5, .5), (2., .5)])).tolist()
+    [True, False]
+    """
+    ring = np.asarray(ring, dtype=float)
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    inside = np.zeros(points.shape[0], dtype=bool)
+    lo = ring.min(axis=0)
+    hi = ring.max(axis=0)
+    candidates = np.nonzero((points[:, 0] >= lo[0]) & (points[:, 0] <= hi[0]) &
+                            (points[:, 1] >= lo[1]) &
+                            (points[:, 1] <= hi[1]))[0]
+    if not candidates.shape[0] or ring.shape[0] < 2:
+        return inside
+    px = points[candidates, 0]
+    py = points[candidates, 1]
+    w = np.zeros(candidates.shape[0])
+    nedges = ring.shape[0] - 1
+    size = max(1, chunk // candidates.shape[0])
+    for start in range(0, nedges, size):
+        stop = min(start + size, nedges)
+        xi = ring[start:stop, 0, None] - px
+        yi = ring[start:stop, 1, None] - py
+        xj = ring[start + 1:stop + 1, 0, None] - px
+        yj = ring[start + 1:stop + 1, 1, None] - py
+        # edges crossing the horizontal through the point, right of it
+        cross = yi * yj < 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = xi + yi * (xj - xi) / np.where(cross, yi - yj, 1.)
+        step = np.where(cross & (r > 0), np.where(yi < 0, 1., -1.), 0.)
+        # edges starting or ending on that horizontal, right of the point
+        starts = (yi == 0) & (xi > 0)
+        ends = ~starts & (yj == 0) & (xj > 0)
+        step += np.where(starts, np.where(yj > 0, .5, -.5), 0.)
+        step += np.where(ends, np.where(yi < 0, .5, -.5), 0.)
+        w += step.sum(axis=0)
+    inside[candidates] = w != 0
+    return inside
@@ -4,9 +4,11 @@ __version__ = "1.1.0"
 ====================================================================
 
 """
-from .network import Network, PointPattern, SimulatedPointPattern, SortedEdges
+from .network import Network, NodeDistanceCache, PointPattern
+from .network import SimulatedPointPattern, SortedEdges
 from .analysis import NetworkBase, NetworkG, NetworkK, NetworkF
 from .analysis import gfunction, kfunction, ffunction
 from .util import compute_length, get_neighbor_distances, generatetree
-from .util import dijkstra, dijkstra_mp
+from .util import dijkstra, dijkstra_mp, network_csr, shortest_paths
 from .util import squared_distance_point_segment, snap_points_on_segments
+from .util import segment_grid, snap_points_to_segments
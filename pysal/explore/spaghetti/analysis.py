@@ -1,5 +1,13 @@
+import copy
+import os
+import shutil
+import tempfile
 import numpy as np
 
+# statistic of the worker processes of NetworkBase.computebatched, set by
+# _init_worker
+_BASE = None
+
 
 class NetworkBase(object):
     """Base object for performing network analysis on a spaghetti.Network
@@ -36,6 +44,16 @@ class NetworkBase(object):
         The upper bound at which the function is computed. Defaults to
         the maximum observed nearest neighbor distance.
     
+    n_processes : int, str
+        (Optional) Specify the number of cores to spread the permutations
+        over. Use ("all") to request all available cores. Implies batched.
+    
+    batched : bool
+        Draw all simulated point patterns at once as arrays and compute their
+        distances from a node distance matrix, or cache, shared by all
+        permutations, instead of building a point pattern per permutation.
+        Default is False.
+    
     Attributes
     ----------
     
@@ -54,7 +72,8 @@ class NetworkBase(object):
     """
     def __init__(self, ntw, pointpattern, nsteps=10, permutations=99,
                  threshold=0.5, distribution='poisson',
-                 lowerbound=None, upperbound=None):
+                 lowerbound=None, upperbound=None, n_processes=None,
+                 batched=False):
         self.ntw = ntw
         self.pointpattern = pointpattern
         self.nsteps = nsteps
@@ -69,10 +88,16 @@ class NetworkBase(object):
 
         self.lowerbound = lowerbound
         self.upperbound = upperbound
+        
+        self.n_processes = n_processes
+        self.batched = batched or bool(n_processes)
 
         # Compute Statistic.
         self.computeobserved()
-        self.computepermutations()
+        if self.batched:
+            self.computebatched()
+        else:
+            self.computepermutations()
 
         # Compute the envelope vectors.
         self.computeenvelope()
@@ -96,6 +121,89 @@ class NetworkBase(object):
         self.lowerenvelope = np.nanmin(self.sim, axis=0) * lower
 
 
+    def computebatched(self):
+        """compute all permutations from arrays of simulated points, in
+        chunks of permutations spread over n_processes
+        """
+        self.ntw._share_node_distances(self.n_processes)
+        nodes, d2n, coords = self.ntw.simulate_arrays(
+            self.npts, distribution=self.distribution,
+            size=self.permutations)
+        
+        if self.n_processes:
+            import multiprocessing as mp
+            if self.n_processes == "all":
+                cores = mp.cpu_count()
+            else:
+                cores = self.n_processes
+        else:
+            cores = 1
+        chunks = [c for c in np.array_split(np.arange(self.permutations),
+                                            cores) if c.shape[0]]
+        if len(chunks) > 1:
+            tmpdir = tempfile.mkdtemp()
+            try:
+                shared = self._sharesource(nodes, tmpdir)
+                # The workers load the network once, from files they map
+                # read-only, and are only sent the simulated arrays.
+                base = copy.copy(self)
+                base.ntw = base.pointpattern = base.sim = None
+                p = mp.Pool(processes=cores, initializer=_init_worker,
+                            initargs=(base,) + shared)
+                results = p.map(_simulate_mp, [(nodes[c], d2n[c], coords[c])
+                                               for c in chunks])
+                p.close()
+                p.join()
+            finally:
+                shutil.rmtree(tmpdir)
+        else:
+            results = [self.simulatedchunk(nodes, d2n, coords)]
+        for c, simy in zip(chunks, results):
+            self.sim[c] = simy
+
+
+    def _sharesource(self, nodes, tmpdir):
+        """save the network, with its node distance matrix or the rows of
+        the simulated nodes in a node distance cache file, for the worker
+        processes
+        """
+        filename = os.path.join(tmpdir, 'network.snet')
+        self.ntw.savebinary(filename)
+        rows = None
+        if not hasattr(self.ntw, 'distancematrix'):
+            cache = self.ntw.distancecache
+            if cache.filename is None:
+                from .network import NodeDistanceCache
+                cache = NodeDistanceCache(self.ntw, max_bytes=0,
+                                          filename=os.path.join(tmpdir,
+                                                                'rows.dat'),
+                                          n_processes=self.n_processes)
+            # Rows are computed once here, so the workers only read them.
+            cache.distances(np.unique(nodes), [0])
+            rows = cache.filename
+        return filename, rows
+
+
+    def simulatedchunk(self, nodes, d2n, coords):
+        """compute the statistic of a chunk of simulated patterns given as
+        arrays
+        """
+        sim = np.empty((nodes.shape[0], self.nsteps))
+        for p in range(nodes.shape[0]):
+            sim[p] = self.simulated(nodes[p], d2n[p], coords[p])
+        return sim
+
+
+    def _simdistances(self, nodes, d2n, coords):
+        """network distances between the points of a simulated pattern,
+        with nan on the diagonal
+        """
+        nearest = self.ntw._pair_distances(nodes, d2n, coords, nodes, d2n,
+                                           coords, symmetric=True)
+        np.fill_diagonal(nearest, np.nan)
+        return nearest
+
+
     def setbounds(self, nearest):
         """set upper and lower bounds
         """
@@ -137,6 +245,15 @@ class NetworkG(NetworkBase):
             self.sim[p] = simy
 
 
+    def simulated(self, nodes, d2n, coords):
+        """compute the statistic of a simulated pattern given as arrays
+        """
+        nearest = np.nanmin(self._simdistances(nodes, d2n, coords), axis=1)
+        simx, simy = gfunction(nearest, self.lowerbound, self.upperbound,
+                               nsteps=self.nsteps)
+        return simy
+
+
 class NetworkK(NetworkBase):
     """Compute a network constrained K statistic. This requires the capability
     to compute a distance matrix between two point patterns. In this case one
@@ -184,6 +301,15 @@ class NetworkK(NetworkBase):
             self.sim[p] = simy
 
 
+    def simulated(self, nodes, d2n, coords):
+        """compute the statistic of a simulated pattern given as arrays
+        """
+        nearest = self._simdistances(nodes, d2n, coords)
+        simx, simy = kfunction(nearest, self.upperbound, self.lam,
+                               nsteps=self.nsteps)
+        return simy
+
+
 class NetworkF(NetworkBase):
     """Compute a network constrained F statistic. This requires the capability
     to compute a distance matrix between two point patterns. In this case one
@@ -229,6 +355,70 @@ class NetworkF(NetworkBase):
             self.sim[p] = simy
 
 
+    def simulated(self, nodes, d2n, coords):
+        """compute the statistic of a simulated pattern given as arrays
+        """
+        if not hasattr(self, '_fsim_arrays'):
+            indices, fnodes, fd2n = self.ntw._edge_nodes(self.fsim)
+            fcoords = np.array([self.fsim.snapped_coordinates[p]
+                                for p in indices]).reshape(-1, 2)
+            self._fsim_arrays = fnodes, fd2n, fcoords
+        nearest = np.nanmin(self.ntw._pair_distances(nodes, d2n, coords,
+                                                     *self._fsim_arrays),
+                            axis=1)
+        simx, simy = ffunction(nearest, self.lowerbound, self.upperbound,
+                               self.npts, nsteps=self.nsteps)
+        return simy
+
+
+def _init_worker(base, filename, rows):
+    """Set up the statistic of a worker process of
+    NetworkBase.computebatched.
+    
+    Parameters
+    ----------
+    
+    base : NetworkBase
+        the statistic, without its network.
+    
+    filename : str
+        network saved with savebinary(), memory mapped read-only.
+    
+    rows : str
+        node distance cache file holding the rows of the simulated nodes, or
+        None if the network file holds the node distance matrix.
+    
+    """
+    global _BASE
+    from .network import Network
+    base.ntw = Network.loadbinary(filename)
+    if rows is not None:
+        base.ntw.node_distance_cache(max_bytes=0, filename=rows)
+    _BASE = base
+
+
+def _simulate_mp(nodes_d2n_coords):
+    """Compute the statistic of a chunk of simulated patterns, for use with
+    multiprocessing.
+    
+    Parameters
+    ----------
+    
+    nodes_d2n_coords : tuple
+        (1) nodes - numpy.ndarray; (npatterns, npts, 2) nodes bounding the
+        edge of each point; (2) d2n - numpy.ndarray; distances to these
+        nodes; (3) coords - numpy.ndarray; point coordinates.
+    
+    Returns
+    -------
+    
+    sim : numpy.ndarray
+        (npatterns, nsteps) simulated y-axis values.
+    
+    """
+    return _BASE.simulatedchunk(*nodes_d2n_coords)
+
+
 def gfunction(nearest, lowerbound, upperbound, nsteps=10):
     """Compute a G-Function
 
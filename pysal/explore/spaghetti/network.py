@@ -1,8 +1,13 @@
 from collections import defaultdict, OrderedDict
+import io
+import json
 import os
 import pickle
 import copy
+import hashlib
+import struct
 import numpy as np
+from scipy import sparse
 from .analysis import NetworkG, NetworkK, NetworkF
 from . import util
 from pysal.lib import cg, examples, weights
@@ -12,7 +17,34 @@ except ImportError:
     import pysal.lib
     open = pysal.lib.io.open
 
-__all__ = ["Network", "PointPattern", "NetworkG", "NetworkK", "NetworkF"]
+__all__ = ["Network", "NodeDistanceCache", "PointPattern",
+           "NetworkG", "NetworkK", "NetworkF"]
+
+# upper bound on the number of elements (e.g. sources x nodes) held in memory
+# when shortest path lengths are computed in blocks
+CHUNK_ELEMENTS = 2 ** 22
+
+# networks with up to this many nodes get a full node distance matrix, which
+# is kept for later queries, when point pattern distances are requested
+MAX_MATRIX_NODES = 4096
+
+# (source node, destination node) combinations, by position in the bounding
+# nodes of the edges, tried for the route between two points
+PAIR_COMBOS = [(0, 0), (1, 0), (0, 1), (1, 1)]
+
+# default memory budget, in bytes, for the rows kept by a NodeDistanceCache
+CACHE_BYTES = 2 ** 28
+
+# layout of the files written by Network.savebinary; arrays start on
+# multiples of NETWORK_ALIGN bytes so that they can be memory mapped
+NETWORK_MAGIC = b'SPGHNET1'
+NETWORK_FORMAT_VERSION = 1
+NETWORK_ALIGN = 8
+
+# header of the index written next to the rows of a NodeDistanceCache: a
+# magic string and the SHA-256 digest of the graph the rows were computed on
+CACHE_MAGIC = b'SPGHIDX1'
+CACHE_HEADER = len(CACHE_MAGIC) + 32
 
 
 class Network:
@@ -78,6 +110,10 @@ class Network:
     distancematrix : numpy.ndarray
         all network nodes (non-observations) distance matrix.
     
+    distancecache : spaghetti.network.NodeDistanceCache
+        on-demand node distances, used instead of distancematrix once set
+        with node_distance_cache().
+    
     graphedges : list
         tuples of graph edge ids.
     
@@ -451,17 +487,22 @@ class Network:
         [(1, 22), (2, 58), (3, 63), (4, 40), (5, 36), (6, 3), (7, 5), (8, 3)]
         
         """
-        try:
-            hasattr(self.alldistances)
-        except AttributeError:
+        if gen_tree and not hasattr(self, 'alldistances'):
             self.node_distance_matrix(n_proccess, gen_tree=gen_tree)
-            
-        neighbor_query = np.where(self.distancematrix < threshold)
+        
+        if hasattr(self, 'distancematrix'):
+            blocks = [(np.arange(len(self.node_list)), self.distancematrix)]
+        else:
+            # Only search the network up to the threshold.
+            blocks = self._shortest_paths(self.node_list, n_proccess,
+                                          cutoff=threshold)
         neighbors = defaultdict(list)
-        for i, n in enumerate(neighbor_query[0]):
-            neigh = neighbor_query[1][i]
-            if n != neigh:
-                neighbors[n].append(neighbor_query[1][i])
+        for sources, distance in blocks:
+            neighbor_query = np.where(distance < threshold)
+            for i, n in enumerate(sources[neighbor_query[0]]):
+                neigh = neighbor_query[1][i]
+                if n != neigh:
+                    neighbors[n].append(neigh)
         w = weights.W(neighbors)
         
         return w
@@ -594,33 +635,32 @@ class Network:
         obs_to_node = defaultdict(list)
         
         pointpattern.snapped_coordinates = {}
-        segments = []
-        s2e = {}
-        for edge in self.edges:
-            head = self.node_coords[edge[0]]
-            tail = self.node_coords[edge[1]]
-            segments.append(cg.Chain([head, tail]))
-            s2e[(head, tail)] = edge
+        segments = np.array([self.node_coords[node] for edge in self.edges
+                             for node in edge], dtype=float).reshape(-1, 4)
         
         # snap points
-        points = {}
-        p2id = {}
-        for pointIdx, point in pointpattern.points.items():
-            points[pointIdx] = point['coordinates']
-        snapped = util.snap_points_on_segments(points, segments)
+        ids = list(pointpattern.points.keys())
+        points = np.array([pointpattern.points[pointIdx]['coordinates']
+                           for pointIdx in ids], dtype=float).reshape(-1, 2)
+        seg_idx, offset, snapped, snap_dist = \
+            util.snap_points_to_segments(points, segments)
+        tail = segments[seg_idx, 2:]
+        d2 = np.sqrt((snapped[:, 0] - tail[:, 0]) ** 2 +
+                     (snapped[:, 1] - tail[:, 1]) ** 2)
         
         # record obs_to_edge, dist_to_node, and dist_snapped
-        for pointIdx, snapInfo in snapped.items():
-            x, y = snapInfo[1].tolist()
-            edge = s2e[tuple(snapInfo[0])]
+        for pointIdx, s, (x, y), d1, d2, ds in zip(ids, seg_idx.tolist(),
+                                                  snapped.tolist(),
+                                                  offset.tolist(),
+                                                  d2.tolist(),
+                                                  snap_dist.tolist()):
+            edge = self.edges[s]
             if edge not in obs_to_edge:
                 obs_to_edge[edge] = {}
             obs_to_edge[edge][pointIdx] = (x, y)
             pointpattern.snapped_coordinates[pointIdx] = (x, y)
-            d1, d2 = self.compute_distance_to_nodes(x, y, edge)
             dist_to_node[pointIdx] = {edge[0]: d1, edge[1]: d2}
-            dist_snapped[pointIdx] = self.compute_snap_dist(pointpattern,
-                                                            pointIdx)
+            dist_snapped[pointIdx] = ds
         
         # record obs_to_node
         obs_to_node = defaultdict(list)
@@ -790,6 +830,76 @@ class Network:
         return simpts
 
 
+    def simulate_arrays(self, count, distribution='uniform', size=1):
+        """Generate several simulated point patterns on the network at once,
+        as arrays instead of SimulatedPointPattern objects.
+        
+        Parameters
+        ----------
+        
+        count : int
+            The number of points in each pattern, or mean of the distribution
+            if not 'uniform'.
+        
+        distribution : str
+            {'uniform', 'poisson'} distribution of random points, as in
+            simulate_observations.
+        
+        size : int
+            The number of point patterns.
+        
+        Returns
+        -------
+        
+        nodes : numpy.ndarray
+            (size, count, 2) ids of the nodes bounding the edge of each point.
+        
+        dist_to_node : numpy.ndarray
+            (size, count, 2) distances from each point to these nodes.
+        
+        coords : numpy.ndarray
+            (size, count, 2) coordinates of the points.
+        
+        Examples
+        --------
+        
+        >>> import pysal.explore.spaghetti as spgh
+        >>> ntw = spgh.Network(examples.get_path('streets.shp'))
+        >>> nodes, d2n, coords = ntw.simulate_arrays(10, size=3)
+        >>> nodes.shape, d2n.shape, coords.shape
+        ((3, 10, 2), (3, 10, 2), (3, 10, 2))
+        
+        """
+        nedges = len(self.edge_lengths)
+        edges = np.fromiter((n for e in self.edge_lengths for n in e),
+                            dtype=np.int64, count=2 * nedges).reshape(-1, 2)
+        lengths = np.fromiter(self.edge_lengths.values(), dtype=float,
+                              count=nedges)
+        stops = np.cumsum(lengths)
+        totallength = stops[-1]
+        
+        if distribution == 'uniform':
+            r = np.random.uniform(0, totallength, size=(size, count))
+        elif distribution == 'poisson':
+            mid_length = totallength / 2.
+            r = np.random.poisson(mid_length, size=(size, count))
+        idx = np.minimum(np.searchsorted(stops, r, side='right'), nedges - 1)
+        
+        # As in simulate_observations, points are placed from the cumulative
+        # length at the end of their edge.
+        length = lengths[idx]
+        distance_from_start = np.clip(stops[idx] - r, 0., length)
+        dist_to_node = np.stack((distance_from_start,
+                                 length - distance_from_start), axis=-1)
+        
+        xy = np.array([self.node_coords[n] for n in edges.ravel()],
+                      dtype=float).reshape(-1, 2, 2)[idx]
+        frac = distance_from_start / np.where(length > 0., length, 1.)
+        coords = xy[..., 0, :] + frac[..., None] * (xy[..., 1, :] -
+                                                    xy[..., 0, :])
+        return edges[idx], dist_to_node, coords
+
+
     def enum_links_node(self, v0):
         """Returns the edges (links) around node.
         
@@ -822,6 +932,47 @@ class Network:
         return links
 
 
+    def csrgraph(self, cost=None):
+        """Compressed sparse row (CSR) representation of the network.
+        
+        Parameters
+        ----------
+        
+        cost : dict
+            key is tuple (start node, end node); value is float.
+            Cost per edge to travel. Default is None, for edge_lengths.
+        
+        Returns
+        -------
+        
+        graph : scipy.sparse.csr_matrix
+            (nnodes, nnodes) symmetric matrix with the cost of each edge.
+            The graph is built once for a given cost dict and cached.
+        
+        Examples
+        --------
+        
+        >>> import pysal.explore.spaghetti as spgh
+        >>> ntw = spgh.Network(examples.get_path('streets.shp'))
+        >>> graph = ntw.csrgraph()
+        >>> graph.shape
+        (230, 230)
+        >>> graph.indices[graph.indptr[24]:graph.indptr[25]].tolist()
+        [25, 26, 48]
+        
+        """
+        if cost is None:
+            cost = self.edge_lengths
+        # the cost dict itself is kept with the graph: comparing ids would
+        # match a new dict allocated where a freed one used to be
+        key = (len(cost), len(self.node_list))
+        cached = getattr(self, '_csrgraph', None)
+        if cached is None or cached[0] is not cost or cached[1] != key:
+            graph = util.network_csr(cost, len(self.node_list))
+            self._csrgraph = cached = (cost, key, graph)
+        return cached[2]
+
+
     def node_distance_matrix(self, n_processes, gen_tree=False):
         """ Called from within allneighbordistances(),
         nearestneighbordistances(), and distancebandweights().
@@ -839,40 +990,175 @@ class Network:
         self.alldistances = {}
         nnodes = len(self.node_list)
         self.distancematrix = np.empty((nnodes, nnodes))
-        # Single-core processing
-        if not n_processes:
-            for node in self.node_list:
-                distance, pred = util.dijkstra(self, self.edge_lengths, node)
-                pred = np.array(pred)
+        results = self._shortest_paths(self.node_list, n_processes,
+                                       gen_pred=gen_tree)
+        for sources, result in results:
+            if gen_tree:
+                distance, pred = result
+            else:
+                distance = result
+            self.distancematrix[sources] = distance
+            for i, node in enumerate(sources):
                 if gen_tree:
-                    tree = util.generatetree(pred)
+                    tree = util.generatetree(pred[i])
                 else:
                     tree = None
-                self.alldistances[node] = (distance, tree)
-                self.distancematrix[node] = distance
-        # Multiprocessing
-        if n_processes:
+                self.alldistances[node] = (self.distancematrix[node], tree)
+
+
+    def node_distance_cache(self, max_bytes=None, filename=None,
+                            n_processes=None):
+        """Attach a bounded, on-demand node distance cache to the network.
+        Point pattern distances are then computed from the rows of the
+        nodes bounding the snapped points only, instead of a full node
+        distance matrix.
+        
+        Parameters
+        ----------
+        
+        max_bytes : int
+            Memory budget for the rows held in memory. Default is
+            CACHE_BYTES.
+        
+        filename : str
+            (Optional) Path of a file where computed rows are stored, and
+            read back by later queries, e.g. over several NetworkK or
+            NetworkG runs, or sessions.
+        
+        n_processes : int, str
+            (Optional) cpu cores for multiprocessing, or "all".
+        
+        Returns
+        -------
+        
+        distancecache : spaghetti.network.NodeDistanceCache
+            The cache, also set as the distancecache attribute.
+        
+        Examples
+        --------
+        
+        >>> import pysal.explore.spaghetti as spgh
+        >>> ntw = spgh.Network(examples.get_path('streets.shp'))
+        >>> ntw.snapobservations(examples.get_path('crimes.shp'), 'crimes')
+        >>> cache = ntw.node_distance_cache()
+        >>> s2s_dist = ntw.allneighbordistances('crimes')
+        >>> s2s_dist[1, 0]
+        3105.189475447081
+        >>> len(cache.rows) < len(ntw.node_list)
+        True
+        
+        """
+        self.distancecache = NodeDistanceCache(self, max_bytes=max_bytes,
+                                               filename=filename,
+                                               n_processes=n_processes)
+        return self.distancecache
+
+
+    def _share_node_distances(self, n_processes=None):
+        """Used internally to set up the node distances shared by many
+        point pattern queries: the full node distance matrix on networks of
+        up to MAX_MATRIX_NODES nodes, a node distance cache otherwise. An
+        existing matrix or cache is kept.
+        
+        Parameters
+        ----------
+        
+        n_processes : int, str
+            cpu cores for multiprocessing, or "all".
+        
+        """
+        if hasattr(self, 'distancematrix') or hasattr(self, 'distancecache'):
+            return
+        if len(self.node_list) <= MAX_MATRIX_NODES:
+            self.node_distance_matrix(n_processes)
+        else:
+            self.node_distance_cache(n_processes=n_processes)
+
+
+    def _shortest_paths(self, sources, n_processes=None, cutoff=None,
+                        gen_pred=False):
+        """Used internally to compute shortest path lengths from sources to
+        all nodes, in blocks of at most CHUNK_ELEMENTS lengths.
+        
+        Parameters
+        ----------
+        
+        sources : list
+            start node ids.
+        
+        n_processes : int, str
+            cpu cores for multiprocessing, or "all".
+        
+        cutoff : float
+            only search paths up to this length.
+        
+        gen_pred : bool
+            also compute the preceeding nodes on the routes.
+        
+        Returns
+        -------
+        
+        results : list
+            (block sources, result) tuples, result being the output of
+            util.shortest_paths for the block sources.
+        
+        """
+        graph = self.csrgraph()
+        sources = np.asarray(sources, dtype=np.int64)
+        size = max(1, CHUNK_ELEMENTS // max(graph.shape[0], 1))
+        blocks = [sources[i:i + size] for i in range(0, sources.shape[0],
+                                                     size)]
+        tasks = [(graph, block, cutoff, gen_pred) for block in blocks]
+        if n_processes and len(blocks) > 1:
             import multiprocessing as mp
-            from itertools import repeat
             if n_processes == "all":
                 cores = mp.cpu_count()
             else:
                 cores = n_processes
             p = mp.Pool(processes=cores)
-            distance_pred = p.map(util.dijkstra_multi,
-                                  zip(repeat(self),
-                                      repeat(self.edge_lengths),
-                                      self.node_list))
-            iterations = range(len(distance_pred))
-            distance = [distance_pred[itr][0] for itr in iterations]
-            pred = np.array([distance_pred[itr][1] for itr in iterations])
-            for node in self.node_list:
-                if gen_tree:
-                    tree = util.generatetree(pred[node])
-                else:
-                    tree = None
-                self.alldistances[node] = (distance[node], tree)
-                self.distancematrix[node] = distance[node]
+            results = p.map(util.shortest_paths_mp, tasks)
+            p.close()
+            p.join()
+        else:
+            results = [util.shortest_paths_mp(task) for task in tasks]
+        return list(zip(blocks, results))
+
+
+    def _node_distances(self, sources, dests, n_processes=None):
+        """Used internally to get the shortest path lengths between two sets
+        of nodes, from the node distance matrix or the node distance cache
+        when available.
+        
+        Parameters
+        ----------
+        
+        sources : numpy.ndarray
+            start node ids.
+        
+        dests : numpy.ndarray
+            destination node ids.
+        
+        n_processes : int, str
+            cpu cores for multiprocessing, or "all".
+        
+        Returns
+        -------
+        
+        distance : numpy.ndarray
+            (len(sources), len(dests)) shortest path lengths.
+        
+        """
+        if hasattr(self, 'distancematrix'):
+            return self.distancematrix[np.ix_(sources, dests)]
+        if hasattr(self, 'distancecache'):
+            return self.distancecache.distances(sources, dests)
+        usources, inverse = np.unique(sources, return_inverse=True)
+        distance = np.empty((usources.shape[0], dests.shape[0]))
+        start = 0
+        for block, result in self._shortest_paths(usources, n_processes):
+            distance[start:start + block.shape[0]] = result[:, dests]
+            start += block.shape[0]
+        return distance[inverse]
 
 
     def allneighbordistances(self, sourcepattern, destpattern=None,
@@ -951,7 +1237,10 @@ class Network:
         (173, 64)
         """
         
-        if not hasattr(self, 'alldistances'):
+        nnodes = len(self.node_list)
+        use_matrix = nnodes <= MAX_MATRIX_NODES and \
+            not hasattr(self, 'distancecache')
+        if not hasattr(self, 'alldistances') and (gen_tree or use_matrix):
             self.node_distance_matrix(n_processes, gen_tree=gen_tree)
         
         if type(sourcepattern) is str:
@@ -959,111 +1248,44 @@ class Network:
             if destpattern:
                 destpattern = self.pointpatterns[destpattern]
         
-        # Source setup
-        src_indices = list(sourcepattern.points.keys())
-        src_d2n = copy.deepcopy(sourcepattern.dist_to_node)
-        nsource_pts = len(src_indices)
-        src_nodes = {}
-        for s in src_indices:
-            e1, e2 = src_d2n[s].keys()
-            src_nodes[s] = (e1, e2)
-            
         # Destination setup
         symmetric = False
         if destpattern is None:
             symmetric = True
             destpattern = sourcepattern
-        dest_indices = list(destpattern.points.keys())
-        dst_d2n = copy.deepcopy(destpattern.dist_to_node)
-        ndest_pts = len(dest_indices)
-        dest_searchpts = copy.deepcopy(dest_indices)
-        dest_nodes = {}
         
-        # add snapping distance to each pointpattern
-        if snap_dist:
-            patterns = [sourcepattern, destpattern]
-            dist_copies = [src_d2n, dst_d2n]
-            for elm, pp in enumerate(patterns):
-                for pidx, dists_dict in dist_copies[elm].items():
-                    for nidx, ndist in dists_dict.items():
-                        dists_dict[nidx] = ndist + pp.dist_snapped[pidx]
-        
-        for s in dest_indices:
-            e1, e2 = dst_d2n[s].keys()
-            dest_nodes[s] = (e1, e2)
-            
-        # Output setup
-        nearest = np.empty((nsource_pts, ndest_pts))
-        nearest[:] = np.inf
-        tree_nearest = {}
+        # Nodes bounding the edge of each point, and distances to them,
+        # including the snapping distance if requested.
+        src_indices, src_nodes, src_d2n = self._edge_nodes(sourcepattern,
+                                                           snap_dist)
+        dest_indices, dest_nodes, dst_d2n = self._edge_nodes(destpattern,
+                                                             snap_dist)
+        src_xy = np.array([sourcepattern.snapped_coordinates[p]
+                           for p in src_indices]).reshape(-1, 2)
+        dest_xy = np.array([destpattern.snapped_coordinates[p]
+                            for p in dest_indices]).reshape(-1, 2)
+        result = self._pair_distances(src_nodes, src_d2n, src_xy, dest_nodes,
+                                      dst_d2n, dest_xy, symmetric=symmetric,
+                                      gen_best=gen_tree,
+                                      n_processes=n_processes)
         
-        for p1 in src_indices:
-            # Get the source nodes and dist to source nodes.
-            source1, source2 = src_nodes[p1]
-            set1 = set(src_nodes[p1])
-            # Distance from node1 to p, distance from node2 to p.
-            sdist1, sdist2 = src_d2n[p1].values()
-            
+        tree_nearest = {}
+        if gen_tree:
+            nearest, best = result
+            keep = best >= 0
             if symmetric:
-                # Only compute the upper triangle if symmetric.
-                dest_searchpts.remove(p1)
-            for p2 in dest_searchpts:
-                dest1, dest2 = dest_nodes[p2]
-                set2 = set(dest_nodes[p2])
-                if set1 == set2:  # same edge
-                    x1, y1 = sourcepattern.snapped_coordinates[p1]
-                    x2, y2 = destpattern.snapped_coordinates[p2]
-                    computed_length = util.compute_length((x1, y1), (x2, y2))
-                    nearest[p1, p2] = computed_length
-                    
-                else:
-                    ddist1, ddist2 = dst_d2n[p2].values()
-                    
-                    d11 = self.distancematrix[source1][dest1]
-                    d21 = self.distancematrix[source2][dest1]
-                    d12 = self.distancematrix[source1][dest2]
-                    d22 = self.distancematrix[source2][dest2]
-                    
-                    # Find the shortest distance from the path passing
-                    # through each of the two origin nodes to the first
-                    # destination node.
-                    sd_1 = d11 + sdist1
-                    sd_21 = d21 + sdist2
-                    sp_combo1 = source1, dest1
-                    if sd_1 > sd_21:
-                        sd_1 = sd_21
-                        sp_combo1 = source2, dest1
-                    
-                    # Now add the point to node one distance on
-                    # the destination edge.
-                    len_1 = sd_1 + ddist1
-                    
-                    # Repeat the prior but now for the paths entering
-                    # at the second node of the second edge.
-                    sd_2 = d12 + sdist1
-                    sd_22 = d22 + sdist2
-                    sp_combo2 = source1, dest2
-                    if sd_2 > sd_22:
-                        sd_2 = sd_22
-                        sp_combo2 = source2, dest2
-                    len_2 = sd_2 + ddist2
-                    
-                    # Now find the shortest distance path between point
-                    # 1 on edge 1 and point 2 on edge 2, and assign.
-                    sp_12 = len_1
-                    s_node, d_node = sp_combo1
-                    if len_1 > len_2:
-                        sp_12 = len_2
-                        s_node, d_node = sp_combo2
-                    
-                    nearest[p1, p2] = sp_12
-                    tree_nearest[p1, p2] = (s_node, d_node)
-                    
-                if symmetric:
-                    # Mirror the upper and lower triangle
-                    # when symmetric.
-                    nearest[p2, p1] = nearest[p1, p2]
-                    
+                # Only the upper triangle is recorded if symmetric.
+                keep = np.triu(keep, 1)
+            for r, c in zip(*np.nonzero(keep)):
+                i, j = PAIR_COMBOS[best[r, c]]
+                tree_nearest[src_indices[r], dest_indices[c]] = (
+                    int(src_nodes[r, i]), int(dest_nodes[c, j]))
+        else:
+            nearest = result
+        
+        # Rows and columns are indexed by point ids.
+        nearest[np.ix_(src_indices, dest_indices)] = nearest.copy()
+        
         # Populate the main diagonal when symmetric.
         if symmetric:
             if fill_diagonal is None:
@@ -1077,6 +1299,143 @@ class Network:
             return nearest
 
 
+    def _pair_distances(self, src_nodes, src_d2n, src_xy, dest_nodes,
+                        dst_d2n, dest_xy, symmetric=False, gen_best=False,
+                        n_processes=None):
+        """Used internally to compute the network distances between two sets
+        of points on network edges, in blocks of source points.
+        
+        Parameters
+        ----------
+        
+        src_nodes : numpy.ndarray
+            (nsrc, 2) ids of the nodes bounding the edge of each source point.
+        
+        src_d2n : numpy.ndarray
+            (nsrc, 2) distances from each source point to these nodes.
+        
+        src_xy : numpy.ndarray
+            (nsrc, 2) coordinates of the source points.
+        
+        dest_nodes, dst_d2n, dest_xy : numpy.ndarray
+            the same, for the destination points.
+        
+        symmetric : bool
+            the destination points are the source points; the lower triangle
+            is mirrored from the upper triangle.
+        
+        gen_best : bool
+            also return the route taken between each pair of points.
+        
+        n_processes : int, str
+            cpu cores for multiprocessing, or "all".
+        
+        Returns
+        -------
+        
+        nearest : numpy.ndarray
+            (nsrc, ndest) network distances. Points on the same edge are at
+            their euclidean distance.
+        
+        best : numpy.ndarray
+            (nsrc, ndest) position in PAIR_COMBOS of the (source node,
+            destination node) combination each route runs through, ``-1`` for
+            points on the same edge. Only returned if gen_best is True.
+        
+        """
+        nsource_pts = src_nodes.shape[0]
+        ndest_pts = dest_nodes.shape[0]
+        
+        # Shortest path lengths between the nodes of source and destination
+        # edges.
+        unodes, inverse = np.unique(dest_nodes, return_inverse=True)
+        inverse = inverse.reshape(dest_nodes.shape)
+        node_dist = self._node_distances(src_nodes.flatten(), unodes,
+                                         n_processes)
+        node_dist = node_dist.reshape(nsource_pts, 2, unodes.shape[0])
+        
+        # Points on the same edge are at their euclidean distance.
+        src_edges = np.sort(src_nodes, axis=1)
+        dest_edges = np.sort(dest_nodes, axis=1)
+        
+        # Output setup
+        nearest = np.empty((nsource_pts, ndest_pts))
+        if gen_best:
+            best_combo = np.empty((nsource_pts, ndest_pts), dtype=np.int8)
+        
+        size = max(1, CHUNK_ELEMENTS // (4 * max(ndest_pts, 1)))
+        for start in range(0, nsource_pts, size):
+            rows = slice(start, start + size)
+            # Distance through each of the two origin nodes to each of the
+            # two destination nodes. Ties are resolved towards the first
+            # origin node, then towards the first destination node.
+            lengths = np.array([(node_dist[rows, i][:, inverse[:, j]] +
+                                 src_d2n[rows, i][:, None]) +
+                                dst_d2n[:, j][None, :]
+                                for i, j in PAIR_COMBOS])
+            block = lengths.min(axis=0)
+            
+            same = ((src_edges[rows, 0][:, None] == dest_edges[:, 0]) &
+                    (src_edges[rows, 1][:, None] == dest_edges[:, 1]))
+            dxy = src_xy[rows, None, :] - dest_xy[None, :, :]
+            euclidean = np.sqrt(dxy[..., 0] ** 2 + dxy[..., 1] ** 2)
+            block[same] = euclidean[same]
+            nearest[rows] = block
+            if gen_best:
+                best = lengths.argmin(axis=0)
+                best[same] = -1
+                best_combo[rows] = best
+        
+        if symmetric:
+            # Mirror the upper triangle when symmetric.
+            lower = np.tril_indices(nsource_pts, -1)
+            nearest[lower] = nearest.T[lower]
+        
+        if gen_best:
+            return nearest, best_combo
+        return nearest
+
+
+    def _edge_nodes(self, pointpattern, snap_dist=False):
+        """Used internally to collect the nodes bounding the edge of each
+        point in a point pattern, and the distances to these nodes.
+        
+        Parameters
+        ----------
+        
+        pointpattern : spaghetti.network.PointPattern
+            point pattern object
+        
+        snap_dist : bool
+            include the distance from the original location to the snapped
+            location.
+        
+        Returns
+        -------
+        
+        indices : list
+            point ids.
+        
+        nodes : numpy.ndarray
+            (npoints, 2) node ids.
+        
+        dists : numpy.ndarray
+            (npoints, 2) distances from each point to the nodes.
+        
+        """
+        indices = list(pointpattern.points.keys())
+        d2n = pointpattern.dist_to_node
+        nodes = np.array([list(d2n[p].keys()) for p in indices],
+                         dtype=np.int64).reshape(-1, 2)
+        dists = np.array([list(d2n[p].values()) for p in indices],
+                         dtype=float).reshape(-1, 2)
+        if snap_dist:
+            snapped = np.array([pointpattern.dist_snapped[p]
+                                for p in indices], dtype=float)
+            dists = dists + snapped[:, None]
+        return indices, nodes, dists
+
+
     def nearestneighbordistances(self, sourcepattern, destpattern=None,
                                  n_processes=None, gen_tree=False,
                                  all_dists=None, snap_dist=False,
@@ -1138,9 +1497,6 @@ class Network:
         if sourcepattern not in self.pointpatterns.keys():
             err_msg = "Available point patterns are {}"
             raise KeyError(err_msg.format(self.pointpatterns.keys()))
-            
-        if not hasattr(self, 'alldistances'):
-            self.node_distance_matrix(n_processes, gen_tree=gen_tree)
         
         symmetric = sourcepattern != destpattern
         
@@ -1181,7 +1537,8 @@ class Network:
 
 
     def NetworkF(self, pointpattern, nsteps=10, permutations=99, threshold=0.2,
-                 distribution='uniform',  lowerbound=None, upperbound=None):
+                 distribution='uniform',  lowerbound=None, upperbound=None,
+                 n_processes=None, batched=False):
         """Computes a network constrained F-Function
         
         Parameters
@@ -1212,6 +1569,14 @@ class Network:
             The upper bound at which the F-function is computed. Defaults to
             the maximum observed nearest neighbor distance.
         
+        n_processes : int, str
+            (Optional) Specify the number of cores to spread the permutations
+            over. Use ("all") to request all available cores. Implies batched.
+        
+        batched : bool
+            Simulate all permutations at once as arrays, with node distances
+            shared by all of them. Default is False.
+        
         Returns
         -------
         
@@ -1235,12 +1600,14 @@ class Network:
         return NetworkF(self, pointpattern, nsteps=nsteps,
                         permutations=permutations, threshold=threshold,
                         distribution=distribution, lowerbound=lowerbound,
-                        upperbound=upperbound)
+                        upperbound=upperbound, n_processes=n_processes,
+                        batched=batched)
 
 
     def NetworkG(self, pointpattern, nsteps=10, permutations=99,
                  threshold=0.5, distribution='uniform',
-                 lowerbound=None, upperbound=None):
+                 lowerbound=None, upperbound=None, n_processes=None,
+                 batched=False):
         """Computes a network constrained G-Function
         
         Parameters
@@ -1271,6 +1638,14 @@ class Network:
             The upper bound at which the G-function is computed. Defaults to
             the maximum observed nearest neighbor distance.
         
+        n_processes : int, str
+            (Optional) Specify the number of cores to spread the permutations
+            over. Use ("all") to request all available cores. Implies batched.
+        
+        batched : bool
+            Simulate all permutations at once as arrays, with node distances
+            shared by all of them. Default is False.
+        
         Returns
         -------
         
@@ -1295,12 +1670,14 @@ class Network:
         return NetworkG(self, pointpattern, nsteps=nsteps,
                         permutations=permutations, threshold=threshold,
                         distribution=distribution, lowerbound=lowerbound,
-                        upperbound=upperbound)
+                        upperbound=upperbound, n_processes=n_processes,
+                        batched=batched)
 
 
     def NetworkK(self, pointpattern, nsteps=10, permutations=99,
                  threshold=0.5, distribution='uniform',
-                 lowerbound=None, upperbound=None):
+                 lowerbound=None, upperbound=None, n_processes=None,
+                 batched=False):
         """
         Computes a network constrained K-Function
         
@@ -1332,6 +1709,14 @@ class Network:
             The upper bound at which the K-function is computed. Defaults to
             the maximum observed nearest neighbor distance.
         
+        n_processes : int, str
+            (Optional) Specify the number of cores to spread the permutations
+            over. Use ("all") to request all available cores. Implies batched.
+        
+        batched : bool
+            Simulate all permutations at once as arrays, with node distances
+            shared by all of them. Default is False.
+        
         Returns
         -------
         
@@ -1355,7 +1740,8 @@ class Network:
         return NetworkK(self, pointpattern, nsteps=nsteps,
                         permutations=permutations, threshold=threshold,
                         distribution=distribution, lowerbound=lowerbound,
-                        upperbound=upperbound)
+                        upperbound=upperbound, n_processes=n_processes,
+                        batched=batched)
 
 
     def segment_edges(self, distance):
@@ -1478,8 +1864,9 @@ class Network:
         --------
         
         >>> import pysal.explore.spaghetti as spgh
+        >>> import os, tempfile
         >>> ntw = spgh.Network(examples.get_path('streets.shp'))
-        >>> ntw.savenetwork('mynetwork.pkl')
+        >>> ntw.savenetwork(os.path.join(tempfile.mkdtemp(), 'mynetwork.pkl'))
         """
         with open(filename, 'wb') as networkout:
             pickle.dump(self, networkout, protocol=2)
@@ -1507,6 +1894,475 @@ class Network:
         return self
 
 
+    def savebinary(self, filename, distances=True):
+        """Save a network to disk in a columnar binary format, which can be
+        memory mapped by loadbinary().
+        
+        Parameters
+        ----------
+        
+        filename : str
+            The filename where the network should be saved.
+        
+        distances : bool
+            Also save the node distance matrix, if computed. Default is True.
+        
+        Notes
+        -----
+        
+        The file holds the magic string ``SPGHNET1``, the length of a JSON
+        header as a little endian uint32, the header, and the arrays of the
+        network: node ids and coordinates, the adjacency list and CSR graph
+        as (indptr, indices) arrays, edges, edge lengths, graph edges and,
+        optionally, the node distance matrix. The header holds the format
+        version and the dtype, shape and offset of each array. Point patterns
+        are not saved.
+        
+        Examples
+        --------
+        
+        >>> import pysal.explore.spaghetti as spgh
+        >>> import os, tempfile
+        >>> ntw = spgh.Network(examples.get_path('streets.shp'))
+        >>> filename = os.path.join(tempfile.mkdtemp(), 'streets.snet')
+        >>> ntw.savebinary(filename)
+        >>> spgh.Network.loadbinary(filename).edges == ntw.edges
+        True
+        
+        """
+        nnodes = len(self.node_list)
+        arrays = OrderedDict()
+        arrays['node_list'] = np.array(self.node_list, dtype=np.int64)
+        arrays['node_coords'] = np.array([self.node_coords[v]
+                                          for v in self.node_list],
+                                         dtype=float).reshape(-1, 2)
+        neighbors = [self.adjacencylist.get(v, []) for v in self.node_list]
+        arrays['adjacency_indptr'] = np.concatenate(
+            ([0], np.cumsum([len(n) for n in neighbors]))).astype(np.int64)
+        arrays['adjacency_indices'] = np.array(
+            [v for n in neighbors for v in n], dtype=np.int64)
+        arrays['edges'] = _edge_array(self.edges)
+        arrays['length_edges'] = _edge_array(self.edge_lengths.keys())
+        arrays['lengths'] = np.array(list(self.edge_lengths.values()),
+                                     dtype=float)
+        if hasattr(self, 'graphedges'):
+            arrays['graphedges'] = _edge_array(self.graphedges)
+            arrays['graph_length_edges'] = _edge_array(
+                self.graph_lengths.keys())
+            arrays['graph_lengths'] = np.array(
+                list(self.graph_lengths.values()), dtype=float)
+        if hasattr(self, 'graph_to_edges'):
+            arrays['graph_to_edges_keys'] = _edge_array(
+                self.graph_to_edges.keys())
+            arrays['graph_to_edges_values'] = _edge_array(
+                self.graph_to_edges.values())
+        graph = self.csrgraph()
+        # scipy keeps 32 bit indices as given, which avoids copying memory
+        # mapped arrays when the graph is rebuilt
+        index_dtype = np.int32 if graph.nnz < 2 ** 31 else np.int64
+        arrays['graph_indptr'] = graph.indptr.astype(index_dtype)
+        arrays['graph_indices'] = graph.indices.astype(index_dtype)
+        arrays['graph_data'] = graph.data.astype(float)
+        if distances and hasattr(self, 'distancematrix'):
+            arrays['distancematrix'] = self.distancematrix
+        
+        in_data = self.in_data if isinstance(self.in_data, str) else None
+        header = {'version': NETWORK_FORMAT_VERSION, 'nnodes': nnodes,
+                  'in_data': in_data, 'node_sig': self.node_sig,
+                  'unique_segs': self.unique_segs}
+        _write_arrays(filename, header, arrays)
+
+
+    @staticmethod
+    def loadbinary(filename, mmap=True):
+        """Load a network saved with savebinary().
+        
+        Parameters
+        ----------
+        
+        filename : str
+            The filename where the network was saved.
+        
+        mmap : bool
+            Memory map the CSR graph and node distance matrix read-only, so
+            that processes loading the same file share them without copies.
+            If False, read them into memory. Default is True.
+        
+        Returns
+        -------
+        
+        ntw : spaghetti.Network
+            spaghetti Network object, without point patterns.
+        
+        """
+        header, arrays = _read_arrays(filename, mmap)
+        if header['version'] > NETWORK_FORMAT_VERSION:
+            err_msg = "{} was written by a newer version of spaghetti " \
+                      "(format version {})."
+            raise ValueError(err_msg.format(filename, header['version']))
+        
+        ntw = Network()
+        ntw.in_data = header['in_data']
+        ntw.node_sig = header['node_sig']
+        ntw.unique_segs = header['unique_segs']
+        ntw.pointpatterns = {}
+        
+        node_list = arrays['node_list'].tolist()
+        coords = [tuple(xy) for xy in arrays['node_coords'].tolist()]
+        ntw.node_list = node_list
+        ntw.node_coords = dict(zip(node_list, coords))
+        ntw.nodes = dict(zip(coords, node_list))
+        indptr = arrays['adjacency_indptr'].tolist()
+        indices = arrays['adjacency_indices'].tolist()
+        ntw.adjacencylist = defaultdict(list)
+        for i, v in enumerate(node_list):
+            if indptr[i + 1] > indptr[i]:
+                ntw.adjacencylist[v] = indices[indptr[i]:indptr[i + 1]]
+        
+        ntw.edges = _edge_list(arrays['edges'])
+        ntw.edge_lengths = dict(zip(_edge_list(arrays['length_edges']),
+                                    arrays['lengths'].tolist()))
+        if 'graphedges' in arrays:
+            ntw.graphedges = _edge_list(arrays['graphedges'])
+            ntw.graph_lengths = dict(zip(
+                _edge_list(arrays['graph_length_edges']),
+                arrays['graph_lengths'].tolist()))
+        if 'graph_to_edges_keys' in arrays:
+            ntw.graph_to_edges = dict(zip(
+                _edge_list(arrays['graph_to_edges_keys']),
+                _edge_list(arrays['graph_to_edges_values'])))
+        
+        nnodes = header['nnodes']
+        graph = sparse.csr_matrix((arrays['graph_data'],
+                                   arrays['graph_indices'],
+                                   arrays['graph_indptr']),
+                                  shape=(nnodes, nnodes))
+        ntw._csrgraph = (ntw.edge_lengths, (len(ntw.edge_lengths), nnodes),
+                         graph)
+        if 'distancematrix' in arrays:
+            ntw.distancematrix = arrays['distancematrix']
+            ntw.alldistances = {v: (ntw.distancematrix[i], None)
+                                for i, v in enumerate(node_list)}
+        return ntw
+
+
+def _edge_array(edges):
+    """Used internally to lay out node id pairs as an (n, 2) array.
+    """
+    edges = list(edges)
+    return np.fromiter((v for e in edges for v in e), dtype=np.int64,
+                       count=2 * len(edges)).reshape(-1, 2)
+
+
+def _edge_list(edges):
+    """Used internally to turn an (n, 2) array into node id pair tuples.
+    """
+    return [tuple(e) for e in edges.tolist()]
+
+
+def _write_arrays(filename, header, arrays):
+    """Used internally to write a header and arrays in the layout of
+    Network.savebinary.
+    """
+    arrays = OrderedDict((name, np.ascontiguousarray(a).astype(
+        np.dtype(a.dtype).newbyteorder('<'), copy=False))
+        for name, a in arrays.items())
+    header = dict(header)
+    header['arrays'] = OrderedDict((name, {'dtype': a.dtype.str,
+                                           'shape': list(a.shape),
+                                           'offset': 0})
+                                   for name, a in arrays.items())
+    # the header holds the offsets of the arrays, which depend on the length
+    # of the header: leave room for fixed width offsets first
+    size = len(json.dumps(header)) + 20 * len(arrays)
+    pos = len(NETWORK_MAGIC) + 4 + size
+    for name, a in arrays.items():
+        pos += -pos % NETWORK_ALIGN
+        header['arrays'][name]['offset'] = pos
+        pos += a.nbytes
+    with io.open(filename, 'wb') as networkout:
+        networkout.write(NETWORK_MAGIC)
+        networkout.write(struct.pack('<I', size))
+        networkout.write(json.dumps(header).encode('ascii').ljust(size))
+        for name, a in arrays.items():
+            offset = header['arrays'][name]['offset']
+            networkout.write(b'\0' * (offset - networkout.tell()))
+            networkout.write(a.tobytes())
+
+
+def _read_arrays(filename, mmap=True):
+    """Used internally to read the header and arrays written by
+    _write_arrays, memory mapped read-only if mmap is True.
+    """
+    with io.open(filename, 'rb') as networkin:
+        if networkin.read(len(NETWORK_MAGIC)) != NETWORK_MAGIC:
+            raise ValueError("{} is not a spaghetti network file".format(
+                filename))
+        size, = struct.unpack('<I', networkin.read(4))
+        header = json.loads(networkin.read(size).decode('ascii'))
+        arrays = {}
+        for name, spec in header['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            shape = tuple(spec['shape'])
+            count = int(np.prod(shape))
+            if mmap and count:
+                arrays[name] = np.memmap(filename, dtype=dtype, mode='r',
+                                         offset=spec['offset'], shape=shape)
+            else:
+                networkin.seek(spec['offset'])
+                arrays[name] = np.fromfile(networkin, dtype=dtype,
+                                           count=count).reshape(shape)
+    return header, arrays
+
+
+class NodeDistanceCache:
+    """Bounded, on-demand store of shortest path lengths from network nodes.
+    
+    Rows of the node distance matrix are only computed for the nodes that are
+    asked for, are kept in memory in least recently used order up to a memory
+    budget, and are optionally written to a memory-mapped file so they can be
+    reused by later queries and sessions.
+    
+    Parameters
+    ----------
+    
+    ntw : spaghetti.Network
+        spaghetti Network object.
+    
+    max_bytes : int
+        Memory budget for the rows held in memory. At least one row is always
+        kept. Default is CACHE_BYTES.
+    
+    filename : str
+        (Optional) Path of a file where computed rows are stored. Rows
+        already in the file are read instead of being computed again. An
+        index of the rows is kept next to it, in ``filename + '.idx'``,
+        with a fingerprint of the network graph and its edge lengths; a
+        file written for another graph is rejected.
+    
+    n_processes : int, str
+        (Optional) cpu cores for multiprocessing, or "all", used when rows
+        are computed.
+    
+    Attributes
+    ----------
+    
+    nnodes : int
+        Number of network nodes, and length of each row.
+    
+    max_rows : int
+        Number of rows held in memory.
+    
+    rows : collections.OrderedDict
+        Keys are node ids (int), values are the rows in memory
+        (numpy.ndarray), least recently used first.
+    
+    hits : int
+        Number of rows found in memory or in the file.
+    
+    misses : int
+        Number of rows computed.
+    
+    Examples
+    --------
+    
+    >>> import pysal.explore.spaghetti as spgh
+    >>> ntw = spgh.Network(examples.get_path('streets.shp'))
+    >>> cache = ntw.node_distance_cache(max_bytes=2 ** 14)
+    >>> cache.max_rows
+    8
+    >>> d = cache.distances([0, 196, 0], [196, 0])
+    >>> round(d[0, 0], 4), round(d[1, 1], 4), cache.misses
+    (5505.6682, 5505.6682, 2)
+    
+    """
+    def __init__(self, ntw, max_bytes=None, filename=None, n_processes=None):
+        if max_bytes is None:
+            max_bytes = CACHE_BYTES
+        self.ntw = ntw
+        self.nnodes = len(ntw.node_list)
+        self.max_bytes = max_bytes
+        self.max_rows = max(1, int(max_bytes) // (8 * max(self.nnodes, 1)))
+        self.filename = filename
+        self.n_processes = n_processes
+        self.rows = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._index = None
+        self._data = None
+        if filename is not None:
+            self._open_store()
+
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Rows in memory and file mappings are rebuilt on demand.
+        state['rows'] = OrderedDict()
+        state['_index'] = None
+        state['_data'] = None
+        return state
+
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.filename is not None and os.path.exists(self.filename):
+            self._open_store()
+
+
+    def _open_store(self):
+        """Used internally to open, or create, the row file and its index.
+        """
+        idxname = self.filename + '.idx'
+        fingerprint = self._fingerprint()
+        if not os.path.exists(idxname):
+            index = np.empty(self.nnodes, dtype=np.int64)
+            index[:] = -1
+            with io.open(idxname, 'wb') as idxout:
+                idxout.write(CACHE_MAGIC + fingerprint)
+                index.tofile(idxout)
+            io.open(self.filename, 'wb').close()
+        else:
+            with io.open(idxname, 'rb') as idxin:
+                header = idxin.read(CACHE_HEADER)
+            if (os.path.getsize(idxname) != CACHE_HEADER + 8 * self.nnodes
+                    or header != CACHE_MAGIC + fingerprint):
+                err_msg = ("{} indexes rows computed for another network or "
+                           "other edge lengths; remove it and {} to store "
+                           "the rows of this network.")
+                raise ValueError(err_msg.format(idxname, self.filename))
+        self._index = np.memmap(idxname, dtype=np.int64, mode='r+',
+                                offset=CACHE_HEADER, shape=(self.nnodes,))
+        self._data = None
+
+
+    def _fingerprint(self):
+        """Used internally to digest the graph the rows are computed on.
+        """
+        graph = self.ntw.csrgraph()
+        digest = hashlib.sha256()
+        digest.update(graph.indptr.astype('<i8').tobytes())
+        digest.update(graph.indices.astype('<i8').tobytes())
+        digest.update(graph.data.astype('<f8').tobytes())
+        return digest.digest()
+
+
+    def _stored_row(self, node):
+        """Used internally to read a row from the file, if it is there.
+        """
+        if self._index is None:
+            return None
+        slot = self._index[node]
+        if slot < 0:
+            return None
+        if self._data is None or self._data.shape[0] <= slot:
+            nslots = os.path.getsize(self.filename) // (8 * self.nnodes)
+            self._data = np.memmap(self.filename, dtype=float, mode='r',
+                                   shape=(nslots, self.nnodes))
+        return np.array(self._data[slot])
+
+
+    def _store_rows(self, nodes, rows):
+        """Used internally to append computed rows to the file.
+        """
+        nslots = os.path.getsize(self.filename) // (8 * self.nnodes)
+        with io.open(self.filename, 'ab') as rowsout:
+            np.ascontiguousarray(rows, dtype=float).tofile(rowsout)
+        self._index[nodes] = np.arange(nslots, nslots + len(nodes))
+        self._index.flush()
+
+
+    def _remember(self, node, row):
+        """Used internally to keep a row in memory, evicting the least
+        recently used rows beyond the budget.
+        """
+        self.rows[node] = row
+        self.rows.move_to_end(node)
+        while len(self.rows) > self.max_rows:
+            self.rows.popitem(last=False)
+
+
+    def row(self, node):
+        """Shortest path lengths from a node to all nodes.
+        
+        Parameters
+        ----------
+        
+        node : int
+            Start node id.
+        
+        Returns
+        -------
+        
+        row : numpy.ndarray
+            (nnodes,) shortest path lengths.
+        
+        """
+        return self.distances([node], np.arange(self.nnodes))[0]
+
+
+    def distances(self, sources, dests):
+        """Shortest path lengths between two sets of nodes. Only the rows of
+        the distinct sources that are neither in memory nor in the file are
+        computed.
+        
+        Parameters
+        ----------
+        
+        sources : array_like
+            start node ids.
+        
+        dests : array_like
+            destination node ids.
+        
+        Returns
+        -------
+        
+        distance : numpy.ndarray
+            (len(sources), len(dests)) shortest path lengths.
+        
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        dests = np.asarray(dests, dtype=np.int64)
+        usources, inverse = np.unique(sources, return_inverse=True)
+        distance = np.empty((usources.shape[0], dests.shape[0]))
+        missing = []
+        for k, node in enumerate(usources.tolist()):
+            row = self.rows.get(node)
+            if row is None:
+                row = self._stored_row(node)
+                if row is None:
+                    missing.append(k)
+                    continue
+                self._remember(node, row)
+            else:
+                self.rows.move_to_end(node)
+            self.hits += 1
+            distance[k] = row[dests]
+        
+        if missing:
+            missing = np.array(missing, dtype=np.int64)
+            self.misses += missing.shape[0]
+            start = 0
+            for block, result in self.ntw._shortest_paths(usources[missing],
+                                                          self.n_processes):
+                rows = missing[start:start + block.shape[0]]
+                distance[rows] = result[:, dests]
+                if self._index is not None:
+                    self._store_rows(block, result)
+                # Only the most recent rows would survive the budget.
+                keep = max(0, block.shape[0] - self.max_rows)
+                for node, row in zip(block[keep:].tolist(), result[keep:]):
+                    self._remember(node, np.array(row))
+                start += block.shape[0]
+        return distance[inverse]
+
+
+    def clear(self):
+        """Drop the rows held in memory. Rows in the file are kept.
+        """
+        self.rows.clear()
+
+
 class PointPattern():
     """A stub point pattern class used to store a point pattern. This class is
     monkey patched with network specific attributes when the points are snapped
@@ -1,3 +1,6 @@
+import os
+import shutil
+import tempfile
 import unittest
 import numpy as np
 from pysal.lib import cg, examples
@@ -51,6 +54,42 @@ class TestNetwork(unittest.TestCase):
     def test_enum_links_node(self):
         coincident = self.ntw.enum_links_node(24)
         self.assertIn((24, 48), coincident)
+    
+    def test_save_load_binary(self):
+        self.ntw.node_distance_matrix(None)
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, 'streets.snet')
+            self.ntw.savebinary(filename)
+            for mmap in [True, False]:
+                ntw = network.Network.loadbinary(filename, mmap=mmap)
+                self.assertEqual(ntw.edges, self.ntw.edges)
+                self.assertEqual(ntw.edge_lengths, self.ntw.edge_lengths)
+                self.assertEqual(ntw.graph_lengths, self.ntw.graph_lengths)
+                self.assertEqual(ntw.node_coords, self.ntw.node_coords)
+                self.assertEqual(dict(ntw.adjacencylist),
+                                 dict(self.ntw.adjacencylist))
+                self.assertEqual((ntw.csrgraph() != self.ntw.csrgraph()).nnz,
+                                 0)
+                np.testing.assert_array_equal(ntw.distancematrix,
+                                              self.ntw.distancematrix)
+                self.assertEqual(ntw.contiguityweights().histogram,
+                                 self.ntw.contiguityweights().histogram)
+                del ntw
+        finally:
+            shutil.rmtree(tmpdir)
+    
+    def test_csrgraph(self):
+        graph = self.ntw.csrgraph()
+        self.assertEqual(graph.shape, (230, 230))
+        self.assertEqual(graph.nnz, 2 * len(self.ntw.edge_lengths))
+        self.assertAlmostEqual(graph[0, 1], 102.62353453439829, places=4)
+        self.assertIs(self.ntw.csrgraph(), graph)
+        for scale in [2., 3.]:
+            cost = {k: v * scale for k, v in self.ntw.edge_lengths.items()}
+            self.assertAlmostEqual(self.ntw.csrgraph(cost)[0, 1],
+                                   102.62353453439829 * scale, places=4)
+        self.assertIsNot(self.ntw.csrgraph(), graph)
 
 
 class TestNetworkPointPattern(unittest.TestCase):
@@ -118,6 +157,51 @@ class TestNetworkPointPattern(unittest.TestCase):
         self.assertAlmostEqual(observed_mtx_val[0, 1], known_mtx_val, places=4)
         
         
+    def test_all_neighbor_distances_without_matrix(self):
+        known = self.ntw.allneighbordistances('crimes', destpattern='schools')
+        ntw = network.Network(in_data=examples.get_path('streets.shp'))
+        ntw.pointpatterns = self.ntw.pointpatterns
+        max_nodes = network.MAX_MATRIX_NODES
+        network.MAX_MATRIX_NODES = 0
+        try:
+            observed = ntw.allneighbordistances('crimes', destpattern='schools')
+        finally:
+            network.MAX_MATRIX_NODES = max_nodes
+        self.assertFalse(hasattr(ntw, 'distancematrix'))
+        np.testing.assert_array_almost_equal(observed, known)
+    
+    def test_node_distance_cache(self):
+        known = self.ntw.allneighbordistances('crimes', destpattern='schools')
+        ntw = network.Network(in_data=examples.get_path('streets.shp'))
+        ntw.pointpatterns = self.ntw.pointpatterns
+        cache = ntw.node_distance_cache(max_bytes=8 * 230 * 10)
+        self.assertEqual(cache.max_rows, 10)
+        observed = ntw.allneighbordistances('crimes', destpattern='schools')
+        self.assertFalse(hasattr(ntw, 'distancematrix'))
+        self.assertEqual(len(cache.rows), 10)
+        np.testing.assert_array_almost_equal(observed, known)
+        
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, 'rows.dat')
+            cache = ntw.node_distance_cache(max_bytes=0, filename=filename)
+            first = cache.distances([0, 196, 24], [0, 196])
+            self.assertEqual(cache.misses, 3)
+            self.assertEqual(len(cache.rows), 1)
+            reopened = ntw.node_distance_cache(filename=filename)
+            second = reopened.distances([24, 0], [0, 196])
+            self.assertEqual((reopened.hits, reopened.misses), (2, 0))
+            np.testing.assert_array_equal(second, first[[2, 0]])
+            self.assertAlmostEqual(first[0, 1], 5505.668247, places=4)
+            # same node count, other edge lengths
+            scaled = network.Network(in_data=examples.get_path('streets.shp'))
+            scaled.edge_lengths = {e: 2. * l for e, l in
+                                   scaled.edge_lengths.items()}
+            with self.assertRaises(ValueError):
+                scaled.node_distance_cache(filename=filename)
+        finally:
+            shutil.rmtree(tmpdir)
+        
     def test_nearest_neighbor_distances(self):
         # general test
         with self.assertRaises(KeyError):
@@ -175,6 +259,54 @@ class TestNetworkAnalysis(unittest.TestCase):
         obtained = self.ntw.NetworkK(self.ntw.pointpatterns['crimes'],
                                      permutations=5, nsteps=20)
         self.assertEqual(obtained.lowerenvelope.shape[0], 20)
+    
+    def test_network_batched(self):
+        crimes = self.ntw.pointpatterns['crimes']
+        for statistic in [self.ntw.NetworkF, self.ntw.NetworkG,
+                          self.ntw.NetworkK]:
+            obtained = statistic(crimes, permutations=5, nsteps=20,
+                                 batched=True)
+            self.assertEqual(obtained.sim.shape, (5, 20))
+            self.assertFalse(np.isnan(obtained.sim).any())
+        obtained = self.ntw.NetworkK(crimes, permutations=4, nsteps=20,
+                                     n_processes=2)
+        self.assertEqual(obtained.upperenvelope.shape[0], 20)
+    
+    def test_network_batched_processes(self):
+        # the workers read the node distance matrix, or the rows of a node
+        # distance cache, from files, and agree with a single process
+        max_nodes = network.MAX_MATRIX_NODES
+        for limit in (max_nodes, 0):
+            network.MAX_MATRIX_NODES = limit
+            try:
+                ntw = network.Network(in_data=examples.get_path('streets.shp'))
+                ntw.snapobservations(examples.get_path('crimes.shp'), 'crimes')
+                crimes = ntw.pointpatterns['crimes']
+                np.random.seed(3)
+                serial = ntw.NetworkG(crimes, permutations=4, nsteps=20,
+                                      batched=True)
+                np.random.seed(3)
+                parallel = ntw.NetworkG(crimes, permutations=4, nsteps=20,
+                                        n_processes=2)
+            finally:
+                network.MAX_MATRIX_NODES = max_nodes
+            self.assertEqual(hasattr(ntw, 'distancecache'), limit == 0)
+            np.testing.assert_allclose(parallel.sim, serial.sim)
+    
+    def test_simulate_arrays(self):
+        nodes, d2n, coords = self.ntw.simulate_arrays(50, size=3)
+        self.assertEqual(nodes.shape, (3, 50, 2))
+        lengths = np.array([self.ntw.edge_lengths[tuple(e)]
+                            for e in nodes.reshape(-1, 2)])
+        np.testing.assert_allclose(d2n.sum(axis=2).ravel(), lengths,
+                                   rtol=1e-7)
+        # edge lengths and node coordinates agree to rounding, relative to
+        # lengths of hundreds of feet
+        head = np.array([self.ntw.node_coords[n]
+                         for n in nodes[..., 0].ravel()])
+        np.testing.assert_allclose(
+            np.hypot(*(coords.reshape(-1, 2) - head).T), d2n[..., 0].ravel(),
+            rtol=1e-7)
 
 
 class TestNetworkUtils(unittest.TestCase):
@@ -210,6 +342,19 @@ class TestNetworkUtils(unittest.TestCase):
         self.assertAlmostEqual(self.distance[196], 5505.668247, places=4)
         self.assertEqual(self.pred[196], 133)
     
+    def test_shortest_paths(self):
+        graph = self.ntw.csrgraph()
+        distance, pred = util.shortest_paths(graph, [0, 196], gen_pred=True)
+        self.assertEqual(distance.shape, (2, 230))
+        self.assertAlmostEqual(distance[0, 196], 5505.668247, places=4)
+        self.assertEqual(pred[0, 196], 133)
+        self.assertEqual(pred[0, 0], -1)
+        self.assertAlmostEqual(distance[1, 0], distance[0, 196])
+        near = util.shortest_paths(graph, 0, cutoff=1000.)
+        reached = np.isfinite(near)
+        np.testing.assert_array_equal(near[reached], distance[0][reached])
+        self.assertTrue((distance[0][~reached] > 1000.).all())
+    
     def test_dijkstra_mp(self):
         self.distance, self.pred = util.dijkstra_mp((self.ntw,
                                                      self.ntw.edge_lengths, 0))
@@ -232,6 +377,29 @@ class TestNetworkUtils(unittest.TestCase):
         self.assertEqual(self.known_coords, [(0.0, 0.0), (2.0, 0.0)])
         self.assertEqual(self.snapped[0][1].all(), np.array([1., 0.]).all())
 
+    
+    def test_snap_points_to_segments(self):
+        points = [(1., 1.), (3., 1.5), (-1., -1.)]
+        segments = [(0., 0., 2., 0.), (2., 0., 2., 2.)]
+        seg_idx, offset, snapped, snap_dist = \
+            util.snap_points_to_segments(points, segments, batch_size=2)
+        np.testing.assert_array_equal(seg_idx, [0, 1, 0])
+        np.testing.assert_array_almost_equal(offset, [1., 1.5, 0.])
+        np.testing.assert_array_almost_equal(snapped,
+                                             [[1., 0.], [2., 1.5], [0., 0.]])
+        np.testing.assert_array_almost_equal(snap_dist, [1., 1., 2 ** .5])
+    
+    def test_snap_points_to_network_segments(self):
+        segments = np.array([self.ntw.node_coords[n] for e in self.ntw.edges
+                             for n in e]).reshape(-1, 4)
+        pts = examples.get_path('crimes.shp')
+        points = np.array([tuple(p) for p in network.open(pts)])
+        observed = util.snap_points_to_segments(points, segments,
+                                                cell_size=50.)[3]
+        known = np.array([min(util.squared_distance_point_segment(
+            p, (s[:2], s[2:]))[0] for s in segments) for p in points])
+        np.testing.assert_array_almost_equal(observed ** 2, known)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,7 @@
 from pysal.lib import cg
 import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
 
 
 def compute_length(v0, v1):
@@ -112,6 +114,110 @@ def generatetree(pred):
     return tree
 
 
+def network_csr(cost, nnodes):
+    """Build the compressed sparse row (CSR) adjacency of a network.
+    
+    Parameters
+    ----------
+    
+    cost : dict
+        key is tuple (start node, end node); value is float.
+        Cost per edge to travel, e.g. distance.
+    
+    nnodes : int
+        Number of nodes. Node ids must be integers in [0, nnodes).
+    
+    Returns
+    -------
+    
+    graph : scipy.sparse.csr_matrix
+        (nnodes, nnodes) symmetric matrix holding the cost of each edge in
+        both directions. Edges of zero cost are kept as explicit zeros.
+    
+    Examples
+    --------
+    
+    >>> import pysal.explore.spaghetti as spgh
+    >>> graph = spgh.util.network_csr({(0, 1): 2., (1, 2): 0.5}, 3)
+    >>> graph.nnz
+    4
+    >>> graph[2, 1]
+    0.5
+    """
+    nedges = len(cost)
+    edges = np.fromiter((v for e in cost for v in e), dtype=np.int64,
+                        count=2 * nedges).reshape(nedges, 2)
+    lengths = np.fromiter(cost.values(), dtype=float, count=nedges)
+    rows = np.concatenate((edges[:, 0], edges[:, 1]))
+    cols = np.concatenate((edges[:, 1], edges[:, 0]))
+    graph = sparse.csr_matrix((np.concatenate((lengths, lengths)),
+                               (rows, cols)), shape=(nnodes, nnodes))
+    graph.sort_indices()
+    return graph
+
+
+def shortest_paths(graph, sources, cutoff=None, gen_pred=False):
+    """Single or multi-source shortest path lengths over a network graph.
+    
+    Parameters
+    ----------
+    
+    graph : scipy.sparse.csr_matrix
+        symmetric adjacency of the network, see ``network_csr``.
+    
+    sources : int or array_like
+        Start node id, or sequence of start node ids.
+    
+    cutoff : float
+        Only paths shorter than or equal to cutoff are searched. Default is
+        None, for no limit.
+    
+    gen_pred : bool
+        Also return the preceeding nodes for each traversal route.
+    
+    Returns
+    -------
+    
+    distance : numpy.ndarray
+        (nnodes,) distances from the start node, or (len(sources), nnodes)
+        distances from each start node, to all nodes. Nodes that cannot be
+        reached within the cutoff are at ``inf``.
+    
+    pred : numpy.ndarray
+        Preceeding nodes, shaped as distance; ``-1`` for start nodes and
+        nodes that are not reached. Only returned if gen_pred is True.
+    
+    Notes
+    -----
+    
+    Based on :cite:`Dijkstra1959a`, with a heap-ordered frontier, so each
+    search runs in O((E + N) log N).
+    
+    Examples
+    --------
+    
+    >>> import pysal.explore.spaghetti as spgh
+    >>> from pysal.lib import examples
+    >>> ntw = spgh.Network(examples.get_path('streets.shp'))
+    >>> distance = spgh.util.shortest_paths(ntw.csrgraph(), [0, 196])
+    >>> round(distance[0, 196], 4), distance[1, 196]
+    (5505.6682, 0.0)
+    >>> distance = spgh.util.shortest_paths(ntw.csrgraph(), 0, cutoff=1000.)
+    >>> int(np.isfinite(distance).sum())
+    13
+    """
+    limit = np.inf if cutoff is None else cutoff
+    # the graph is symmetric, so a directed search avoids a transposition
+    result = csgraph.dijkstra(graph, directed=True, indices=sources,
+                              return_predecessors=gen_pred, limit=limit)
+    if not gen_pred:
+        return result
+    distance, pred = result
+    pred = pred.astype(np.int64)
+    pred[pred < 0] = -1
+    return distance, pred
+
+
 def dijkstra(ntw, cost, v0, n=float('inf')):
     """Compute the shortest path between a start node and all other nodes in
     an origin-destination matrix.
@@ -131,7 +237,8 @@ def dijkstra(ntw, cost, v0, n=float('inf')):
     
     n : float
         integer break point to stop iteration and return n neighbors.
-        Default is ('inf').
+        Default is ('inf'). Nodes further than n from the start node are
+        at distance n.
     
     Returns
     -------
@@ -145,7 +252,8 @@ def dijkstra(ntw, cost, v0, n=float('inf')):
     Notes
     -----
     
-    Based on :cite:`Dijkstra1959a`.
+    Based on :cite:`Dijkstra1959a`. The search runs on the CSR
+    representation of the network, see ``shortest_paths``.
     
     Examples
     --------
@@ -159,31 +267,10 @@ def dijkstra(ntw, cost, v0, n=float('inf')):
     >>> pred[196]
     133
     """
-    distance = [n for x in ntw.node_list]
-    idx = ntw.node_list.index(v0)
-    distance[ntw.node_list.index(v0)] = 0
-    pred = [-1 for x in ntw.node_list]
-    a = set()
-    a.add(v0)
-    while len(a) > 0:
-        # Get node with the lowest value from distance.
-        dist = n
-        for node in a:
-            if distance[node] < dist:
-                dist = distance[node]
-                v = node
-        # Remove that node from the set.
-        a.remove(v)
-        last = v
-        # 4. Get the neighbors to the current node.
-        neighbors = get_neighbor_distances(ntw, v, cost)
-        for v1, indiv_cost in neighbors.items():
-            if distance[v1] > distance[v] + indiv_cost:
-                distance[v1] = distance[v] + indiv_cost
-                pred[v1] = v
-                a.add(v1)
-    pred = np.array(pred, dtype=np.int)
-    return distance, pred
+    distance, pred = shortest_paths(ntw.csrgraph(cost), v0, cutoff=n,
+                                    gen_pred=True)
+    distance[np.isinf(distance)] = n
+    return distance.tolist(), pred
 
 
 def dijkstra_mp(ntw_cost_node):
@@ -231,6 +318,41 @@ def dijkstra_mp(ntw_cost_node):
     return distance, pred
 
 
+def shortest_paths_mp(graph_sources_cutoff_pred):
+    """
+    Compute shortest path lengths from a block of start nodes, for use with
+    multiprocessing.
+    
+    Parameters
+    ----------
+    
+    graph_sources_cutoff_pred : tuple
+        tuple of arguments to pass into shortest_paths
+        (1) graph - scipy.sparse.csr_matrix; network adjacency; (2) sources -
+        array; start node ids; (3) cutoff - float or None; search limit;
+        (4) gen_pred - bool; also return the preceeding nodes
+    
+    Returns
+    -------
+    
+    result : numpy.ndarray or tuple
+        output of shortest_paths
+    
+    Examples
+    --------
+    
+    >>> import pysal.explore.spaghetti as spgh
+    >>> from pysal.lib import examples
+    >>> ntw = spgh.Network(examples.get_path('streets.shp'))
+    >>> distance = spgh.util.shortest_paths_mp((ntw.csrgraph(), [0], None,
+    ...                                         False))
+    >>> round(distance[0, 196], 4)
+    5505.6682
+    """
+    graph, sources, cutoff, gen_pred = graph_sources_cutoff_pred
+    return shortest_paths(graph, sources, cutoff=cutoff, gen_pred=gen_pred)
+
+
 def squared_distance_point_segment(point, segment):
     """Find the squared distance between a point and a segment.
     
@@ -286,6 +408,227 @@ def squared_distance_point_segment(point, segment):
     return sqd, nearp
 
 
+def _project_points(points, segments):
+    """Project points onto segments, pairwise.
+    
+    Parameters
+    ----------
+    
+    points : numpy.ndarray
+        (n, 2) point coordinates.
+    
+    segments : numpy.ndarray
+        (n, 4) segment coordinates (x0, y0, x1, y1).
+    
+    Returns
+    -------
+    
+    sqd : numpy.ndarray
+        (n,) squared distances between the points and the segments.
+    
+    nearp : numpy.ndarray
+        (n, 2) nearest points on the segments.
+    
+    """
+    p0 = segments[:, :2]
+    p1 = segments[:, 2:]
+    v = p1 - p0
+    w = points - p0
+    c1 = w[:, 0] * v[:, 0] + w[:, 1] * v[:, 1]
+    c2 = v[:, 0] * v[:, 0] + v[:, 1] * v[:, 1]
+    # Same cases as squared_distance_point_segment: before the start, past
+    # the end, or along the segment.
+    at_p0 = c1 <= 0.
+    at_p1 = ~at_p0 & (c2 <= c1)
+    b = np.where(at_p0 | at_p1, 0., c1 / np.where(c2 > 0., c2, 1.))
+    nearp = p0 + b[:, None] * v
+    nearp[at_p0] = p0[at_p0]
+    nearp[at_p1] = p1[at_p1]
+    d = points - nearp
+    sqd = d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1]
+    return sqd, nearp
+
+
+def segment_grid(segments, cell_size=None):
+    """Bin segments into a regular grid of cells, on their bounding boxes.
+    
+    Parameters
+    ----------
+    
+    segments : numpy.ndarray
+        (m, 4) segment coordinates (x0, y0, x1, y1).
+    
+    cell_size : float
+        Side of the grid cells. Default is None, for the larger of the median
+        segment length and the side of a cell when there are as many cells
+        as segments.
+    
+    Returns
+    -------
+    
+    grid : tuple
+        (origin, cell_size, shape, cell_ptr, cell_segs), where the segments
+        binned in cell ``c = row * shape[0] + col`` are
+        ``cell_segs[cell_ptr[c]:cell_ptr[c + 1]]``.
+    
+    Examples
+    --------
+    
+    >>> import pysal.explore.spaghetti as spgh
+    >>> segments = np.array([[0., 0., 2., 0.], [2., 0., 2., 2.]])
+    >>> origin, size, shape, ptr, segs = spgh.util.segment_grid(segments, 1.)
+    >>> shape
+    (3, 3)
+    >>> segs[ptr[2]:ptr[3]].tolist()
+    [0, 1]
+    """
+    segments = np.asarray(segments, dtype=float).reshape(-1, 4)
+    lo = np.minimum(segments[:, :2], segments[:, 2:])
+    hi = np.maximum(segments[:, :2], segments[:, 2:])
+    origin = lo.min(axis=0)
+    extent = hi.max(axis=0) - origin
+    if cell_size is None:
+        length = np.hypot(segments[:, 2] - segments[:, 0],
+                          segments[:, 3] - segments[:, 1])
+        cell_size = max(np.median(length),
+                        np.sqrt(extent[0] * extent[1] / segments.shape[0]))
+        if not cell_size > 0.:
+            cell_size = max(extent.max(), 1.)
+    shape = tuple((np.floor(extent / cell_size).astype(np.int64) + 1).tolist())
+    
+    c0 = _grid_cells(lo, origin, cell_size, shape)
+    c1 = _grid_cells(hi, origin, cell_size, shape)
+    cells, segs = _expand_cells(c0, c1, shape)
+    order = np.argsort(cells, kind='mergesort')
+    counts = np.bincount(cells, minlength=shape[0] * shape[1])
+    cell_ptr = np.concatenate(([0], np.cumsum(counts)))
+    return origin, cell_size, shape, cell_ptr, segs[order]
+
+
+def _grid_cells(xy, origin, cell_size, shape):
+    """Grid (col, row) of coordinates, clipped to the grid.
+    """
+    cells = np.floor((xy - origin) / cell_size).astype(np.int64)
+    cells[:, 0] = np.clip(cells[:, 0], 0, shape[0] - 1)
+    cells[:, 1] = np.clip(cells[:, 1], 0, shape[1] - 1)
+    return cells
+
+
+def _expand_cells(c0, c1, shape):
+    """Flat ids of all cells in the (c0, c1) ranges, with the position of the
+    range each comes from.
+    """
+    width = c1[:, 0] - c0[:, 0] + 1
+    counts = width * (c1[:, 1] - c0[:, 1] + 1)
+    owner = np.repeat(np.arange(c0.shape[0]), counts)
+    within = np.arange(owner.shape[0]) - np.repeat(np.cumsum(counts) - counts,
+                                                   counts)
+    col = c0[owner, 0] + within % width[owner]
+    row = c0[owner, 1] + within // width[owner]
+    return row * shape[0] + col, owner
+
+
+def snap_points_to_segments(points, segments, cell_size=None,
+                            batch_size=2 ** 14):
+    """Snap points onto the closest of a set of segments, in batches of
+    points and with a grid index of the segments.
+    
+    Parameters
+    ----------
+    
+    points : array_like
+        (n, 2) point coordinates.
+    
+    segments : array_like
+        (m, 4) segment coordinates (x0, y0, x1, y1).
+    
+    cell_size : float
+        Side of the grid cells, see ``segment_grid``.
+    
+    batch_size : int
+        Number of points snapped at a time.
+    
+    Returns
+    -------
+    
+    seg_idx : numpy.ndarray
+        (n,) index of the closest segment of each point. Ties are resolved
+        towards the lower index.
+    
+    offset : numpy.ndarray
+        (n,) distance from the start (x0, y0) of the segment to the snapped
+        location.
+    
+    snapped : numpy.ndarray
+        (n, 2) snapped locations.
+    
+    snap_dist : numpy.ndarray
+        (n,) distance from the points to the snapped locations.
+    
+    Notes
+    -----
+    
+    A point is never further from its closest segment than from the closest
+    segment end, so only the segments binned in the grid cells within that
+    distance are tested.
+    
+    Examples
+    --------
+    
+    >>> import pysal.explore.spaghetti as spgh
+    >>> points = [(1., 1.), (3., 1.5)]
+    >>> segments = [(0., 0., 2., 0.), (2., 0., 2., 2.)]
+    >>> seg_idx, offset, snapped, snap_dist = \\
+    ...     spgh.util.snap_points_to_segments(points, segments)
+    >>> seg_idx.tolist(), offset.tolist(), snap_dist.tolist()
+    ([0, 1], [1.0, 1.5], [1.0, 1.0])
+    >>> snapped
+    array([[1. , 0. ],
+           [2. , 1.5]])
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    segments = np.asarray(segments, dtype=float).reshape(-1, 4)
+    npts = points.shape[0]
+    seg_idx = np.zeros(npts, dtype=np.int64)
+    snapped = np.empty((npts, 2))
+    if npts and segments.shape[0]:
+        origin, cell_size, shape, cell_ptr, cell_segs = \
+            segment_grid(segments, cell_size)
+        ends = np.concatenate((segments[:, :2], segments[:, 2:]))
+        bound = cg.KDTree(ends).query(points, k=1)[0]
+        # Widen the search so that the segment of the closest end is in.
+        bound = bound * (1. + 1e-9) + np.finfo(float).eps
+        for start in range(0, npts, batch_size):
+            stop = min(start + batch_size, npts)
+            pts = points[start:stop]
+            reach = bound[start:stop, None]
+            c0 = _grid_cells(pts - reach, origin, cell_size, shape)
+            c1 = _grid_cells(pts + reach, origin, cell_size, shape)
+            cells, owner = _expand_cells(c0, c1, shape)
+            
+            # Candidate (point, segment) pairs from the cells.
+            counts = cell_ptr[cells + 1] - cell_ptr[cells]
+            pair_pt = np.repeat(owner, counts)
+            pos = np.arange(pair_pt.shape[0]) - \
+                np.repeat(np.cumsum(counts) - counts, counts)
+            pair_seg = cell_segs[np.repeat(cell_ptr[cells], counts) + pos]
+            sqd = _project_points(pts[pair_pt], segments[pair_seg])[0]
+            
+            # The closest segment, with the lowest index among ties.
+            order = np.lexsort((pair_seg, sqd, pair_pt))
+            first = np.unique(pair_pt[order], return_index=True)[1]
+            seg_idx[start:stop] = pair_seg[order[first]]
+        snapped = _project_points(points, segments[seg_idx])[1]
+    else:
+        snapped[:] = np.nan
+    p0 = segments[seg_idx, :2] if segments.shape[0] else snapped
+    offset = np.sqrt((snapped[:, 0] - p0[:, 0]) ** 2 +
+                     (snapped[:, 1] - p0[:, 1]) ** 2)
+    snap_dist = np.sqrt((points[:, 0] - snapped[:, 0]) ** 2 +
+                        (points[:, 1] - snapped[:, 1]) ** 2)
+    return seg_idx, offset, snapped, snap_dist
+
+
 def snap_points_on_segments(points, segments):
     """Place points onto closet segment in a set of segments
     
@@ -319,60 +662,13 @@ def snap_points_on_segments(points, segments):
     {0: ([(0.0, 0.0), (2.0, 0.0)], array([1., 0.]))}
     """
     
-    # Put segments in an Rtree.
-    rt = cg.Rtree()
-    SMALL = np.finfo(float).eps
-    node2segs = {}
-    
-    for segment in segments:
-        head, tail = segment.vertices
-        x0, y0 = head
-        x1, y1 = tail
-        if (x0, y0) not in node2segs:
-            node2segs[(x0, y0)] = []
-        if (x1, y1) not in node2segs:
-            node2segs[(x1, y1)] = []
-        node2segs[(x0, y0)].append(segment)
-        node2segs[(x1, y1)].append(segment)
-        x0, y0, x1, y1 = segment.bounding_box
-        x0 -= SMALL
-        y0 -= SMALL
-        x1 += SMALL
-        y1 += SMALL
-        r = cg.Rect(x0, y0, x1, y1)
-        rt.insert(segment, r)
-        
-    # Build a KDtree on segment nodes.
-    kt = cg.KDTree(list(node2segs.keys()))
+    ids = list(points.keys())
+    xy = np.array([tuple(points[i]) for i in ids], dtype=float)
+    coords = np.array([[c for v in s.vertices for c in v] for s in segments],
+                      dtype=float)
+    seg_idx, _, snapped, _ = snap_points_to_segments(xy, coords)
     p2s = {}
+    for k, ptIdx in enumerate(ids):
+        p2s[ptIdx] = (segments[seg_idx[k]].vertices, snapped[k])
     
-    for ptIdx, point in points.items():
-        # First, find nearest neighbor segment node for the point.
-        dmin, node = kt.query(point, k=1)
-        node = tuple(kt.data[node])
-        closest = node2segs[node][0].vertices
-        
-        # Use this segment as the candidate closest segment:  closest
-        # Use the distance as the distance to beat:           dmin
-        p2s[ptIdx] = (closest, np.array(node))
-        x0 = point[0] - dmin
-        y0 = point[1] - dmin
-        x1 = point[0] + dmin
-        y1 = point[1] + dmin
-        
-        # Find all segments with bounding boxes that intersect
-        # a query rectangle centered on the point with sides of length 2*dmin.
-        candidates = [cand for cand in rt.intersection([x0, y0, x1, y1])]
-        dmin += SMALL
-        dmin2 = dmin * dmin
-        
-        # Of the candidate segments, find the nearest to the query point.
-        for candidate in candidates:
-            dnc, p2b = squared_distance_point_segment(point,
-                                                      candidate.vertices)
-            if dnc <= dmin2:
-                closest = candidate.vertices
-                dmin2 = dnc
-                p2s[ptIdx] = (closest, p2b)
-                
     return p2s
@@ -194,9 +194,15 @@ class Arc_KDTree(temp_KDTree):
         #scipy.sphere.KDTree.query_ball_point appears to ignore the eps argument.
         # we have some floating point errors moving back and forth between cordinate systems,
         # so we'll account for that be adding some to our radius, 3*float's eps value.
-        if r > 0.5 * self.circumference:
+        if numpy.any(numpy.asarray(r) > 0.5 * self.circumference):
             raise ValueError("r, must not exceed 1/2 circumference of the sphere (%f)." % self.circumference * 0.5)
-        r = sphere.arcdist2linear(r, self.radius) + FLOAT_EPS * 3
+        if numpy.ndim(r):
+            # one radius per point, as arcdist2linear for each of them
+            angle = numpy.radians(numpy.asarray(r, dtype=float) * 360.0 /
+                                  self.circumference)
+            r = numpy.sqrt(2 - 2 * numpy.cos(angle)) + FLOAT_EPS * 3
+        else:
+            r = sphere.arcdist2linear(r, self.radius) + FLOAT_EPS * 3
         return temp_KDTree.query_ball_point(self, self._toXYZ(x), r, eps=eps)
 
     def query_ball_tree(self, other, r, p=2, eps=0):
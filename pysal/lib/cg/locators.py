@@ -7,13 +7,18 @@ __credits__ = "Copyright (c) 2005-2011 Sergio J. Rey"
 
 import math
 import copy
+import numpy as np
 from .rtree import *
+from .rtree import BUFFER
 from .standalone import *
 from .shapes import *
 
 __all__ = ["Grid", "BruteForcePointLocator",
            "PointLocator", "PolygonLocator"]
 
+# number of items from which Grid queries go through a bulk loaded STRtree
+GRID_TREE_SIZE = 10000
+
 
 class Grid:
     """
@@ -40,6 +45,8 @@ class Grid:
             raise Exception('Cannot create grid with resolution 0')
         self.res = resolution
         self.hash = {}
+        self.size = 0
+        self._tree = None
         self.x_range = (bounds.left, bounds.right)
         self.y_range = (bounds.lower, bounds.upper)
         try:
@@ -92,6 +99,8 @@ class Grid:
             self.hash[grid_loc].append((pt, item))
         else:
             self.hash[grid_loc] = [(pt, item)]
+        self.size += 1
+        self._tree = None
         return item
 
     def remove(self, item, pt):
@@ -120,8 +129,27 @@ class Grid:
         self.hash[grid_loc].remove((pt, item))
         if self.hash[grid_loc] == []:
             del self.hash[grid_loc]
+        self.size -= 1
+        self._tree = None
         return item
 
+    def _search_tree(self):
+        """
+        STRtree over the items of a large grid, rebuilt after changes.
+        """
+        if self.size < GRID_TREE_SIZE:
+            return None
+        if self._tree is None:
+            entries = [entry for cell in self.hash.values() for entry in cell]
+            pts = np.array([tuple(entry[0]) for entry in entries], dtype=float)
+            self._tree = STRtree(np.hstack((pts, pts)), objects=entries)
+        return self._tree
+
+    def _tree_region(self, tree, x_range, y_range):
+        ids = tree.query_rects([[x_range[0], y_range[0], x_range[1],
+                                 y_range[1]]], closed=True)[1]
+        return [tree.objects[i] for i in ids]
+
     def bounds(self, bounds):
         """
         Returns a list of items found in the grid within the bounds specified.
@@ -150,6 +178,10 @@ class Grid:
         """
         x_range = (bounds.left, bounds.right)
         y_range = (bounds.lower, bounds.upper)
+        tree = self._search_tree()
+        if tree is not None:
+            return [item[1] for item in self._tree_region(tree, x_range,
+                                                          y_range)]
         items = []
         lower_left = self.__grid_loc((x_range[0], y_range[0]))
         upper_right = self.__grid_loc((x_range[1], y_range[1]))
@@ -184,6 +216,12 @@ class Grid:
         >>> sorted(g.proximity(Point((4.0, 1.0)), 4.0))
         ['A', 'B']
         """
+        tree = self._search_tree()
+        if tree is not None:
+            return [item[1] for item in
+                    self._tree_region(tree, (pt[0] - r, pt[0] + r),
+                                      (pt[1] - r, pt[1] + r))
+                    if get_points_dist(pt, item[0]) <= r]
         items = []
         lower_left = self.__grid_loc((pt[0] - r, pt[1] - r))
         upper_right = self.__grid_loc((pt[0] + r, pt[1] + r))
@@ -215,6 +253,13 @@ class Grid:
         >>> g.nearest(Point((7.0, 5.0)))
         'B'
         """
+        tree = self._search_tree()
+        if tree is not None:
+            # the items at the nearest distance, up to rounding
+            r = tree.nearest([tuple(pt)])[0][0] + BUFFER
+            return min([(get_points_dist(pt, item[0]), item[1]) for item in
+                        self._tree_region(tree, (pt[0] - r, pt[0] + r),
+                                          (pt[1] - r, pt[1] + r))])[1]
         search_size = self.res
         while (self.proximity(pt, search_size) == [] and
                (get_points_dist((self.x_range[0], self.y_range[0]), pt) > search_size or
@@ -442,14 +487,16 @@ class PolygonLocator:
         """
 
         self._locator = polygons
-        # create and rtree
-        self._rtree = RTree()
-        for polygon in polygons:
-            x = polygon.bounding_box.left
-            y = polygon.bounding_box.lower
-            X = polygon.bounding_box.right
-            Y = polygon.bounding_box.upper
-            self._rtree.insert(polygon, Rect(x, y, X, Y))
+        # bulk load an rtree
+        bounds = [[polygon.bounding_box.left, polygon.bounding_box.lower,
+                   polygon.bounding_box.right, polygon.bounding_box.upper]
+                  for polygon in polygons]
+        self._rtree = STRtree(bounds, objects=list(polygons))
+
+    def _candidates(self, rect):
+        """polygons whose bounding boxes overlap rect"""
+        ids = self._rtree.query_rects([rect])[1]
+        return [self._rtree.objects[i] for i in ids]
 
     def inside(self, query_rectangle):
         """
@@ -490,11 +537,8 @@ class PolygonLocator:
         upper = query_rectangle.upper
         lower = query_rectangle.lower
 
-        # rtree rect
-        qr = Rect(left, lower, right, upper)
         # bb overlaps
-        res = [r.leaf_obj() for r in self._rtree.query_rect(qr)
-               if r.is_leaf()]
+        res = self._candidates([left, lower, right, upper])
 
         qp = Polygon([Point((left, lower)), Point((right, lower)),
                       Point((right, upper)), Point((left, upper))])
@@ -557,12 +601,8 @@ class PolygonLocator:
         upper = query_rectangle.upper
         lower = query_rectangle.lower
 
-        # rtree rect
-        qr = Rect(left, lower, right, upper)
-
         # bb overlaps
-        res = [r.leaf_obj() for r in self._rtree.query_rect(qr)
-               if r.is_leaf()]
+        res = self._candidates([left, lower, right, upper])
         # have to check for polygon overlap using segment intersection
 
         # add polys whose bb contains at least one of the corners of the query
@@ -573,13 +613,8 @@ class PolygonLocator:
         ne = (right, upper)
         nw = (left, upper)
         pnts = [sw, se, ne, nw]
-        cs = []
-        for pnt in pnts:
-            c = [r.leaf_obj() for r in self._rtree.query_point(
-                pnt) if r.is_leaf()]
-            cs.extend(c)
-
-        cs = list(set(cs))
+        ids = self._rtree.query_points(pnts)[1]
+        cs = list(set([self._rtree.objects[i] for i in ids]))
 
         overlapping = []
 
@@ -743,8 +778,8 @@ class PolygonLocator:
 
         """
         # bbounding box containment
-        res = [r.leaf_obj() for r in self._rtree.query_point(point)
-               if r.is_leaf()]
+        ids = self._rtree.query_points([tuple(point)])[1]
+        res = [self._rtree.objects[i] for i in ids]
         # explicit containment check for candidate polygons needed
         return [poly for poly in res if poly.contains_point(point)]
 
@@ -13,7 +13,7 @@ see doc/ref/r-tree-clustering-split-algo.pdf
 
 __author__ = "Sergio J. Rey"
 
-__all__ = ['RTree', 'Rect', 'Rtree']
+__all__ = ['RTree', 'Rect', 'Rtree', 'STRtree']
 
 MAXCHILDREN = 10
 MAX_KMEANS = 5
@@ -22,6 +22,7 @@ import math
 import random
 import time
 import array
+import numpy as np
 
 
 class Rect(object):
@@ -250,6 +251,277 @@ class RTree(object):
         self.cursor.insert(id, Rect(bb[0], bb[1], bb[2], bb[3]))
 
 
+class STRtree(object):
+    """
+    R-tree bulk loaded with the Sort-Tile-Recursive (STR) algorithm, with
+    the nodes held in arrays.
+
+    Unlike :class:`RTree`, which inserts one item at a time, the tree is
+    packed once from all the bounding boxes and supports querying many
+    rectangles or points at once.
+
+    Parameters
+    ----------
+    bounds    : array
+                (n, 4) bounding boxes [minx, miny, maxx, maxy] of the items.
+    objects   : sequence
+                Objects associated with the bounding boxes, returned by
+                :meth:`intersection`. Default is None, in which case the
+                item ids are returned.
+    capacity  : int
+                Maximum number of children of a node. Default is
+                MAXCHILDREN.
+
+    Attributes
+    ----------
+    n         : int
+                Number of items.
+    bounds    : array
+                (n, 4) bounding boxes of the items.
+    boxes     : list
+                Bounding boxes of the nodes at each level, root first.
+    children  : list
+                Child ids of the nodes at each level: the children of node i
+                are children[level][i * capacity:(i + 1) * capacity], ids of
+                the nodes of the next level, or of the items below the last
+                level.
+
+    Examples
+    --------
+    >>> t = STRtree([[0, 0, 10, 10], [10, 0, 20, 10], [0, 10, 10, 20]])
+    >>> q, ids = t.query_rects([[5, 5, 15, 8], [-1, -1, 0, 0]])
+    >>> q.tolist(), ids.tolist()
+    ([0, 0], [0, 1])
+    >>> q, ids = t.query_points([[10, 10], [15, 15]])
+    >>> q.tolist(), ids.tolist()
+    ([0, 0, 0], [0, 1, 2])
+    >>> dist, ids = t.nearest([[25, 5], [5, 5]])
+    >>> dist.tolist(), ids.tolist()
+    ([5.0, 0.0], [1, 0])
+    """
+
+    def __init__(self, bounds, objects=None, capacity=MAXCHILDREN):
+        bounds = np.asarray(bounds, dtype=float).reshape(-1, 4)
+        # like Rect, accept swapped corners
+        self.bounds = np.hstack((np.minimum(bounds[:, :2], bounds[:, 2:]),
+                                 np.maximum(bounds[:, :2], bounds[:, 2:])))
+        self.objects = objects
+        self.capacity = capacity
+        self.n = self.bounds.shape[0]
+        self.boxes = []
+        self.children = []
+        level = self.bounds
+        while level.shape[0]:
+            perm = _str_order(level, capacity)
+            starts = np.arange(0, level.shape[0], capacity)
+            packed = level[perm]
+            parents = np.column_stack(
+                (np.minimum.reduceat(packed[:, 0], starts),
+                 np.minimum.reduceat(packed[:, 1], starts),
+                 np.maximum.reduceat(packed[:, 2], starts),
+                 np.maximum.reduceat(packed[:, 3], starts)))
+            self.boxes.insert(0, parents)
+            self.children.insert(0, perm)
+            if parents.shape[0] == 1:
+                break
+            level = parents
+
+    def _expand(self, level, q, node):
+        """Replace each (query, node) pair by the node's children."""
+        child = self.children[level]
+        pos = (node[:, None] * self.capacity +
+               np.arange(self.capacity)[None, :])
+        valid = pos < child.shape[0]
+        q = np.broadcast_to(q[:, None], pos.shape)[valid]
+        return q, child[pos[valid]]
+
+    def _search(self, queries, test, batch_size):
+        """Pairs of query and item ids passing test, level by level."""
+        qs = []
+        ids = []
+        if not self.n:
+            return np.empty(0, dtype=int), np.empty(0, dtype=int)
+        for start in range(0, queries.shape[0], batch_size):
+            batch = queries[start:start + batch_size]
+            q = np.arange(batch.shape[0])
+            node = np.zeros(batch.shape[0], dtype=int)
+            for level in range(len(self.boxes)):
+                keep = test(batch[q], self.boxes[level][node])
+                q, node = self._expand(level, q[keep], node[keep])
+            keep = test(batch[q], self.bounds[node])
+            qs.append(q[keep] + start)
+            ids.append(node[keep])
+        if not qs:
+            return np.empty(0, dtype=int), np.empty(0, dtype=int)
+        q = np.concatenate(qs)
+        ids = np.concatenate(ids)
+        order = np.lexsort((ids, q))
+        return q[order], ids[order]
+
+    def query_rects(self, rects, closed=False, batch_size=2 ** 14):
+        """
+        Items whose bounding boxes intersect query rectangles.
+
+        Parameters
+        ----------
+        rects      : array
+                     (m, 4) query rectangles [minx, miny, maxx, maxy].
+        closed     : bool
+                     If False (default), the intersection must have a
+                     positive area, as in :meth:`Rect.does_intersect`. If
+                     True, boxes touching a rectangle, and degenerate boxes
+                     such as points, on its boundary also intersect it.
+        batch_size : int
+                     Number of rectangles searched at once.
+
+        Returns
+        -------
+        q          : array
+                     Query rectangle id of each intersection.
+        ids        : array
+                     Item id of each intersection, sorted within each query.
+        """
+        rects = np.asarray(rects, dtype=float).reshape(-1, 4)
+        rects = np.hstack((np.minimum(rects[:, :2], rects[:, 2:]),
+                           np.maximum(rects[:, :2], rects[:, 2:])))
+
+        def test(r, b):
+            w = (np.minimum(r[:, 2], b[:, 2]) - np.maximum(r[:, 0], b[:, 0]))
+            h = (np.minimum(r[:, 3], b[:, 3]) - np.maximum(r[:, 1], b[:, 1]))
+            if closed:
+                return (w >= 0) & (h >= 0)
+            return (w > 0) & (h > 0)
+        return self._search(rects, test, batch_size)
+
+    def query_points(self, points, batch_size=2 ** 14):
+        """
+        Items whose bounding boxes contain query points, boundary included.
+
+        Parameters
+        ----------
+        points     : array
+                     (m, 2) query points.
+        batch_size : int
+                     Number of points searched at once.
+
+        Returns
+        -------
+        q          : array
+                     Query point id of each containing box.
+        ids        : array
+                     Item id of each containing box, sorted within each
+                     query.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+
+        def test(p, b):
+            return ((b[:, 0] <= p[:, 0]) & (p[:, 0] <= b[:, 2]) &
+                    (b[:, 1] <= p[:, 1]) & (p[:, 1] <= b[:, 3]))
+        return self._search(points, test, batch_size)
+
+    def nearest(self, points, batch_size=2 ** 14):
+        """
+        Item whose bounding box is nearest to each query point.
+
+        Parameters
+        ----------
+        points     : array
+                     (m, 2) query points.
+        batch_size : int
+                     Number of points searched at once.
+
+        Returns
+        -------
+        dist       : array
+                     Distance from each point to the nearest bounding box,
+                     0 if inside it; inf for an empty tree.
+        ids        : array
+                     Id of the nearest item, the lowest one on ties; -1 for
+                     an empty tree.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        dist = np.empty(points.shape[0])
+        dist[:] = np.inf
+        ids = -np.ones(points.shape[0], dtype=int)
+        if not self.n:
+            return dist, ids
+        for start in range(0, points.shape[0], batch_size):
+            batch = points[start:start + batch_size]
+            q = np.arange(batch.shape[0])
+            node = np.zeros(batch.shape[0], dtype=int)
+            for level in range(len(self.boxes)):
+                boxes = self.boxes[level][node]
+                dmin = _box_distance(batch[q], boxes)
+                # every box holds an item no farther than its far corner
+                bound = np.empty(batch.shape[0])
+                bound[:] = np.inf
+                np.minimum.at(bound, q, _box_distance(batch[q], boxes, True))
+                keep = dmin <= bound[q]
+                q, node = self._expand(level, q[keep], node[keep])
+            d = _box_distance(batch[q], self.bounds[node])
+            order = np.lexsort((node, d, q))
+            q, d, node = q[order], d[order], node[order]
+            first = np.ones(q.shape[0], dtype=bool)
+            first[1:] = q[1:] != q[:-1]
+            dist[start + q[first]] = d[first]
+            ids[start + q[first]] = node[first]
+        return dist, ids
+
+    def intersection(self, boundingbox):
+        """
+        replicate c rtree method
+
+        Returns
+        -------
+
+        ids : list
+              list of objects, or object ids when the tree has no objects,
+              whose bounding boxes intersect with query bounding box
+
+        """
+        # grow the bounding box slightly to handle coincident edges
+        bb = boundingbox
+        qr = [bb[0] - BUFFER, bb[1] - BUFFER, bb[2] + BUFFER, bb[3] + BUFFER]
+        ids = self.query_rects([qr])[1].tolist()
+        if self.objects is None:
+            return ids
+        return [self.objects[i] for i in ids]
+
+
+def _str_order(bounds, capacity):
+    """
+    Order of boxes packed into parent nodes by Sort-Tile-Recursive: the
+    boxes are sorted by center x into vertical slices of
+    ceil(sqrt(nparents)) nodes, and by center y within each slice.
+    """
+    n = bounds.shape[0]
+    nslices = int(math.ceil(math.sqrt(math.ceil(n / float(capacity)))))
+    cx = bounds[:, 0] + bounds[:, 2]
+    cy = bounds[:, 1] + bounds[:, 3]
+    slices = np.empty(n, dtype=int)
+    slices[np.argsort(cx, kind='mergesort')] = (np.arange(n) //
+                                                (nslices * capacity))
+    return np.lexsort((cy, slices))
+
+
+def _box_distance(points, boxes, farthest=False):
+    """
+    Distance between points and boxes, pairwise: to the nearest point of
+    each box, or to its farthest corner.
+    """
+    dx0 = boxes[:, 0] - points[:, 0]
+    dx1 = points[:, 0] - boxes[:, 2]
+    dy0 = boxes[:, 1] - points[:, 1]
+    dy1 = points[:, 1] - boxes[:, 3]
+    if farthest:
+        dx = np.maximum(np.abs(dx0), np.abs(dx1))
+        dy = np.maximum(np.abs(dy0), np.abs(dy1))
+    else:
+        dx = np.maximum(np.maximum(dx0, dx1), 0)
+        dy = np.maximum(np.maximum(dy0, dy1), 0)
+    return np.hypot(dx, dy)
+
+
 class _NodeCursor(object):
     @classmethod
     def create(cls, rooto, rect):
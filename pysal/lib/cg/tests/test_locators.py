@@ -2,6 +2,8 @@
 """locators Unittest."""
 from ..shapes import *
 from ..locators import *
+from .. import locators
+from ..standalone import get_points_dist
 import unittest
 
 
@@ -42,6 +44,13 @@ class PolygonLocator_Tester(unittest.TestCase):
         res = self.pl.inside(qr)
         self.assertEqual(len(res), 1)
 
+    def test_empty(self):
+        pl = PolygonLocator([])
+        qr = Rectangle(0, 0, 5, 5)
+        self.assertEqual(pl.inside(qr), [])
+        self.assertEqual(pl.overlapping(qr), [])
+        self.assertEqual(pl.contains_point((1, 1)), [])
+
     def test_overlapping(self):
 
         qr = Rectangle(3, 3, 5, 5)
@@ -55,8 +64,41 @@ class PolygonLocator_Tester(unittest.TestCase):
         res = self.pl2.overlapping(qr)
         self.assertEqual(len(res), 4)
 
+
+class Grid_Tester(unittest.TestCase):
+    def test_search_tree(self):
+        grid = Grid(Rectangle(0, 0, 10, 10), 1)
+        for i in range(100):
+            grid.add(i, Point(((i * 7) % 10 + 0.5, (i * 3) % 10 + 0.25)))
+        queries = [grid.bounds(Rectangle(2, 2, 5.5, 6.25)),
+                   grid.proximity(Point((4.0, 4.0)), 2.5),
+                   grid.nearest(Point((9.9, 0.1)))]
+        size = locators.GRID_TREE_SIZE
+        locators.GRID_TREE_SIZE = 10
+        try:
+            self.assertEqual(sorted(grid.bounds(Rectangle(2, 2, 5.5, 6.25))),
+                             sorted(queries[0]))
+            self.assertEqual(sorted(grid.proximity(Point((4.0, 4.0)), 2.5)),
+                             sorted(queries[1]))
+            self.assertEqual(grid.nearest(Point((9.9, 0.1))), queries[2])
+        finally:
+            locators.GRID_TREE_SIZE = size
+
+    def test_nearest_large(self):
+        grid = Grid(Rectangle(0, 0, 100, 100), 1)
+        pts = [((i * 37) % 100 + 0.5, ((i * 61) // 100) % 100 + 0.25)
+               for i in range(locators.GRID_TREE_SIZE)]
+        for i, p in enumerate(pts):
+            grid.add(i, Point(p))
+        self.assertTrue(grid._search_tree() is not None)
+        for q in [(0.0, 0.0), (50.3, 50.7), (99.9, 12.1), (-5.0, 120.0)]:
+            found = grid.nearest(Point(q))
+            best = min(get_points_dist(q, p) for p in pts)
+            self.assertAlmostEqual(get_points_dist(q, pts[found]), best)
+
+
 suite = unittest.TestSuite()
-test_classes = [PolygonLocator_Tester]
+test_classes = [PolygonLocator_Tester, Grid_Tester]
 for i in test_classes:
     a = unittest.TestLoader().loadTestsFromTestCase(i)
     suite.addTest(a)
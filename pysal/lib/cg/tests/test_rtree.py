@@ -1,6 +1,7 @@
 
 """pyrtree Unittest."""
-from ..rtree import RTree, Rect
+from ..rtree import RTree, Rect, STRtree
+import numpy as np
 import unittest
 
 
@@ -56,6 +57,42 @@ class Pyrtree_Tester(unittest.TestCase):
         res = [r.leaf_obj() for r in t.query_rect((qr)) if r.is_leaf()]
         self.assertEqual(len(res), 4)
 
+    def test_strtree(self):
+        bounds = [self.objects[i].coords() for i in range(100)]
+        t = STRtree(bounds, capacity=4)
+        self.assertEqual(t.n, 100)
+        self.assertEqual(t.boxes[0].shape[0], 1)
+
+        q, res = t.query_rects([[5, 5, 25, 25], [5, 6, 65, 7]])
+        self.assertEqual(res[q == 0].tolist(), [0, 1, 10, 11])
+        self.assertEqual(len(res[q == 1]), 4)
+
+        # vertices are shared by all coincident rectangles
+        q, res = t.query_points([(20.0, 20.0), (21, 20), (21, 21),
+                                 (-12, 21)])
+        self.assertEqual(np.bincount(q, minlength=4).tolist(), [4, 2, 1, 0])
+
+        self.assertEqual(sorted(t.intersection([5, 5, 25, 25])),
+                         [0, 1, 10, 11])
+
+    def test_strtree_empty(self):
+        t = STRtree([])
+        self.assertEqual(t.n, 0)
+        for q, res in (t.query_rects([[0, 0, 1, 1]]),
+                       t.query_points([[0, 0]])):
+            self.assertEqual((q.tolist(), res.tolist()), ([], []))
+        self.assertEqual(t.intersection([0, 0, 1, 1]), [])
+
+    def test_strtree_nearest(self):
+        rng = np.random.RandomState(0)
+        pts = rng.uniform(0, 100, size=(500, 2))
+        t = STRtree(np.hstack((pts, pts)))
+        queries = rng.uniform(-10, 110, size=(50, 2))
+        dist, ids = t.nearest(queries)
+        d = np.sqrt(((queries[:, None, :] - pts[None, :, :]) ** 2).sum(axis=2))
+        np.testing.assert_array_equal(ids, d.argmin(axis=1))
+        np.testing.assert_array_almost_equal(dist, d.min(axis=1))
+
 
 suite = unittest.TestSuite()
 test_classes = [Pyrtree_Tester]
@@ -18,6 +18,7 @@ from . import mat
 from . import mtx
 from . import stata_txt
 from . import wk1
+from . import wbin
 
 try:
     from . import db
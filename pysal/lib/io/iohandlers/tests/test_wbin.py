@@ -0,0 +1,111 @@
+import unittest
+from ..wbin import WbinIO
+from ...fileio import FileIO as psopen
+from .... import examples as pysal_examples
+from ....weights import W, WSP, CSRW, lat2W
+import tempfile
+import os
+import numpy as np
+
+
+def _mapped(a):
+    """Whether array a is a view of a memory mapped file."""
+    while a is not None:
+        if isinstance(a, np.memmap):
+            return True
+        a = a.base
+    return False
+
+
+class test_WbinIO(unittest.TestCase):
+    def setUp(self):
+        self.w = psopen(pysal_examples.get_path('sids2.gal'), 'r').read()
+        f = tempfile.NamedTemporaryFile(
+            suffix='.wbin', dir=pysal_examples.get_path(''))
+        self.fname = f.name
+        f.close()
+        o = psopen(self.fname, 'w')
+        o.write(self.w)
+        o.close()
+        self.obj = WbinIO(self.fname, 'r')
+
+    def tearDown(self):
+        self.obj.close()
+        os.remove(self.fname)
+
+    def test_close(self):
+        f = self.obj
+        f.close()
+        self.assertRaises(ValueError, f.read)
+
+    def test_read(self):
+        w = self.obj.read()
+        self.assertTrue(isinstance(w, CSRW))
+        self.assertEqual(w.n, self.w.n)
+        self.assertEqual(w.id_order, self.w.id_order)
+        self.assertEqual(dict(w), dict(self.w))
+        self.obj.seek(0)
+        wsp = self.obj.read(sparse=True)
+        self.assertTrue(isinstance(wsp, WSP))
+        self.assertEqual(wsp.id_order, self.w.id_order)
+        self.assertTrue(_mapped(wsp.sparse.data))
+        np.testing.assert_array_equal(wsp.sparse.toarray(),
+                                      self.w.sparse.toarray())
+
+    def test_read_in_memory(self):
+        wsp = self.obj.read(sparse=True, mmap=False)
+        self.assertFalse(_mapped(wsp.sparse.data))
+        np.testing.assert_array_equal(wsp.sparse.toarray(),
+                                      self.w.sparse.toarray())
+
+    def test_seek(self):
+        self.test_read()
+        self.assertRaises(StopIteration, self.obj.read)
+        self.obj.seek(0)
+        self.test_read()
+
+    def test_from_file(self):
+        w = W.from_file(self.fname)
+        self.assertEqual(w.s0, self.w.s0)
+
+    def test_write(self):
+        w = lat2W(4, 4)
+        w.transform = 'r'
+        for obj in (w, w.to_WSP()):
+            f = tempfile.NamedTemporaryFile(
+                suffix='.wbin', dir=pysal_examples.get_path(''))
+            fname = f.name
+            f.close()
+            o = psopen(fname, 'w')
+            o.write(obj)
+            o.close()
+            wnew = psopen(fname, 'r').read(sparse=True)
+            self.assertEqual(wnew.id_order, list(range(16)))
+            np.testing.assert_array_equal(wnew.sparse.toarray(),
+                                          w.sparse.toarray())
+            del wnew
+            os.remove(fname)
+        o = psopen(self.fname, 'w')
+        self.assertRaises(TypeError, o.write, {})
+        o.close()
+
+    def test_moments(self):
+        w = self.obj.read()
+        self.assertFalse('moments' in w._cache)
+        del w
+        self.obj.close()
+        o = psopen(self.fname, 'w')
+        moments = self.w.moments
+        o.write(self.w)
+        o.close()
+        self.obj = WbinIO(self.fname, 'r')
+        w = self.obj.read()
+        self.assertEqual(w._cache['moments'], moments)
+        w.transform = 'r'
+        self.assertFalse('moments' in w._cache)
+        self.w.transform = 'r'
+        for key, value in self.w.moments.items():
+            self.assertAlmostEqual(w.moments[key], value)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,229 @@
+import json
+import struct
+import numpy as np
+from scipy import sparse
+from .. import fileio
+from ...weights.weights import W, WSP, CSRW
+
+__all__ = ["WbinIO"]
+
+MAGIC = b'PYSALWB1'
+# arrays start on multiples of ALIGN bytes so that they can be memory mapped
+ALIGN = 8
+
+
+def _little_endian(a):
+    """Array a with a little endian dtype, copying only if needed."""
+    dtype = a.dtype.newbyteorder('<') if a.dtype.byteorder == '>' else a.dtype
+    return a.astype(dtype, copy=False)
+
+
+def _padding(pos):
+    return -pos % ALIGN
+
+
+class WbinIO(fileio.FileIO):
+    """
+    Opens, reads, and writes weights file objects in a binary CSR format.
+
+    A WBIN file stores the compressed sparse row (CSR) representation of a
+    weights matrix as contiguous arrays, so that it can be loaded without
+    parsing and memory mapped without copying:
+
+    PYSALWB1                      <--- magic string, 8 bytes
+    L                             <--- header length, uint32 little endian
+    {"n": ..., "nnz": ..., ...}   <--- JSON header, L bytes, holding the
+                                       dtype, length and offset of each array
+                                       and, if computed, the trace moments
+                                       of the weights
+    ids                           <--- (n,) observation ids
+    indptr                        <--- (n+1,) row pointers
+    indices                       <--- (nnz,) column offsets
+    data                          <--- (nnz,) weights
+
+    Each array starts on a multiple of 8 bytes from the beginning of the
+    file. Ids must be integers, floats or strings.
+
+    On reading, arrays are memory mapped in copy-on-write mode by default,
+    so that a WSP, or a CSRW for a W, is built without reading the links
+    into memory. Moments already computed for the weights written (see
+    W.moments) are stored in the header and restored with the weights, so
+    that the traces used by spatial diagnostics are not recomputed.
+
+    """
+
+    FORMATS = ['wbin']
+    MODES = ['r', 'w']
+    ARRAYS = ('ids', 'indptr', 'indices', 'data')
+
+    def __init__(self, *args, **kwargs):
+        fileio.FileIO.__init__(self, *args, **kwargs)
+        self.file = open(self.dataPath, self.mode + 'b')
+
+    def read(self, n=-1, sparse=False, mmap=True):
+        """
+        sparse: boolean
+                if true, return pysal WSP object
+                if false, return pysal CSRW object
+        mmap:   boolean
+                if true, memory map the arrays of the file
+                if false, read them into memory
+        """
+        self._sparse = sparse
+        self._mmap = mmap
+        self._complain_ifclosed(self.closed)
+        return self._read()
+
+    def seek(self, pos):
+        if pos == 0:
+            self.file.seek(0)
+            self.pos = 0
+
+    def _read_header(self):
+        self.file.seek(0)
+        if self.file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("%s is not a WBIN weights file" % self.dataPath)
+        size, = struct.unpack('<I', self.file.read(4))
+        return json.loads(self.file.read(size).decode('ascii'))
+
+    def _array(self, spec):
+        dtype = np.dtype(spec['dtype'])
+        if not spec['length']:
+            return np.zeros(0, dtype=dtype)
+        if self._mmap:
+            return np.memmap(self.dataPath, dtype=dtype, mode='c',
+                             offset=spec['offset'], shape=(spec['length'],))
+        self.file.seek(spec['offset'])
+        return np.fromfile(self.file, dtype=dtype, count=spec['length'])
+
+    def _read(self):
+        """Reads a WBIN file
+        Returns a pysal.weights.weights.CSRW or pysal.weights.weights.WSP object
+
+        Examples
+        --------
+
+        >>> import tempfile, os, pysal.lib
+        >>> w = pysal.lib.io.open(pysal.lib.examples.get_path('sids2.gal'), 'r').read()
+
+        Write the weights to a temporary WBIN file, with their trace moments
+
+        >>> trcWtW_WW = w.trcWtW_WW
+        >>> f = tempfile.NamedTemporaryFile(suffix='.wbin')
+        >>> fname = f.name
+        >>> f.close()
+        >>> o = pysal.lib.io.open(fname, 'w')
+        >>> o.write(w)
+        >>> o.close()
+
+        Read them back as a WSP over memory mapped arrays
+
+        >>> f = pysal.lib.io.open(fname, 'r')
+        >>> wsp = f.read(sparse=True)
+        >>> f.close()
+        >>> wsp.n
+        100
+        >>> wsp.id_order == w.id_order
+        True
+        >>> wsp.s0 == w.s0
+        True
+        >>> 'moments' in wsp._cache
+        True
+        >>> wsp.trcWtW_WW == w.trcWtW_WW
+        True
+
+        Or as a W, stored in CSR form
+
+        >>> wnew = pysal.lib.weights.W.from_file(fname)
+        >>> wnew[w.id_order[0]] == w[w.id_order[0]]
+        True
+        >>> del wsp, wnew
+        >>> os.remove(fname)
+        """
+        if self.pos > 0:
+            raise StopIteration
+        header = self._read_header()
+        arrays = {name: self._array(header[name]) for name in self.ARRAYS}
+        n = header['n']
+        if self._sparse:
+            csr = sparse.csr_matrix(
+                (arrays['data'], arrays['indices'], arrays['indptr']),
+                shape=(n, n))
+            w = WSP(csr, arrays['ids'].tolist())
+        else:
+            w = CSRW(arrays['indptr'], arrays['indices'], arrays['data'],
+                     ids=arrays['ids'])
+        if 'moments' in header:
+            w._cache['moments'] = header['moments']
+        self.pos += 1
+        return w
+
+    def write(self, obj):
+        """
+
+        Parameters
+        ----------
+        .write(weightsObject)
+        accepts a weights object
+
+        Returns
+        ------
+
+        a WBIN file
+        write the current weights of a weights object to the opened file.
+
+        """
+        self._complain_ifclosed(self.closed)
+        if not (issubclass(type(obj), W) or issubclass(type(obj), WSP)):
+            raise TypeError("Expected a pysal weights object, got: %s" % (
+                type(obj)))
+        csr = obj.sparse.tocsr()
+        n = csr.shape[0]
+        ids = obj.id_order if obj.id_order is not None else list(range(n))
+        ids = np.asarray(ids)
+        if ids.dtype.kind not in 'iufUS':
+            raise TypeError("WBIN files only support integer, float or "
+                            "string ids")
+        if ids.dtype.kind in 'iu':
+            ids = ids.astype('<i8')
+        # scipy keeps 32 bit indices as given, but downcasts 64 bit ones
+        # that fit, which would copy memory mapped arrays
+        index_dtype = np.int32 if csr.nnz < 2 ** 31 else np.int64
+        arrays = {'ids': ids,
+                  'indptr': csr.indptr.astype(index_dtype, copy=False),
+                  'indices': csr.indices.astype(index_dtype, copy=False),
+                  'data': csr.data.astype(float, copy=False)}
+        arrays = {k: _little_endian(np.ascontiguousarray(v))
+                  for k, v in arrays.items()}
+        header = {'n': n, 'nnz': int(csr.nnz)}
+        # moments are only stored if they were computed, as they need WW
+        moments = getattr(obj, '_cache', {}).get('moments')
+        if moments is not None:
+            header['moments'] = moments
+        # the header holds the offsets of the arrays, which depend on the
+        # length of the header: lay it out with fixed width offsets first
+        for name in self.ARRAYS:
+            header[name] = {'dtype': arrays[name].dtype.str,
+                            'length': int(arrays[name].shape[0]),
+                            'offset': 0}
+        size = len(json.dumps(header)) + 20 * len(self.ARRAYS)
+        pos = len(MAGIC) + 4 + size
+        for name in self.ARRAYS:
+            pos += _padding(pos)
+            header[name]['offset'] = pos
+            pos += arrays[name].nbytes
+        encoded = json.dumps(header).encode('ascii').ljust(size)
+        self.file.write(MAGIC)
+        self.file.write(struct.pack('<I', size))
+        self.file.write(encoded)
+        pos = len(MAGIC) + 4 + size
+        for name in self.ARRAYS:
+            self.file.write(b'\0' * _padding(pos))
+            pos += _padding(pos)
+            self.file.write(arrays[name].tobytes())
+            pos += arrays[name].nbytes
+        self.pos += 1
+
+    def close(self):
+        self.file.close()
+        fileio.FileIO.close(self)
@@ -1,6 +1,7 @@
 import unittest
 from ..weight_converter import WeightConverter
 from ..weight_converter import weight_convert
+from ..weight_converter import to_wbin, from_wbin
 from ...fileio import FileIO as psopen
 import tempfile
 import os
@@ -136,5 +137,30 @@ class test_WeightConverter(unittest.TestCase):
                     self.assertEqual(wnew.n, wold.n)
                 os.remove(outFile)
 
+class test_wbin_convert(unittest.TestCase):
+    def test_round_trip(self):
+        base_dir = pysal_examples.get_path('')
+        for name in ['sids2.gal', 'juvenile.gwt', 'wmat.mtx']:
+            path = pysal_examples.get_path(name)
+            w = psopen(path, 'r').read()
+            wbin = tempfile.NamedTemporaryFile(suffix='.wbin', dir=base_dir)
+            wbin_name = wbin.name
+            wbin.close()
+            self.assertEqual(to_wbin(path, wbin_name), wbin_name)
+            wnew = psopen(wbin_name, 'r').read()
+            self.assertEqual(wnew.id_order, w.id_order)
+            self.assertEqual(dict(wnew), dict(w))
+
+            out = tempfile.NamedTemporaryFile(suffix='.mtx', dir=base_dir)
+            out_name = out.name
+            out.close()
+            from_wbin(wbin_name, out_name)
+            wout = psopen(out_name, 'r').read()
+            # mtx files store weights with 7 significant digits
+            self.assertAlmostEqual(wout.s0 / w.s0, 1., places=6)
+            del wnew
+            os.remove(wbin_name)
+            os.remove(out_name)
+
 if __name__ == '__main__':
     unittest.main()
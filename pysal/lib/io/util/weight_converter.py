@@ -2,7 +2,7 @@ import os
 from ..fileio import FileIO as psopen
 from warnings import warn
 __author__ = "Myunghwa Hwang <mhwang4@gmail.com>"
-__all__ = ["weight_convert"]
+__all__ = ["weight_convert", "to_wbin", "from_wbin"]
 
 
 class WeightConverter(object):
@@ -12,7 +12,7 @@ class WeightConverter(object):
     Then, writes the file in other formats.
 
     WeightConverter can read a weights file in the following formats:
-    GAL, GWT, ArcGIS DBF/SWM/Text, DAT, MAT, MTX, WK1, GeoBUGS Text, and STATA Text.
+    GAL, GWT, ArcGIS DBF/SWM/Text, DAT, MAT, MTX, WBIN, WK1, GeoBUGS Text, and STATA Text.
     It can convert the input file into all of the formats listed above, except GWT.
     Currently, PySAL does not support writing a weights object in the GWT format.
 
@@ -242,3 +242,110 @@ def weight_convert(inPath, outPath, inDataFormat=None, outDataFormat=None, useId
     converter = WeightConverter(inPath, dataFormat=inDataFormat)
     converter.write(outPath, dataFormat=outDataFormat,
                     useIdIndex=useIdIndex, matrix_form=matrix_form)
+
+
+def to_wbin(inPath, outPath=None, inDataFormat=None):
+    """
+    Convert a weights file into the binary WBIN format, which can be
+    memory mapped when it is read back
+
+    Parameters
+    ----------
+    inPath: string
+            path to the input weights file
+    outPath: string
+             path to the output WBIN file. If None, the extension of inPath
+             is replaced with .wbin
+    inDataFormat: string
+                  format of the input file, as in weight_convert
+
+    Returns
+    -------
+    outPath: string
+             path to the WBIN file created
+
+    Examples
+    --------
+    >>> import tempfile, os, pysal.lib
+    >>> f = tempfile.NamedTemporaryFile(suffix='.wbin')
+    >>> fname = f.name
+    >>> f.close()
+    >>> fname == to_wbin(pysal.lib.examples.get_path('juvenile.gwt'), fname)
+    True
+    >>> wold = psopen(pysal.lib.examples.get_path('juvenile.gwt'), 'r').read()
+    >>> wnew = psopen(fname, 'r').read()
+    >>> wold.n == wnew.n
+    True
+    >>> wold.s0 == wnew.s0
+    True
+    >>> del wnew
+    >>> os.remove(fname)
+    """
+    if outPath is None:
+        outPath = os.path.splitext(inPath)[0] + '.wbin'
+    f = psopen(inPath, 'r', inDataFormat)
+    try:
+        w = f.read()
+    finally:
+        f.close()
+    o = psopen(outPath, 'w', 'wbin')
+    try:
+        o.write(w)
+    finally:
+        o.close()
+    return outPath
+
+
+def from_wbin(inPath, outPath, outDataFormat=None, useIdIndex=True,
+              matrix_form=True):
+    """
+    Convert a WBIN weights file into the format specified in outPath
+
+    Parameters
+    ----------
+    inPath: string
+            path to the input WBIN file
+    outPath: string
+             path to the output weights file
+    outDataFormat: string
+                   format of the output file, as in weight_convert
+    useIdIndex: boolean
+                True or False
+                Applies only to ArcGIS DBF/SWM/Text formats
+    matrix_form: boolean
+                 True or False
+                 STATA Text format
+
+    Returns
+    -------
+    A weights file is created
+
+    Examples
+    --------
+    >>> import tempfile, os, pysal.lib
+    >>> wbin = to_wbin(pysal.lib.examples.get_path('sids2.gal'),
+    ...                tempfile.mktemp(suffix='.wbin'))
+    >>> fname = tempfile.mktemp(suffix='.gal')
+    >>> from_wbin(wbin, fname)
+    >>> wold = psopen(pysal.lib.examples.get_path('sids2.gal'), 'r').read()
+    >>> wnew = psopen(fname, 'r').read()
+    >>> dict(wold) == dict(wnew)
+    True
+    >>> os.remove(wbin); os.remove(fname)
+    """
+    f = psopen(inPath, 'r', 'wbin')
+    try:
+        w = f.read()
+    finally:
+        f.close()
+    o = psopen(outPath, 'w', outDataFormat)
+    try:
+        if outDataFormat in ['arcgis_text', 'arcgis_dbf'] or \
+                outPath.lower().endswith('.swm'):
+            o.write(w, useIdIndex=useIdIndex)
+        elif outDataFormat == 'stata_text':
+            o.write(w, matrix_form=matrix_form)
+        else:
+            o.write(w)
+    finally:
+        o.close()
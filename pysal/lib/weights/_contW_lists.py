@@ -1,6 +1,8 @@
 from ..cg.shapes import Polygon, Chain
 import itertools as it
 import collections
+import numpy as np
+from scipy import sparse as sp
 QUEEN = 1
 ROOK = 2
 
@@ -116,3 +118,108 @@ class ContiguityWeightsLists:
         else:
             raise Exception('Weight type {} Not Understood!'.format(self.wttype))
         self.w = w
+
+
+class ContiguityWeightsArrays:
+    """
+    Contiguity for a collection of polygons using sorted NumPy arrays
+
+    All vertices (Queen) or edges (Rook) of the collection are packed in a
+    single array, which is lexicographically sorted so that shared vertices
+    or edges sit in consecutive rows. Pairs of distinct polygons in each
+    run of duplicates are neighbors. The result is a binary sparse
+    adjacency matrix, built without any per-vertex Python containers.
+    """
+    def __init__(self, collection, wttype=1):
+        """
+        Arguments
+        =========
+
+        collection: PySAL PolygonCollection
+
+        wttype: int
+                1: Queen
+                2: Rook
+        """
+        self.collection = list(collection)
+        self.wttype = wttype
+        self.jcontiguity()
+
+    def _pack(self):
+        """
+        Pack the vertices or sorted edges of all polygons in an array.
+
+        Returns
+        -------
+        keys    : array
+                  (m, 2) vertex coordinates for Queen, (m, 4) edge end point
+                  coordinates for Rook, with the end points of each edge
+                  sorted
+        offsets : array
+                  (m,) index of the polygon owning each row of keys
+        """
+        verts = [_get_verts(shape) for shape in self.collection]
+        counts = np.array([len(v) for v in verts], dtype=int)
+        coords = np.array(list(it.chain(*verts)), dtype=float).reshape(-1, 2)
+        offsets = np.repeat(np.arange(len(verts)), counts)
+        if self.wttype == QUEEN:
+            return coords, offsets
+        # an edge joins consecutive vertices of the same polygon
+        same = offsets[1:] == offsets[:-1]
+        head = coords[:-1][same]
+        tail = coords[1:][same]
+        swap = (head[:, 0] > tail[:, 0]) | ((head[:, 0] == tail[:, 0]) &
+                                            (head[:, 1] > tail[:, 1]))
+        first = np.where(swap[:, None], tail, head)
+        second = np.where(swap[:, None], head, tail)
+        return np.hstack((first, second)), offsets[:-1][same]
+
+    def jcontiguity(self):
+        numPoly = len(self.collection)
+        if self.wttype not in (QUEEN, ROOK):
+            raise Exception('Weight type {} Not Understood!'.format(self.wttype))
+        keys, offsets = self._pack()
+        if keys.shape[0]:
+            # sort on the keys, then on the polygon offsets
+            order = np.lexsort((offsets,) + tuple(keys.T[::-1]))
+            keys = keys[order]
+            offsets = offsets[order]
+            new_key = np.ones(keys.shape[0], dtype=bool)
+            new_key[1:] = (keys[1:] != keys[:-1]).any(axis=1)
+            # drop repeats of a key within a polygon, e.g. closing vertices
+            keep = new_key.copy()
+            keep[1:] |= offsets[1:] != offsets[:-1]
+            groups = np.cumsum(new_key)[keep] - 1
+            offsets = offsets[keep]
+        else:
+            groups = offsets
+        rows = []
+        cols = []
+        # every pair of polygons sharing a key is d rows apart in the sorted
+        # array for some d smaller than the size of the largest run
+        size = np.bincount(groups).max() if groups.shape[0] else 0
+        for d in range(1, size):
+            paired = groups[d:] == groups[:-d]
+            rows.append(offsets[:-d][paired])
+            cols.append(offsets[d:][paired])
+        if rows:
+            rows = np.concatenate(rows)
+            cols = np.concatenate(cols)
+        else:
+            rows = cols = np.zeros(0, dtype=int)
+        adjacency = sp.coo_matrix((np.ones(rows.shape[0] * 2),
+                                   (np.concatenate((rows, cols)),
+                                    np.concatenate((cols, rows)))),
+                                  shape=(numPoly, numPoly)).tocsr()
+        adjacency.data[:] = 1.0
+        self.sparse = adjacency
+
+    @property
+    def w(self):
+        """
+        Neighbor sets keyed by polygon offset, as in ContiguityWeightsLists.
+        """
+        indptr = self.sparse.indptr
+        indices = self.sparse.indices
+        return {i: set(indices[indptr[i]:indptr[i + 1]].tolist())
+                for i in range(self.sparse.shape[0])}
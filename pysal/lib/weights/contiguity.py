@@ -1,8 +1,11 @@
+import numpy as np
+from scipy import sparse as sp
 from ..io.fileio import FileIO
 from .weights import W, WSP
-from ._contW_lists import ContiguityWeightsLists
+from ._contW_lists import ContiguityWeightsLists, ContiguityWeightsArrays
 from .util import get_ids
 WT_TYPE = {'rook': 2, 'queen': 1}  # for _contW_Binning
+ENGINES = {'lists': ContiguityWeightsLists, 'arrays': ContiguityWeightsArrays}
 
 __author__ = "Sergio J. Rey <srey@asu.edu> , Levi John Wolf <levi.john.wolf@gmail.com>"
 
@@ -18,6 +21,10 @@ class Rook(W):
                 a collection of PySAL shapes to build weights from
     ids         : list
                 a list of names to use to build the weights
+    engine      : string
+                'lists' (default) to find shared edges with Python
+                containers, 'arrays' to find them by sorting NumPy arrays,
+                which is faster and leaner for large collections
     **kw        : keyword arguments
                 optional arguments for :class:`pysal.weights.W`
 
@@ -28,9 +35,10 @@ class Rook(W):
 
     def __init__(self, polygons, **kw):
         criterion = 'rook'
-        ids = kw.pop('ids', None) 
-        neighbors, ids = _build(polygons, criterion=criterion, 
-                                ids=ids)
+        ids = kw.pop('ids', None)
+        engine = kw.pop('engine', 'lists')
+        neighbors, ids = _build(polygons, criterion=criterion,
+                                ids=ids, engine=engine)
         W.__init__(self, neighbors, ids=ids, **kw)
     
     @classmethod
@@ -46,6 +54,16 @@ class Rook(W):
         sparse    : boolean
                     If True return WSP instance
                     If False return W instance
+        engine    : string
+                    'lists' (default) or 'arrays'. With 'arrays' and
+                    sparse=True, the WSP is built directly from the sparse
+                    adjacency, without neighbor dictionaries.
+        tiles     : int or tuple
+                    If given, build the weights tile by tile over a grid of
+                    tiles x tiles (or nx x ny) cells covering the
+                    shapefile, reading only the shapes of one tile and its
+                    halo at a time, and return a WSP. Peak memory then
+                    scales with the size of a tile rather than the file.
 
         Returns
         -------
@@ -63,6 +81,12 @@ class Rook(W):
         >>> pct_sp = wr.sparse.nnz *1. / wr.n**2
         >>> "%.3f"%pct_sp
         '0.083'
+        >>> wr=Rook.from_shapefile(pysal.lib.examples.get_path("columbus.shp"), sparse=True, engine='arrays')
+        >>> wr.sparse.nnz
+        200
+        >>> wr=Rook.from_shapefile(pysal.lib.examples.get_path("columbus.shp"), tiles=3)
+        >>> wr.sparse.nnz
+        200
 
         Notes
         -----
@@ -80,6 +104,13 @@ class Rook(W):
             ids = get_ids(filepath, idVariable) 
         else:
             ids = None
+        tiles = kwargs.pop('tiles', None)
+        if tiles is not None:
+            return _build_partitioned(filepath, criterion='rook',
+                                      tiles=tiles, ids=ids)
+        if sparse and _direct_sparse(kwargs):
+            return _build_sparse(FileIO(filepath), criterion='rook',
+                                 ids=ids)
         w = cls(FileIO(filepath), ids=ids,**kwargs)
         w.set_shapefile(filepath, idVariable=idVariable, full=full)
         if sparse:
@@ -97,6 +128,13 @@ class Rook(W):
         iterable    : iterable
                       a collection of of shapes to be cast to PySAL shapes. Must
                       support iteration. Can be either Shapely or PySAL shapes.
+        sparse      : boolean
+                      If True return WSP instance
+                      If False return W instance
+        engine      : string
+                      'lists' (default) or 'arrays'. With 'arrays' and
+                      sparse=True, the WSP is built directly from the sparse
+                      adjacency, without neighbor dictionaries.
         **kw        : keyword arguments
                       optional arguments for  :class:`pysal.weights.W`
         See Also
@@ -104,6 +142,9 @@ class Rook(W):
         :class:`pysal.lib.weights.weights.W`
         :class:`pysal.lib.weights.contiguity.Rook`
         """
+        if sparse and _direct_sparse(kwargs):
+            ids = kwargs.get('ids', None)
+            return _build_sparse(iterable, criterion='rook', ids=ids)
         new_iterable = iter(iterable)
         w = cls(new_iterable, **kwargs)
         if sparse:
@@ -168,6 +209,10 @@ class Queen(W):
                   a collection of PySAL shapes to build weights from
     ids         : list
                   a list of names to use to build the weights
+    engine      : string
+                  'lists' (default) to find shared vertices with Python
+                  containers, 'arrays' to find them by sorting NumPy arrays,
+                  which is faster and leaner for large collections
     **kw        : keyword arguments
                   optional arguments for :class:`pysal.weights.W`
 
@@ -179,8 +224,9 @@ class Queen(W):
     def __init__(self, polygons, **kw):
         criterion = 'queen'
         ids = kw.pop('ids', None)
-        neighbors, ids = _build(polygons, ids=ids, 
-                                criterion=criterion)
+        engine = kw.pop('engine', 'lists')
+        neighbors, ids = _build(polygons, criterion=criterion,
+                                ids=ids, engine=engine)
         W.__init__(self, neighbors, ids=ids, **kw)
 
     @classmethod
@@ -198,6 +244,16 @@ class Queen(W):
         sparse      : boolean
                       If True return WSP instance
                       If False return W instance
+        engine      : string
+                      'lists' (default) or 'arrays'. With 'arrays' and
+                      sparse=True, the WSP is built directly from the sparse
+                      adjacency, without neighbor dictionaries.
+        tiles       : int or tuple
+                      If given, build the weights tile by tile over a grid of
+                      tiles x tiles (or nx x ny) cells covering the
+                      shapefile, reading only the shapes of one tile and its
+                      halo at a time, and return a WSP. Peak memory then
+                      scales with the size of a tile rather than the file.
         Returns
         -------
 
@@ -217,6 +273,9 @@ class Queen(W):
         >>> pct_sp = wq.sparse.nnz *1. / wq.n**2
         >>> "%.3f"%pct_sp
         '0.098'
+        >>> wq=Queen.from_shapefile(pysal.lib.examples.get_path("columbus.shp"), engine='arrays')
+        >>> "%.3f"%wq.pct_nonzero
+        '9.829'
 
         Notes
 
@@ -233,6 +292,13 @@ class Queen(W):
             ids = get_ids(filepath, idVariable) 
         else:
             ids = None
+        tiles = kwargs.pop('tiles', None)
+        if tiles is not None:
+            return _build_partitioned(filepath, criterion='queen',
+                                      tiles=tiles, ids=ids)
+        if sparse and _direct_sparse(kwargs):
+            return _build_sparse(FileIO(filepath), criterion='queen',
+                                 ids=ids)
         w = cls(FileIO(filepath), ids=ids, **kwargs)
         w.set_shapefile(filepath, idVariable=idVariable, full=full)
         if sparse:
@@ -250,6 +316,13 @@ class Queen(W):
         iterable    : iterable
                       a collection of of shapes to be cast to PySAL shapes. Must
                       support iteration. Contents may either be a shapely or PySAL shape.
+        sparse      : boolean
+                      If True return WSP instance
+                      If False return W instance
+        engine      : string
+                      'lists' (default) or 'arrays'. With 'arrays' and
+                      sparse=True, the WSP is built directly from the sparse
+                      adjacency, without neighbor dictionaries.
         **kw        : keyword arguments
                       optional arguments for  :class:`pysal.weights.W`
         See Also
@@ -257,6 +330,9 @@ class Queen(W):
         :class:`pysal.lib.weights.weights.W`
         :class:`pysal.lib.weights.contiguiyt.Queen`
         """
+        if sparse and _direct_sparse(kwargs):
+            ids = kwargs.get('ids', None)
+            return _build_sparse(iterable, criterion='queen', ids=ids)
         new_iterable = iter(iterable) 
         w = cls(new_iterable, **kwargs) 
         if sparse:
@@ -350,7 +426,7 @@ def Voronoi(points):
     return Queen.from_dataframe(region_df)
 
 
-def _build(polygons, criterion="rook", ids=None):
+def _build(polygons, criterion="rook", ids=None, engine='lists'):
     """
     This is a developer-facing function to construct a spatial weights object. 
 
@@ -362,6 +438,9 @@ def _build(polygons, criterion="rook", ids=None):
                   option of which kind of contiguity to build. Is either "rook" or "queen" 
     ids         : list
                   list of ids to use to index the neighbor dictionary
+    engine      : string
+                  'lists' to use ContiguityWeightsLists, 'arrays' to use
+                  ContiguityWeightsArrays
 
     Returns
     -------
@@ -377,12 +456,15 @@ def _build(polygons, criterion="rook", ids=None):
     if ids and len(ids) != len(set(ids)):
         raise ValueError("The argument to the ids parameter contains duplicate entries.")
 
+    if engine not in ENGINES:
+        raise ValueError("engine must be one of {}, got '{}'"
+                         .format(sorted(ENGINES), engine))
     wttype = WT_TYPE[criterion.lower()]
     geo = polygons
     if issubclass(type(geo), FileIO):
         geo.seek(0)  # Make sure we read from the beginning of the file.
 
-    neighbor_data = ContiguityWeightsLists(polygons, wttype=wttype).w
+    neighbor_data = ENGINES[engine](polygons, wttype=wttype).w
 
     neighbors = {}
     #weights={}
@@ -399,6 +481,141 @@ def _build(polygons, criterion="rook", ids=None):
             neighbors[key] = set(neighbor_data[key])
     return dict(list(zip(list(neighbors.keys()),list(map(list, list(neighbors.values())))))), ids
 
+def _direct_sparse(kwargs):
+    """
+    Pop the engine from the keyword arguments of a sparse constructor and
+    report whether the WSP can be built straight from the sparse adjacency.
+    This requires the 'arrays' engine and no reordering of the ids.
+    """
+    if kwargs.get('engine', 'lists') != 'arrays':
+        return False
+    if kwargs.get('id_order') is not None:
+        return False
+    kwargs.pop('engine')
+    return True
+
+
+def _build_sparse(polygons, criterion="rook", ids=None):
+    """
+    Construct a WSP from the sparse adjacency of ContiguityWeightsArrays.
+
+    Parameters
+    ---------
+    polygons    : list
+                  list of pysal polygons to use to build contiguity
+    criterion   : string
+                  option of which kind of contiguity to build. Is either "rook" or "queen"
+    ids         : list
+                  list of ids, in the order of polygons
+
+    Returns
+    -------
+    WSP instance with rows in the order of polygons
+    """
+    if ids and len(ids) != len(set(ids)):
+        raise ValueError("The argument to the ids parameter contains duplicate entries.")
+    wttype = WT_TYPE[criterion.lower()]
+    if issubclass(type(polygons), FileIO):
+        polygons.seek(0)
+    adjacency = ContiguityWeightsArrays(polygons, wttype=wttype).sparse
+    if not ids:
+        ids = list(range(adjacency.shape[0]))
+    return WSP(adjacency, id_order=list(ids))
+
+
+def _tile_grid(tiles):
+    """Number of tiles along x and y from an int or an (nx, ny) pair."""
+    if np.ndim(tiles) == 0:
+        tiles = (tiles, tiles)
+    nx, ny = (int(t) for t in tiles)
+    if nx < 1 or ny < 1:
+        raise ValueError("The number of tiles must be positive.")
+    return nx, ny
+
+
+def _build_partitioned(filepath, criterion="rook", tiles=4, ids=None):
+    """
+    Construct a WSP from a polygon shapefile tile by tile.
+
+    A first pass streams the shapes to record their bounding boxes only.
+    Each polygon is then assigned to the cell of a regular grid holding the
+    center of its bounding box. For every cell, the polygons whose
+    bounding boxes intersect the extent of the cell's polygons form its
+    halo; since contiguous polygons have intersecting bounding boxes, the
+    halo holds all neighbors of the cell's polygons. Contiguity is built
+    for the cell and its halo with ContiguityWeightsArrays, the rows of the
+    cell's polygons are kept, and the blocks of all cells are merged into a
+    single sparse matrix.
+
+    Parameters
+    ---------
+    filepath    : string
+                  name of polygon shapefile including suffix
+    criterion   : string
+                  option of which kind of contiguity to build. Is either "rook" or "queen"
+    tiles       : int or tuple
+                  number of tiles along each axis, or (nx, ny)
+    ids         : list
+                  list of ids, in the order of the shapes in the file
+
+    Returns
+    -------
+    WSP instance with rows in the order of the shapes in the file
+    """
+    if ids and len(ids) != len(set(ids)):
+        raise ValueError("The argument to the ids parameter contains duplicate entries.")
+    wttype = WT_TYPE[criterion.lower()]
+    nx, ny = _tile_grid(tiles)
+    f = FileIO(filepath)
+    try:
+        bboxes = np.array([shape.bounding_box[:] for shape in f],
+                          dtype=float).reshape(-1, 4)
+        n = bboxes.shape[0]
+        left, lower, right, upper = bboxes.T
+        cx = (left + right) / 2.
+        cy = (lower + upper) / 2.
+        x0, x1 = cx.min(), cx.max()
+        y0, y1 = cy.min(), cy.max()
+        dx = (x1 - x0) / nx or 1.
+        dy = (y1 - y0) / ny or 1.
+        tx = np.minimum(((cx - x0) // dx).astype(int), nx - 1)
+        ty = np.minimum(((cy - y0) // dy).astype(int), ny - 1)
+        cell = tx * ny + ty
+        order = np.argsort(cell, kind='mergesort')
+        bounds = np.searchsorted(cell[order], np.arange(nx * ny + 1))
+
+        rows = []
+        cols = []
+        for c in range(nx * ny):
+            core = order[bounds[c]:bounds[c + 1]]
+            if not core.shape[0]:
+                continue
+            ext = (left[core].min(), lower[core].min(),
+                   right[core].max(), upper[core].max())
+            # only the bounding boxes are scanned, so that the shapes read
+            # are those of the cell and of the polygons overlapping it
+            halo = np.flatnonzero((left <= ext[2]) & (right >= ext[0]) &
+                                  (lower <= ext[3]) & (upper >= ext[1]))
+            local = np.union1d(core, halo)
+            adjacency = ContiguityWeightsArrays((f.get(i) for i in local),
+                                                wttype=wttype).sparse
+            adjacency = adjacency[np.searchsorted(local, core)].tocoo()
+            rows.append(core[adjacency.row])
+            cols.append(local[adjacency.col])
+    finally:
+        f.close()
+    if rows:
+        rows = np.concatenate(rows)
+        cols = np.concatenate(cols)
+    else:
+        rows = cols = np.zeros(0, dtype=int)
+    adjacency = sp.csr_matrix((np.ones(rows.shape[0]), (rows, cols)),
+                              shape=(n, n))
+    if not ids:
+        ids = list(range(adjacency.shape[0]))
+    return WSP(adjacency, id_order=list(ids))
+
+
 def buildContiguity(polygons, criterion="rook", ids=None):
     """
     This is a deprecated function.
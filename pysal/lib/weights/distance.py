@@ -12,6 +12,12 @@ from scipy.spatial import distance_matrix
 import scipy.sparse as sp
 import numpy as np
 
+# upper bound on the number of pairwise distances held in memory per chunk
+# when building a DistanceBand without a kdtree
+CHUNK_ELEMENTS = 2 ** 22
+# number of points queried against the kdtree per chunk
+CHUNK_POINTS = 2 ** 14
+
 
 def knnW(data, k=2, p=2, ids=None, radius=None, distance_metric='euclidean'):
     """
@@ -510,10 +516,7 @@ class Kernel(W):
             self._set_bw()
 
         self._eval_kernel()
-        neighbors, weights = self._k_to_W(ids)
-        if diagonal:
-            for i in neighbors:
-                weights[i][neighbors[i].index(i)] = 1.0
+        neighbors, weights = self._k_to_W(ids, diagonal=diagonal)
         W.__init__(self, neighbors, weights, ids, **kwargs)
 
     @classmethod
@@ -583,20 +586,24 @@ class Kernel(W):
             ids = df[ids].tolist()
         return cls(pts, ids=ids, **kwargs)
 
-    def _k_to_W(self, ids=None):
-        allneighbors = {}
-        weights = {}
+    def _k_to_W(self, ids=None, diagonal=False):
         if ids:
             ids = np.array(ids)
         else:
             ids = np.arange(len(self.data))
-        for i, neighbors in enumerate(self.kernel):
-            if len(self.neigh[i]) == 0:
-                allneighbors[ids[i]] = []
-                weights[ids[i]] = []
-            else:
-                allneighbors[ids[i]] = list(ids[self.neigh[i]])
-                weights[ids[i]] = self.kernel[i].tolist()
+        data = self._kernel_data
+        if diagonal:
+            data = np.where(self._indices == np.repeat(
+                np.arange(len(ids)), np.diff(self._indptr)), 1.0, data)
+        ids = ids.tolist()
+        indptr = self._indptr.tolist()
+        cols = [ids[j] for j in self._indices.tolist()]
+        data = data.tolist()
+        allneighbors = {}
+        weights = {}
+        for i, id_i in enumerate(ids):
+            allneighbors[id_i] = cols[indptr[i]:indptr[i + 1]]
+            weights[id_i] = data[indptr[i]:indptr[i + 1]]
         return allneighbors, weights
 
     def _set_bw(self):
@@ -616,39 +623,49 @@ class Kernel(W):
 
     def _eval_kernel(self):
         # get points within bandwidth distance of each point
+        bw = self.bandwidth.flatten()
         if not hasattr(self, 'neigh'):
             kdtq = self.kdtree.query_ball_point
-            neighbors = [kdtq(self.data[i], r=bwi[0]) for i,
-                         bwi in enumerate(self.bandwidth)]
-            self.neigh = neighbors
+            # a single batched query, with one radius per point unless the
+            # bandwidth is fixed; unlike single point queries, its lists
+            # come back unsorted
+            r = bw[0] if (bw == bw[0]).all() else bw
+            self.neigh = [sorted(nids) for nids in kdtq(self.data, r=r)]
+        # flatten neighbor lists into link arrays
+        counts = np.array([len(nids) for nids in self.neigh], dtype=int)
+        self._indptr = np.concatenate(([0], np.cumsum(counts)))
+        rows = np.repeat(np.arange(len(counts)), counts)
+        if counts.sum():
+            cols = np.concatenate([np.asarray(nids, dtype=int)
+                                   for nids in self.neigh])
+        else:
+            cols = np.zeros(0, dtype=int)
+        self._indices = cols
         # get distances for neighbors
-        bw = self.bandwidth
-
-        kdtq = self.kdtree.query
-        z = []
-        for i, nids in enumerate(self.neigh):
-            di, ni = kdtq(self.data[i], k=len(nids))
-            if not isinstance(di, np.ndarray):
-                di = np.asarray([di] * len(nids))
-                ni = np.asarray([ni] * len(nids))
-            zi = np.array([dict(list(zip(ni, di)))[nid] for nid in nids]) / bw[i]
-            z.append(zi)
-        zs = z
+        d = np.sqrt(((self.data[rows] - self.data[cols]) ** 2).sum(axis=1))
+        if hasattr(self.kdtree, 'radius'):
+            # chord lengths on the unit sphere to arc distances
+            d = self.kdtree.radius * np.arccos(
+                np.clip((2 - d ** 2) / 2., -1, 1))
+        z = d / bw[rows]
         # functions follow Anselin and Rey (2010) table 5.4
         if self.function == 'triangular':
-            self.kernel = [1 - zi for zi in zs]
+            kernel = 1 - z
         elif self.function == 'uniform':
-            self.kernel = [np.ones(zi.shape) * 0.5 for zi in zs]
+            kernel = np.ones(z.shape) * 0.5
         elif self.function == 'quadratic':
-            self.kernel = [(3. / 4) * (1 - zi ** 2) for zi in zs]
+            kernel = (3. / 4) * (1 - z ** 2)
         elif self.function == 'quartic':
-            self.kernel = [(15. / 16) * (1 - zi ** 2) ** 2 for zi in zs]
+            kernel = (15. / 16) * (1 - z ** 2) ** 2
         elif self.function == 'gaussian':
             c = np.pi * 2
             c = c ** (-0.5)
-            self.kernel = [c * np.exp(-(zi ** 2) / 2.) for zi in zs]
+            kernel = c * np.exp(-(z ** 2) / 2.)
         else:
             print(('Unsupported kernel function', self.function))
+            return
+        self._kernel_data = kernel
+        self.kernel = np.split(kernel, self._indptr[1:-1])
 
 
 class DistanceBand(W):
@@ -690,6 +707,11 @@ class DistanceBand(W):
                   dataset contains any disconnected observations or
                   islands. To silence this warning set this
                   parameter to True.
+    chunksize   : int
+                  number of observations whose neighbors are searched at
+                  once. If None, CHUNK_POINTS observations are queried
+                  against the kdtree at a time, or enough observations to
+                  hold CHUNK_ELEMENTS distances when build_sp is False.
 
     Attributes
     ----------
@@ -741,6 +763,13 @@ class DistanceBand(W):
     >>> w.weights[0]
     [0.01, 0.007999999999999998]
 
+    sparse weights, built without neighbor dictionaries
+
+    >>> wsp=pysal.lib.weights.distance.DistanceBand.from_array(points,threshold=11.2,binary=False,sparse=True)
+    >>> wsp.sparse[0].toarray()
+    array([[0.        , 0.1       , 0.        , 0.08944272, 0.        ,
+            0.        ]])
+
     Notes
     -----
 
@@ -752,7 +781,7 @@ class DistanceBand(W):
 
     def __init__(self, data, threshold, p=2, alpha=-1.0, binary=True, ids=None,
             build_sp=True, silence_warnings=False, 
-            distance_metric='euclidean', radius=None):
+            distance_metric='euclidean', radius=None, chunksize=None):
         """Casting to floats is a work around for a bug in scipy.spatial.
         See detail in pysal issue #126.
 
@@ -767,25 +796,10 @@ class DistanceBand(W):
         self.alpha = alpha
         self.build_sp = build_sp
         self.silence_warnings = silence_warnings
+        self.chunksize = chunksize
 
-        if isKDTree(data):
-            self.kdtree = data
-            self.data = self.kdtree.data
-        else:
-            if self.build_sp:
-                try:
-                    data = np.asarray(data)
-                    if data.dtype.kind != 'f':
-                        data = data.astype(float)
-                    self.kdtree = KDTree(data, 
-                                         distance_metric=distance_metric, 
-                                         radius=radius)
-                    self.data = self.kdtree.data
-                except:
-                    raise ValueError("Could not make array from data")        
-            else:
-                self.data = data
-                self.kdtree = None       
+        self.kdtree, self.data = _band_tree(data, build_sp, distance_metric,
+                                            radius)
         self._band()
         neighbors, weights = self._distance_to_W(ids)
         W.__init__(self, neighbors, weights, ids, silence_warnings=self.silence_warnings)
@@ -802,6 +816,10 @@ class DistanceBand(W):
         idVariable  : string
                       name of column in shapefile's DBF to use for ids
 
+        sparse      : boolean
+                      If True return WSP instance
+                      If False return W instance
+
         Returns
         --------
         Kernel Weights Object
@@ -818,9 +836,13 @@ class DistanceBand(W):
     def from_array(cls, array, threshold, **kwargs):
         """
         Construct a DistanceBand weights from an array. Supports all the same options
-        as :class:`pysal.lib.weights.DistanceBand`
+        as :class:`pysal.lib.weights.DistanceBand`, and sparse=True to
+        return a WSP built straight from the sparse band matrix, without
+        neighbor or weight dictionaries.
 
         """
+        if kwargs.pop('sparse', False):
+            return _band_wsp(array, threshold, **kwargs)
         return cls(array, threshold, **kwargs)
 
     @classmethod
@@ -839,6 +861,9 @@ class DistanceBand(W):
                     if string, the column name of the indices from the dataframe
                     if iterable, a list of ids to use for the W
                     if None, df.index is used.
+        sparse  :   boolean
+                    If True return WSP instance
+                    If False return W instance
 
         """
         pts = get_points_array(df[geom_col])
@@ -846,50 +871,197 @@ class DistanceBand(W):
             ids = df.index.tolist()
         elif isinstance(ids, str):
             ids = df[ids].tolist()
-        return cls(pts, threshold, ids=ids, **kwargs)
+        return cls.from_array(pts, threshold, ids=ids, **kwargs)
 
     def _band(self):
         """Find all pairs within threshold.
 
         """
-        if self.build_sp:
-            self.dmat = self.kdtree.sparse_distance_matrix(
-                    self.kdtree, max_distance=self.threshold, p=self.p).tocsr()
+        if not self.build_sp and hasattr(self.kdtree, 'radius'):
+            raise TypeError('Unable to calculate dense arc distance matrix;'
+                            ' parameter "build_sp" must be set to True for arc'
+                            ' distance type weight')
+        self.dmat = _band_distances(self.kdtree, self.data, self.threshold,
+                                    p=self.p, chunksize=self.chunksize)
+
+    def _distance_to_W(self, ids=None):
+        weighted = _band_weights(self.dmat, self.binary, self.alpha)
+        indptr = weighted.indptr
+        indices = weighted.indices
+        if ids:
+            indices = [ids[j] for j in indices.tolist()]
         else:
-            if str(self.kdtree).split('.')[-1][0:10] == 'Arc_KDTree':
-            	raise TypeError('Unable to calculate dense arc distance matrix;'
-            	        ' parameter "build_sp" must be set to True for arc'
-            	        ' distance type weight')
-            self.dmat = self._spdistance_matrix(self.data, self.data, self.threshold)
+            ids = list(range(weighted.shape[0]))
+        data = weighted.data.tolist()
+        neighbors = {}
+        weights = {}
+        for i, id_i in enumerate(ids):
+            neighbors[id_i] = indices[indptr[i]:indptr[i + 1]]
+            weights[id_i] = data[indptr[i]:indptr[i + 1]]
+        return neighbors, weights
 
 
-    def _distance_to_W(self, ids=None):
-        if self.binary:
-            self.dmat[self.dmat>0] = 1
-            self.dmat.eliminate_zeros()
-            tempW = WSP2W(WSP(self.dmat, id_order=ids), silence_warnings=self.silence_warnings)
-            neighbors = tempW.neighbors
-            weight_keys = list(tempW.weights.keys())
-            weight_vals = list(tempW.weights.values())
-            weights = dict(list(zip(weight_keys, list(map(list, weight_vals)))))
-            return neighbors, weights
+def _band_tree(data, build_sp=True, distance_metric='euclidean', radius=None):
+    """
+    KDTree and point array for a DistanceBand.
+
+    Returns
+    -------
+    (kdtree, data) where kdtree is None if build_sp is False and data is
+    not already a KDTree
+    """
+    if isKDTree(data):
+        return data, data.data
+    if not build_sp:
+        return None, np.asarray(data)
+    try:
+        data = np.asarray(data)
+        if data.dtype.kind != 'f':
+            data = data.astype(float)
+        kdtree = KDTree(data, distance_metric=distance_metric, radius=radius)
+    except:
+        raise ValueError("Could not make array from data")
+    return kdtree, kdtree.data
+
+
+def _minkowski(a, b, p=2):
+    """Row-wise Minkowski p-norm distances between arrays a and b."""
+    diff = np.abs(a - b)
+    if p == np.inf:
+        return diff.max(axis=1)
+    if p == 1:
+        return diff.sum(axis=1)
+    if p == 2:
+        return np.sqrt((diff ** 2).sum(axis=1))
+    return (diff ** p).sum(axis=1) ** (1. / p)
+
+
+def _band_distances(kdtree, data, threshold, p=2, chunksize=None):
+    """
+    Sparse matrix of the distances between all pairs of distinct points
+    within threshold of each other.
+
+    Neighbors are searched for chunks of points at a time, through the
+    kdtree if there is one, or through blocks of a dense distance matrix
+    otherwise, so that memory use is bounded by the chunk and the number
+    of pairs found. Pairs at distance zero are left out, as coincident
+    points are not neighbors.
+
+    Parameters
+    ----------
+    kdtree      : KDTree
+                  tree built on data, or None
+    data        : array
+                  (n,k) points, as stored in the kdtree
+    threshold   : float
+                  distance band
+    p           : float
+                  Minkowski p-norm distance metric parameter, ignored for
+                  arc distance trees
+    chunksize   : int
+                  number of points searched at once
+
+    Returns
+    -------
+    dmat        : csr_matrix
+                  (n,n) distances, with sorted indices
+    """
+    data = np.asarray(data)
+    n = data.shape[0]
+    arc = hasattr(kdtree, 'radius')
+    if chunksize is None:
+        if kdtree is None:
+            chunksize = max(1, CHUNK_ELEMENTS // max(n, 1))
         else:
-            weighted = self.dmat.power(self.alpha)
-            weighted[weighted==np.inf] = 0
-            weighted.eliminate_zeros()
-            tempW = WSP2W(WSP(weighted, id_order=ids), silence_warnings=self.silence_warnings)
-            neighbors = tempW.neighbors
-            weight_keys = list(tempW.weights.keys())
-            weight_vals = list(tempW.weights.values())
-            weights = dict(list(zip(weight_keys, list(map(list, weight_vals)))))
-            return neighbors, weights
-
-    def _spdistance_matrix(self, x,y, threshold=None):
-        dist = distance_matrix(x,y)
-        if threshold is not None:
-            zeros = dist > threshold
-            dist[zeros] = 0
-        return sp.csr_matrix(dist)
+            chunksize = CHUNK_POINTS
+    rows = []
+    cols = []
+    dists = []
+    for start in range(0, n, chunksize):
+        chunk = data[start:start + chunksize]
+        if kdtree is None:
+            d = distance_matrix(chunk, data, p=p)
+            i, j = np.nonzero((d <= threshold) & (d > 0))
+            d = d[i, j]
+            i = i + start
+        elif arc:
+            found = kdtree.query_ball_point(chunk, threshold)
+            counts = np.array([len(f) for f in found], dtype=int)
+            i = np.repeat(np.arange(start, start + chunk.shape[0]), counts)
+            if counts.sum():
+                j = np.concatenate([np.asarray(f, dtype=int)
+                                    for f in found])
+            else:
+                j = np.zeros(0, dtype=int)
+            d = _minkowski(data[i], data[j])
+            # chord lengths on the unit sphere to arc distances
+            d = kdtree.radius * np.arccos(np.clip((2 - d ** 2) / 2.,
+                                                  -1, 1))
+            keep = d > 0
+            i, j, d = i[keep], j[keep], d[keep]
+        else:
+            # the tree computes the distances, as for the whole matrix
+            block = type(kdtree)(chunk).sparse_distance_matrix(
+                kdtree, max_distance=threshold, p=p).tocoo()
+            i, j, d = block.row + start, block.col, block.data
+            keep = d > 0
+            i, j, d = i[keep], j[keep], d[keep]
+        rows.append(i)
+        cols.append(j)
+        dists.append(d)
+    if n:
+        rows = np.concatenate(rows)
+        cols = np.concatenate(cols)
+        dists = np.concatenate(dists)
+    dmat = sp.csr_matrix((dists, (rows, cols)), shape=(n, n))
+    dmat.sort_indices()
+    return dmat
+
+
+def _band_weights(dmat, binary=True, alpha=-1.0):
+    """
+    Turn a sparse distance band matrix into weights.
+
+    Parameters
+    ----------
+    dmat        : csr_matrix
+                  distances between neighbors
+    binary      : boolean
+                  If true all weights are set to one, otherwise to the
+                  distance raised to alpha
+    alpha       : float
+                  distance decay parameter
+
+    Returns
+    -------
+    dmat with its data replaced by the weights (binary) or a new matrix of
+    weights
+    """
+    if binary:
+        dmat.data[:] = 1
+    else:
+        dmat = dmat.power(alpha)
+        dmat.data[dmat.data == np.inf] = 0
+        dmat.eliminate_zeros()
+    return dmat
+
+
+def _band_wsp(data, threshold, p=2, alpha=-1.0, binary=True, ids=None,
+              build_sp=True, silence_warnings=False,
+              distance_metric='euclidean', radius=None, chunksize=None):
+    """
+    WSP for a distance band, built without neighbor or weight dictionaries.
+    Takes the same arguments as DistanceBand.
+    """
+    if radius is not None:
+        distance_metric = 'arc'
+    kdtree, data = _band_tree(data, build_sp, distance_metric, radius)
+    dmat = _band_distances(kdtree, data, threshold, p=p, chunksize=chunksize)
+    dmat = _band_weights(dmat, binary, alpha)
+    if ids is None:
+        ids = range(dmat.shape[0])
+    return WSP(dmat, id_order=list(ids))
+
 
 def _test():
     import doctest
@@ -73,6 +73,46 @@ class Contiguity_Mixin(object):
         w = self.cls.from_shapefile(self.polygon_path, idVariable=self.idVariable)
         self.assertEqual(w[self.known_name], self.known_namedw)
 
+    def test_engine_arrays(self):
+        w = self.cls(self.polygons)
+        wa = self.cls(self.polygons, engine='arrays')
+        self.assertEqual(wa[self.known_wi], self.known_w)
+        for i in w.id_order:
+            self.assertEqual(set(w.neighbors[i]), set(wa.neighbors[i]))
+
+        # sparse, built straight from the adjacency
+        ws = self.cls.from_shapefile(self.polygon_path, sparse=True,
+                                     engine='arrays')
+        np.testing.assert_array_equal(ws.sparse.toarray(),
+                                      w.sparse.toarray())
+        ws = self.cls.from_iterable(self.polygons, sparse=True,
+                                    engine='arrays')
+        np.testing.assert_array_equal(ws.sparse.toarray(),
+                                      w.sparse.toarray())
+
+        # named
+        w = self.cls.from_shapefile(self.polygon_path, engine='arrays',
+                                    idVariable=self.idVariable)
+        self.assertEqual(w[self.known_name], self.known_namedw)
+
+        self.assertRaises(ValueError, self.cls, self.polygons, engine='foo')
+
+    def test_from_shapefile_tiles(self):
+        w = self.cls.from_shapefile(self.polygon_path)
+        for tiles in (1, 3, (5, 2)):
+            ws = self.cls.from_shapefile(self.polygon_path, tiles=tiles)
+            self.assertEqual(ws.id_order, w.id_order)
+            np.testing.assert_array_equal(ws.sparse.toarray(),
+                                          w.sparse.toarray())
+
+        # named
+        w = self.cls.from_shapefile(self.polygon_path, tiles=2,
+                                    idVariable=self.idVariable).to_W()
+        self.assertEqual(w[self.known_name], self.known_namedw)
+
+        self.assertRaises(ValueError, self.cls.from_shapefile,
+                          self.polygon_path, tiles=0)
+
     def test_from_array(self):
         # test named, sparse from point array
         pass 
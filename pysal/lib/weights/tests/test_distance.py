@@ -193,6 +193,27 @@ class Test_DistanceBand(ut.TestCase, Distance_Mixin):
 
         for k in w_db.id_order:
             np.testing.assert_equal(w_db[k], w_rook[k])
+
+    def test_sparse(self):
+        wsp = d.DistanceBand.from_array(self.grid_points, 1, sparse=True)
+        np.testing.assert_array_equal(wsp.sparse.toarray(),
+                                      self.grid_rook_w.sparse.toarray())
+        self.assertEqual(wsp.id_order, self.grid_rook_w.id_order)
+
+        w = d.DistanceBand(self.grid_points, 1.5, binary=False, alpha=-2.)
+        wsp = d.DistanceBand.from_array(self.grid_points, 1.5, binary=False,
+                                        alpha=-2., sparse=True)
+        np.testing.assert_allclose(wsp.sparse.toarray(),
+                                   w.sparse.toarray())
+
+    def test_chunksize(self):
+        w = d.DistanceBand(self.grid_points, 1.5, binary=False)
+        for build_sp in (True, False):
+            wc = d.DistanceBand(self.grid_points, 1.5, binary=False,
+                                build_sp=build_sp, chunksize=7)
+            self.assertEqual(dict(wc), dict(w))
+            np.testing.assert_allclose(wc.sparse.toarray(),
+                                       w.sparse.toarray())
     
     @ut.skipIf(PANDAS_EXTINCT, 'Missing pandas')
     def test_named(self):
@@ -282,12 +303,16 @@ class Test_Kernel(ut.TestCase, Distance_Mixin):
         for k,v in list(w[self.known_wi1].items()):
             np.testing.assert_allclose((k,v), (k, self.known_w1[k]))
         np.testing.assert_allclose(np.ones((w.n,1))*15, w.bandwidth)
+        for i in w.id_order:
+            self.assertEqual(list(w.neighbors[i]), sorted(w.neighbors[i]))
 
         w = d.Kernel(self.points, bandwidth=self.known_w2_bws)
         for k,v in list(w[self.known_wi2].items()):
             np.testing.assert_allclose((k,v), (k, self.known_w2[k]), rtol=RTOL)
         for i in range(w.n):
             np.testing.assert_allclose(w.bandwidth[i], self.known_w2_bws[i], rtol=RTOL)
+        for i in w.id_order:
+            self.assertEqual(list(w.neighbors[i]), sorted(w.neighbors[i]))
     
     def test_adaptive_bandwidth(self):
         w = d.Kernel(self.points, fixed=False)
@@ -306,6 +331,19 @@ class Test_Kernel(ut.TestCase, Distance_Mixin):
         w = d.Kernel(self.points, fixed=True, distance_metric='Arc', 
                      radius=cg.sphere.RADIUS_EARTH_KM)
         self.assertEqual(w.data.shape[1], 3)
+        # arc distances to the kernel neighbors match kdtree queries
+        for i, nids in enumerate(w.neigh):
+            di, ni = w.kdtree.query(w.data[i], k=len(nids))
+            di = dict(zip(np.atleast_1d(ni), np.atleast_1d(di)))
+            z = np.array([di[j] for j in nids]) / w.bandwidth[i]
+            np.testing.assert_allclose(w.kernel[i], 1 - z, rtol=RTOL)
+
+    def test_diagonal(self):
+        w = d.Kernel(self.points, function='gaussian', diagonal=True)
+        for i in w.id_order:
+            self.assertEqual(w[i][i], 1.0)
+        # the kernel values themselves are left untouched
+        np.testing.assert_allclose(w.kernel[0][0], (2 * np.pi) ** -0.5)
 
 knn = ut.TestLoader().loadTestsFromTestCase(Test_KNN)
 kern = ut.TestLoader().loadTestsFromTestCase(Test_Kernel)
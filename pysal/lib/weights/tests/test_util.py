@@ -124,6 +124,28 @@ class Testutil(unittest.TestCase):
         self.assertEqual(w5_shimbel024, w5_shimbel[0][24])
         w5_shimbel004 = [-1, 1, 2, 3]
         self.assertEqual(w5_shimbel004, w5_shimbel[0][0:4])
+        # unreachable pairs are left at zero
+        w = W({'a': ['b'], 'b': ['a', 'c'], 'c': ['b'], 'd': ['e'],
+               'e': ['d']}, silence_warnings=True)
+        self.assertEqual(util.shimbel(w)['a'], [-1, 1, 2, 0, 0])
+
+    def test_order_sp(self):
+        w5 = lat2W()
+        o = util.order_sp(w5, kmax=3)
+        self.assertEqual(o[0, 1], 1)
+        self.assertEqual(o[0, 6], 2)
+        self.assertEqual(o[0, 15], 3)
+        self.assertEqual(o[0, 24], 0)
+        self.assertEqual(o.diagonal().sum(), 0)
+        # orders are symmetric and never beyond kmax
+        self.assertEqual((o != o.T).nnz, 0)
+        self.assertEqual(o.data.max(), 3)
+        o = util.order_sp(w5.sparse, kmax=None)
+        shimbel = util.shimbel(w5)
+        for i in range(w5.n):
+            row = o[i].toarray().flatten()
+            row[i] = -1
+            self.assertEqual(row.tolist(), shimbel[i])
 
     def test_full(self):
         neighbors = {'first': ['second'], 'second': ['first',
@@ -1,5 +1,5 @@
 import unittest
-from ..weights import W, WSP
+from ..weights import W, WSP, CSRW
 from .. import util
 from ..util import WSP2W, lat2W
 from ..contiguity import Rook
@@ -210,6 +210,29 @@ class TestW(unittest.TestCase):
         w.transform = 'r'
         self.assertEqual(w.weights[0], [0.5, 0.5])
 
+    def test_set_transform_lazy(self):
+        w = W(self.neighbors, {k: [2. * (i + 1) for i in range(len(v))]
+                               for k, v in self.neighbors.items()})
+        original, ids = w.full()
+        w.transform = 'r'
+        # the sparse form does not require the weights dictionary
+        NPTA3E(w.sparse.toarray(),
+               original / original.sum(1).reshape(-1, 1))
+        self.assertEqual(w.weights[4], [0.1, 0.2, 0.3, 0.4])
+        w.transform = 'd'
+        NPTA3E(w.sparse.toarray(), original / original.sum())
+        w.transform = 'b'
+        NPTA3E(w.sparse.toarray(), (original > 0) * 1.)
+        w.transform = 'v'
+        q = np.sqrt((original ** 2).sum(1)).reshape(-1, 1)
+        v = original / q
+        NPTA3E(w.sparse.toarray(), v * w.n / v.sum())
+        NPTA3E(w.weights[0], v[0, [3, 1]] * w.n / v.sum())
+        w.transform = 'o'
+        NPTA3E(w.sparse.toarray(), original)
+        self.assertEqual(w.weights[0], [2., 4.])
+        self.assertRaises(Exception, w.set_transform, 'x')
+
     def test_shimbel(self):
         d = {0: [-1, 1, 2, 1, 2, 3, 2, 3, 4],
              1: [1, -1, 1, 2, 1, 2, 3, 2, 3],
@@ -234,6 +257,20 @@ class TestW(unittest.TestCase):
     def test_trcWtW_WW(self):
         self.assertEqual(self.w3x3.trcWtW_WW, 48.)
 
+    def test_moments(self):
+        self.w3x3.transform = 'r'
+        W = self.w3x3.full()[0]
+        m = self.w3x3.moments
+        self.assertAlmostEqual(m['trcW'], 0.)
+        for k in range(2, 5):
+            self.assertAlmostEqual(m['trcW%d' % k],
+                                   np.trace(np.linalg.matrix_power(W, k)))
+        self.assertAlmostEqual(m['trcWtW'], np.trace(np.dot(W.T, W)))
+        self.assertAlmostEqual(m['trcWtW_WW'], self.w3x3.diagWtW_WW.sum())
+        self.assertAlmostEqual(WSP(self.w3x3.sparse).trcWtW_WW, m['trcWtW_WW'])
+        self.w3x3.transform = 'b'
+        self.assertEqual(self.w3x3.moments['trcWtW'], 24.)
+
     def test_symmetrize(self):
         symm = self.w.symmetrize() 
         np.testing.assert_allclose(symm.sparse.toarray(), self.w.sparse.toarray())
@@ -493,5 +530,86 @@ class TestWSP(unittest.TestCase):
         self.assertEqual(self.w3x3.s0, 24.0)
 
 
+class TestCSRW(unittest.TestCase):
+    def setUp(self):
+        self.w = psopen(examples.get_path("sids2.gal")).read()
+        self.csrw = CSRW.from_W(self.w)
+
+    def test_CSRW(self):
+        self.assertEqual(self.w.id_order, self.csrw.id_order)
+        self.assertEqual(self.w.n, self.csrw.n)
+        self.assertEqual(self.w.s0, self.csrw.s0)
+        self.assertEqual(self.w.cardinalities, self.csrw.cardinalities)
+        self.assertEqual(self.w.islands, self.csrw.islands)
+        self.assertNotIn('neighbors', self.csrw._cache)
+        # CSR stores each row's neighbors ordered by offset
+        for i in self.w.id_order:
+            self.assertEqual(set(self.w.neighbors[i]),
+                             set(self.csrw.neighbors[i]))
+            self.assertEqual(sorted(self.w.neighbor_offsets[i]),
+                             self.csrw.neighbor_offsets[i])
+        i = self.w.id_order[5]
+        self.assertEqual(self.w[i], self.csrw[i])
+        self.assertEqual(list(self.w), list(self.csrw))
+
+    def test_transform(self):
+        for value in ('R', 'D', 'V', 'B', 'O'):
+            self.w.transform = value
+            self.csrw.transform = value
+            NPTA3E(self.w.sparse.toarray(), self.csrw.sparse.toarray())
+            self.assertEqual(dict(self.w), dict(self.csrw))
+            self.assertAlmostEqual(self.w.trcW2, self.csrw.trcW2)
+        self.assertRaises(Exception, self.csrw.set_transform, 'X')
+
+    def test_transformations(self):
+        original = self.w.transformations['O']
+        self.csrw.set_transform('r')
+        self.w.set_transform('r')
+        # W records a transformation once its weights are built
+        self.w.weights
+        self.assertEqual(dict(self.w), dict(self.csrw))
+        self.csrw.set_transform('o')
+        self.w.set_transform('o')
+        self.assertEqual(self.csrw.transform, 'O')
+        self.assertEqual(dict(self.w), dict(self.csrw))
+        self.assertEqual(set(self.csrw.transformations), {'O', 'R'})
+        for i in self.w.id_order:
+            wo = dict(zip(self.w.neighbors[i], original[i]))
+            co = dict(zip(self.csrw.neighbors[i],
+                          self.csrw.transformations['O'][i]))
+            self.assertEqual(wo, co)
+            wr = dict(zip(self.w.neighbors[i], self.w.transformations['R'][i]))
+            cr = dict(zip(self.csrw.neighbors[i],
+                          self.csrw.transformations['R'][i]))
+            self.assertEqual(wr.keys(), cr.keys())
+            for j in wr:
+                self.assertAlmostEqual(wr[j], cr[j])
+
+    def test_from_WSP(self):
+        wsp = WSP(self.w.sparse, self.w.id_order)
+        csrw = CSRW.from_WSP(wsp)
+        np.testing.assert_array_equal(wsp.sparse.toarray(),
+                                      csrw.sparse.toarray())
+        self.assertEqual(csrw.id_order, wsp.id_order)
+        w = csrw.to_W()
+        self.assertEqual(dict(w), dict(self.w))
+
+    def test_id_order(self):
+        ids = self.csrw.id_order[::-1]
+        self.csrw.id_order = ids
+        self.w.id_order = ids
+        self.assertEqual(self.csrw.id_order, ids)
+        NPTA3E(self.w.full()[0], self.csrw.full()[0])
+        self.assertEqual(dict(self.w), dict(self.csrw))
+
+    def test_symmetrize(self):
+        w = KNN.from_array(np.random.RandomState(0).random_sample((30, 2)),
+                           k=3)
+        csrw = CSRW.from_W(w)
+        NPTA3E(w.symmetrize().full()[0], csrw.symmetrize().full()[0])
+        csrw.symmetrize(inplace=True)
+        self.assertEqual(csrw.asymmetries, [])
+
+
 if __name__ == '__main__':
     unittest.main()
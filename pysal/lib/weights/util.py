@@ -22,7 +22,7 @@ __all__ = ['lat2W', 'block_weights', 'comb', 'order', 'higher_order',
            'shimbel', 'remap_ids', 'full2W', 'full', 'WSP2W',
            'insert_diagonal', 'get_ids', 'get_points_array_from_shapefile',
            'min_threshold_distance', 'lat2SW', 'w_local_cluster',
-           'higher_order_sp', 'hexLat2W', 'attach_islands',
+           'higher_order_sp', 'order_sp', 'hexLat2W', 'attach_islands',
            'nonplanar_neighbors', 'fuzzy_contiguity']
 
 
@@ -356,28 +356,97 @@ def order(w, kmax=3):
 
     """
 
+    return _orders_to_lists(w, order_sp(w, kmax=kmax))
+
+
+def _binary_csr(w):
+    """
+    Binary adjacency of a W or sparse matrix, as a csr_matrix, and the ids
+    of its rows (None for a sparse matrix).
+    """
+    if issubclass(type(w), W) or isinstance(w, W):
+        return (w.sparse != 0).astype(int).tocsr(), w.id_order
+    elif scipy.sparse.issparse(w):
+        return (w != 0).astype(int).tocsr(), None
+    raise TypeError("Weights provided are neither a W object nor "
+                    "a scipy.sparse matrix")
+
+
+def order_sp(w, kmax=3):
+    """
+    Sparse matrix of the orders of contiguity up to a specific order.
+
+    Neighbors of increasing order are found by a breadth first search run
+    for all observations at once: the frontier of order k is the product of
+    the frontier of order k-1 with the adjacency matrix, minus all pairs
+    already reached. Memory is bounded by the number of pairs within kmax
+    orders of each other, rather than n**2.
+
+    Parameters
+    ----------
+
+    w       : W
+              spatial weights object, or scipy.sparse matrix
+    kmax    : int
+              maximum order of contiguity. If None, orders are computed
+              until all reachable pairs are found, as in the Shimbel matrix.
+
+    Returns
+    -------
+
+    orders  : csr_matrix
+              (n, n) matrix where element i,j is the order of contiguity
+              (length of the shortest path) between i and j. Pairs farther
+              than kmax apart, or not connected, and the diagonal are not
+              stored.
+
+    Examples
+    --------
+    >>> from pysal.lib.weights import lat2W
+    >>> w5 = lat2W()
+    >>> o = order_sp(w5, kmax=3)
+    >>> o[0, :4].toarray()
+    array([[0, 1, 2, 3]])
+    >>> o[0, 24]
+    0
+    >>> order_sp(w5, kmax=None)[0, 24]
+    8
+    """
+    adjacency, ids = _binary_csr(w)
+    n = adjacency.shape[0]
+    adjacency = adjacency - scipy.sparse.diags(adjacency.diagonal())
+    adjacency.eliminate_zeros()
+    reached = (adjacency + scipy.sparse.identity(n, dtype=int, format='csr'))
+    orders = adjacency.copy()
+    frontier = adjacency
+    k = 1
+    while frontier.nnz and (kmax is None or k < kmax):
+        k += 1
+        frontier = (frontier * adjacency).astype(bool).astype(int)
+        frontier = frontier - frontier.multiply(reached)
+        frontier.eliminate_zeros()
+        reached = reached + frontier
+        orders = orders + k * frontier
+    orders = orders.tocsr().astype(int)
+    orders.sort_indices()
+    return orders
+
+
+def _orders_to_lists(w, orders):
+    """
+    Dictionary of dense order lists, keyed by id, from an order matrix, as
+    returned by order and shimbel.
+    """
     ids = w.id_order
+    indptr = orders.indptr
+    indices = orders.indices
+    data = orders.data
     info = {}
-    for id_ in ids:
-        s = [0] * w.n
-        s[ids.index(id_)] = -1
-        for j in w.neighbors[id_]:
-            s[ids.index(j)] = 1
-        k = 1
-        while k < kmax:
-            knext = k + 1
-            if s.count(k):
-                # get neighbors of order k
-                js = [ids[j] for j, val in enumerate(s) if val == k]
-                # get first order neighbors for order k neighbors
-                for j in js:
-                    next_neighbors = w.neighbors[j]
-                    for neighbor in next_neighbors:
-                        nid = ids.index(neighbor)
-                        if s[nid] == 0:
-                            s[nid] = knext
-            k = knext
-        info[id_] = s
+    for i, id_ in enumerate(ids):
+        s = np.zeros(orders.shape[0], dtype=int)
+        s[indices[indptr[i]:indptr[i + 1]]] = data[indptr[i]:indptr[i + 1]]
+        s[i] = -1
+        info[id_] = s.tolist()
     return info
 
 
@@ -481,49 +550,52 @@ def higher_order_sp(w, k=2, shortest_path=True, diagonal=False):
     """
     id_order = None
     if issubclass(type(w), W) or isinstance(w, W):
-        if np.unique(np.hstack(list(w.weights.values()))) == np.array([1.0]):
-            id_order = w.id_order
-            w = w.sparse
-        else:
+        if not (w.sparse.data == 1.0).all():
             raise ValueError('Weights are not binary (0,1)')
+        id_order = w.id_order
+        w = w.sparse.tocsr()
     elif scipy.sparse.isspmatrix_csr(w):
-        if not np.unique(w.data) == np.array([1.0]):
+        if not (w.data == 1.0).all():
             raise ValueError('Sparse weights matrix is not binary (0,1) weights matrix.')
     else:
         raise TypeError("Weights provided are neither a binary W object nor "
                         "a scipy.sparse.csr_matrix")
 
-    wk = w**k
-    rk, ck = wk.nonzero()
-    sk = set(zip(rk, ck))
-
+    n = w.shape[0]
     if shortest_path:
+        wk = (order_sp(w, kmax=k) == k).astype(int)
+        if diagonal:
+            # i,i is a k-order join if there is a closed walk of length k
+            # from i but none shorter: a self join for k=1, any neighbor
+            # for k=2, and never for longer walks
+            loops = w.diagonal() != 0
+            if k == 1:
+                keep = loops
+            elif k == 2:
+                keep = (np.diff(w.indptr) > 0) & ~loops
+            else:
+                keep = np.zeros(n, dtype=bool)
+            wk = wk + scipy.sparse.diags(keep.astype(int))
+    else:
+        wk = w.astype(bool).astype(int)
         for j in range(1, k):
-            wj = w**j
-            rj, cj = wj.nonzero()
-            sj = set(zip(rj, cj))
-            sk.difference_update(sj)
-
-    if not diagonal:
-        sk = set([(i,j) for i,j in sk if i!=j])
+            wk = (wk * w).astype(bool).astype(int)
+        if not diagonal:
+            wk = wk - scipy.sparse.diags(wk.diagonal())
+    wk = wk.tocsr()
+    wk.eliminate_zeros()
+    wk.sort_indices()
+    wk.data = np.ones(wk.nnz)
 
     if id_order:
-        d = dict([(i,[]) for i in id_order])
-        for pair in sk:
-            k, v = pair
-            k = id_order[k]
-            v = id_order[v]
-            d[k].append(v)
-        return W(neighbors=d)
-    else:
+        indptr = wk.indptr
+        indices = wk.indices.tolist()
         d = {}
-        for pair in sk:
-            k, v = pair
-            if k in d:
-                d[k].append(v)
-            else:
-                d[k] = [v]
-        return WSP(W(neighbors=d).sparse)
+        for i, id_i in enumerate(id_order):
+            d[id_i] = [id_order[j] for j in indices[indptr[i]:indptr[i + 1]]]
+        return W(neighbors=d, id_order=id_order)
+    else:
+        return WSP(wk)
 
 
 def w_local_cluster(w):
@@ -614,30 +686,7 @@ def shimbel(w):
     >>>
     """
 
-    info = {}
-    ids = w.id_order
-    for i in ids:
-        s = [0] * w.n
-        s[ids.index(i)] = -1
-        for j in w.neighbors[i]:
-            s[ids.index(j)] = 1
-        k = 1
-        flag = s.count(0)
-        while flag:
-            p = -1
-            knext = k + 1
-            for j in range(s.count(k)):
-                neighbor = s.index(k, p + 1)
-                p = neighbor
-                next_neighbors = w.neighbors[ids[p]]
-                for neighbor in next_neighbors:
-                    nid = ids.index(neighbor)
-                    if s[nid] == 0:
-                        s[nid] = knext
-            k = knext
-            flag = s.count(0)
-        info[i] = s
-    return info
+    return _orders_to_lists(w, order_sp(w, kmax=None))
 
 
 def full(w):
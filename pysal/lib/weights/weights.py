@@ -16,7 +16,7 @@ from scipy.sparse.csgraph import connected_components
 from . import adjtools
 from ..io.fileio import FileIO as popen
 
-__all__ = ['W', 'WSP']
+__all__ = ['W', 'WSP', 'CSRW']
 
 class W(object):
     """
@@ -68,6 +68,7 @@ class W(object):
     max_neighbors
     mean_neighbors
     min_neighbors
+    moments
     n
     n_components
     neighbor_offsets
@@ -175,6 +176,76 @@ class W(object):
         """
         self._cache = {}
 
+    @property
+    def weights(self):
+        """Dictionary where the key is an ID and the value is the list of
+        weights for that ID's neighbors, under the current transformation.
+
+        Transformed weights are computed on arrays and the dictionary view
+        is only built the first time it is accessed.
+
+        """
+        if self._weights is None:
+            value = self._transform
+            if value not in self.transformations:
+                row, col, original = self._links()
+                data = self._transform_data(value, row, original)
+                offsets = np.zeros(self.n + 1, dtype=int)
+                offsets[1:] = np.cumsum(np.bincount(row, minlength=self.n))
+                id2i = self.id2i
+                weights = {}
+                for i in self.transformations['O']:
+                    pos = id2i[i]
+                    weights[i] = data[offsets[pos]:offsets[pos + 1]].tolist()
+                self.transformations[value] = weights
+            self._weights = self.transformations[value]
+        return self._weights
+
+    @weights.setter
+    def weights(self, value):
+        self._weights = value
+
+    def _links(self):
+        """Arrays of row offsets, column offsets and original weights for
+        every link, ordered by id_order and then by each neighbor list.
+
+        """
+        if 'links' not in self._cache:
+            id2i = self.id2i
+            original = self.transformations['O']
+            ids = self._id_order
+            cards = [len(self.neighbors[i]) for i in ids]
+            row = np.repeat(np.arange(len(ids)), cards)
+            col = np.array([id2i[j] for i in ids for j in self.neighbors[i]],
+                           dtype=int)
+            data = np.array([wij for i in ids for wij in original[i]])
+            self._cache['links'] = (row, col, data)
+        return self._cache['links']
+
+    def _transform_data(self, value, row, data):
+        """Apply transformation value to the original link weights data,
+        where row holds the row offset of each link.
+
+        """
+        if value == "O":
+            return data
+        data = np.asarray(data, dtype=float)
+        if value == "B":
+            return np.ones_like(data)
+        elif value == "R":
+            row_sum = np.bincount(row, weights=data, minlength=self.n)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return data / row_sum[row]
+        elif value == "D":
+            return data / data.sum()
+        elif value == "V":
+            q = np.sqrt(np.bincount(row, weights=data * data,
+                                    minlength=self.n))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                s = data / q[row]
+            return s * (self.n / s.sum())
+        raise Exception('unsupported weights transformation')
+
     @classmethod
     def from_file(cls, path='', format=None, **kwargs):
         f = popen(dataPath=path, mode='r', dataFormat=format)
@@ -355,20 +426,17 @@ class W(object):
     def _build_sparse(self):
         """Construct the sparse attribute.
 
-        """
+        If the weights dictionary for the current transformation has not
+        been built, the transformation is applied directly to the array of
+        original link weights.
 
-        row = []
-        col = []
-        data = []
-        id2i = self.id2i
-        for i, neigh_list in list(self.neighbor_offsets.items()):
-            card = self.cardinalities[i]
-            row.extend([id2i[i]] * card)
-            col.extend(neigh_list)
-            data.extend(self.weights[i])
-        row = np.array(row)
-        col = np.array(col)
-        data = np.array(data)
+        """
+        row, col, original = self._links()
+        if self._weights is None:
+            data = self._transform_data(self._transform, row, original)
+        else:
+            data = np.array([wij for i in self._id_order
+                             for wij in self._weights[i]])
         s = scipy.sparse.csr_matrix((data, (row, col)), shape=(self.n, self.n))
         return s
 
@@ -456,6 +524,27 @@ class W(object):
             self._cache['s2'] = self._s2
         return self._s2
 
+    @property
+    def moments(self):
+        """Traces of powers and cross products of the weights matrix.
+
+        A dictionary with the traces of :math:`W`, :math:`WW`,
+        :math:`WWW`, :math:`WWWW`, :math:`W^{'}W` and :math:`W^{'}W + WW`,
+        keyed 'trcW', 'trcW2', 'trcW3', 'trcW4', 'trcWtW' and 'trcWtW_WW'.
+        They are computed once from the sparse matrix, without forming
+        :math:`W^{'}W`, and stored with the weights when written to a WBIN
+        file after they have been computed.
+
+        See Also
+        --------
+        trcW2, trcWtW, trcWtW_WW
+
+        """
+        if 'moments' not in self._cache:
+            self._moments = _moments(self.sparse)
+            self._cache['moments'] = self._moments
+        return self._cache['moments']
+
     @property
     def trcW2(self):
         """Trace of :math:`WW`.
@@ -465,10 +554,7 @@ class W(object):
         diagW2
 
         """
-        if 'trcW2' not in self._cache:
-            self._trcW2 = self.diagW2.sum()
-            self._cache['trcw2'] = self._trcW2
-        return self._trcW2
+        return self.moments['trcW2']
 
     @property
     def diagW2(self):
@@ -479,7 +565,7 @@ class W(object):
         trcW2
 
         """
-        if 'diagw2' not in self._cache:
+        if 'diagW2' not in self._cache:
             self._diagW2 = (self.sparse * self.sparse).diagonal()
             self._cache['diagW2'] = self._diagW2
         return self._diagW2
@@ -507,10 +593,7 @@ class W(object):
         diagWtW
 
         """
-        if 'trcWtW' not in self._cache:
-            self._trcWtW = self.diagWtW.sum()
-            self._cache['trcWtW'] = self._trcWtW
-        return self._trcWtW
+        return self.moments['trcWtW']
 
     @property
     def diagWtW_WW(self):
@@ -529,10 +612,7 @@ class W(object):
         """Trace of :math:`W^{'}W + WW`.
 
         """
-        if 'trcWtW_WW' not in self._cache:
-            self._trcWtW_WW = self.diagWtW_WW.sum()
-            self._cache['trcWtW_WW'] = self._trcWtW_WW
-        return self._trcWtW_WW
+        return self.moments['trcWtW_WW']
 
     @property
     def pct_nonzero(self):
@@ -937,80 +1017,24 @@ class W(object):
         >>>
         """
         value = value.upper()
+        if value not in ("B", "R", "D", "V", "O"):
+            raise Exception('unsupported weights transformation')
         self._transform = value
-        if value in self.transformations:
-            self.weights = self.transformations[value]
-            self._reset()
-        else:
-            if value == "R":
-                # row standardized weights
-                weights = {}
-                self.weights = self.transformations['O']
-                for i in self.weights:
-                    wijs = self.weights[i]
-                    row_sum = sum(wijs) * 1.0
-                    if row_sum == 0.0:
-                        if not self.silent_island_warning:
-                            print(('WARNING: ', i, ' is an island (no neighbors)'))
-                    weights[i] = [wij / row_sum for wij in wijs]
-                weights = weights
-                self.transformations[value] = weights
-                self.weights = weights
-                self._reset()
-            elif value == "D":
-                # doubly-standardized weights
-                # update current chars before doing global sum
-                self._reset()
-                s0 = self.s0
-                ws = 1.0 / s0
-                weights = {}
-                self.weights = self.transformations['O']
-                for i in self.weights:
-                    wijs = self.weights[i]
-                    weights[i] = [wij * ws for wij in wijs]
-                weights = weights
-                self.transformations[value] = weights
-                self.weights = weights
-                self._reset()
-            elif value == "B":
-                # binary transformation
-                weights = {}
-                self.weights = self.transformations['O']
-                for i in self.weights:
-                    wijs = self.weights[i]
-                    weights[i] = [1.0 for wij in wijs]
-                weights = weights
-                self.transformations[value] = weights
-                self.weights = weights
-                self._reset()
-            elif value == "V":
-                # variance stabilizing
-                weights = {}
-                q = {}
-                k = self.cardinalities
-                s = {}
-                Q = 0.0
-                self.weights = self.transformations['O']
-                for i in self.weights:
-                    wijs = self.weights[i]
-                    q[i] = math.sqrt(sum([wij * wij for wij in wijs]))
-                    s[i] = [wij / q[i] for wij in wijs]
-                    Q += sum([si for si in s[i]])
-                nQ = self.n / Q
-                for i in self.weights:
-                    weights[i] = [w * nQ for w in s[i]]
-                weights = weights
-                self.transformations[value] = weights
-                self.weights = weights
-                self._reset()
-            elif value == "O":
-                # put weights back to original transformation
-                weights = {}
-                original = self.transformations[value]
-                self.weights = original
-                self._reset()
-            else:
-                raise Exception('unsupported weights transformation')
+        self._weights = None
+        # the original link arrays do not depend on the transformation
+        links = getattr(self, '_cache', {}).get('links')
+        self._reset()
+        if links is not None:
+            self._cache['links'] = links
+        if value == "R" and not self.silent_island_warning:
+            if not getattr(self, '_island_warned', False):
+                row, col, original = self._links()
+                row_sum = np.bincount(row, weights=original,
+                                      minlength=self.n)
+                for i in self._id_order:
+                    if row_sum[self.id2i[i]] == 0.0:
+                        print(('WARNING: ', i, ' is an island (no neighbors)'))
+                self._island_warned = True
 
     transform = property(get_transform, set_transform)
 
@@ -1291,6 +1315,28 @@ class W(object):
         return f,ax
 
 
+def _moments(sparse, powers=True):
+    """Traces of W, WW, W'W and W'W + WW for a sparse W, and of WWW and
+    WWWW if powers is True.
+
+    tr(AB) is the sum of the elementwise product of A and B', so only WW
+    is formed, for the third and fourth powers.
+    """
+    s = scipy.sparse.csr_matrix(sparse)
+    st = s.transpose().tocsr()
+    trcW2 = float(s.multiply(st).sum())
+    trcWtW = float(s.multiply(s).sum())
+    moments = {'trcW': float(s.diagonal().sum()),
+               'trcW2': trcW2,
+               'trcWtW': trcWtW,
+               'trcWtW_WW': trcWtW + trcW2}
+    if powers:
+        s2 = s * s
+        moments['trcW3'] = float(s2.multiply(st).sum())
+        moments['trcW4'] = float(s2.multiply(s2.transpose()).sum())
+    return moments
+
+
 class WSP(object):
 
     """
@@ -1315,6 +1361,9 @@ class WSP(object):
                   description
     trcWtW_WW   : float
                   description
+    moments     : dictionary
+                  traces of powers and cross products of sparse, see
+                  W.moments
 
     Examples
     --------
@@ -1330,7 +1379,7 @@ class WSP(object):
     >>> w = WSP(sparse)
     >>> w.s0
     4.0
-    >>> w.trcWtW_WW
+    >>> round(w.trcWtW_WW, 3)
     6.395
     >>> w.n
     4
@@ -1366,15 +1415,23 @@ class WSP(object):
             self._cache['s0'] = self._s0
         return self._s0
 
+    @property
+    def moments(self):
+        """Traces of powers and cross products of the weights matrix, see
+        W.moments.
+
+        """
+        if 'moments' not in self._cache:
+            self._moments = _moments(self.sparse)
+            self._cache['moments'] = self._moments
+        return self._cache['moments']
+
     @property
     def trcWtW_WW(self):
         """Trace of :math:`W^{'}W + WW`.
 
         """
-        if 'trcWtW_WW' not in self._cache:
-            self._trcWtW_WW = self.diagWtW_WW.sum()
-            self._cache['trcWtW_WW'] = self._trcWtW_WW
-        return self._trcWtW_WW
+        return self.moments['trcWtW_WW']
 
     @property
     def diagWtW_WW(self):
@@ -1469,3 +1526,373 @@ class WSP(object):
         w._sparse = copy.deepcopy(self.sparse)
         w._cache['sparse'] = w._sparse
         return w
+
+
+class CSRW(W):
+    """
+    Spatial weights stored in compressed sparse row (CSR) form.
+
+    CSRW exposes the same interface as W, so it can be passed to
+    statistics and models expecting a W, but it stores only an array of
+    ids and the indptr, indices and data arrays of the weights matrix.
+    The neighbors and weights dictionaries, and other per-id views, are
+    built only when they are accessed.
+
+    Parameters
+    ----------
+    indptr            : array
+                        (n+1,) row pointers, the links of row i are stored
+                        in positions indptr[i]:indptr[i+1]
+    indices           : array
+                        (nnz,) column offsets of each link
+    data              : array
+                        (nnz,) original weight of each link. If None, all
+                        weights are set to 1.
+    ids               : sequence
+                        (n,) ids of the observations, in row order. If
+                        None, ids are range(n).
+    silence_warnings  : boolean
+                        By default pysal.lib will warn if the dataset
+                        contains any disconnected observations or
+                        components. To silence these warnings set this
+                        parameter to True.
+
+    Examples
+    --------
+    >>> from pysal.lib.weights import lat2W, CSRW
+    >>> w = CSRW.from_W(lat2W(3, 3))
+    >>> w.n
+    9
+    >>> w[0] == {1: 1.0, 3: 1.0}
+    True
+    >>> w.cardinalities[4]
+    4
+    >>> w.transform = 'r'
+    >>> w[0] == {1: 0.5, 3: 0.5}
+    True
+    >>> round(w.s0, 3)
+    9.0
+    >>> sorted(w.neighbors[4])
+    [1, 3, 5, 7]
+
+    """
+
+    def __init__(self, indptr, indices, data=None, ids=None,
+                 silence_warnings=False):
+        self.silent_island_warning = silence_warnings
+        self.silent_connected_components = silence_warnings
+        indptr = np.asarray(indptr)
+        self._n = indptr.shape[0] - 1
+        if data is None:
+            data = np.ones(len(indices))
+        self._indptr = indptr
+        self._indices = np.asarray(indices)
+        self._data = np.asarray(data)
+        if ids is None:
+            self._ids = np.arange(self._n)
+        else:
+            self._ids = np.asarray(ids)
+            if self._ids.shape[0] != self._n:
+                raise ValueError(
+                    "Number of ids must match the number of rows")
+        self._id_order_set = True
+        self._transform = 'O'
+        self._transformations = ['O']
+        self._reset()
+        if self.islands and not self.silent_island_warning:
+            ni = len(self.islands)
+            if ni == 1:
+                warnings.warn("There is one disconnected observation"
+                              " (no neighbors).\nIsland id: {}"
+                              .format(str(self.islands[0])),
+                              stacklevel=2)
+            else:
+                warnings.warn("There are %d disconnected observations" % ni + ' \n '
+                              " Island ids: %s" % ', '.join(str(island) for island in self.islands))
+        if self.n_components > 1 and not self.islands and not self.silent_connected_components:
+            warnings.warn("The weights matrix is not fully connected. There are %d components" % self.n_components)
+
+    @classmethod
+    def from_sparse(cls, sparse, ids=None, silence_warnings=False):
+        """
+        Construct a CSRW from a scipy sparse matrix.
+
+        Parameters
+        ----------
+        sparse           : sparse_matrix
+                           NxN object from scipy.sparse
+        ids              : sequence
+                           ids of the observations, in row order
+        silence_warnings : boolean
+                           switch to turn off island and component warnings
+
+        Returns
+        -------
+        a CSRW instance
+        """
+        if not scipy.sparse.issparse(sparse):
+            raise ValueError("must pass a scipy sparse object")
+        rows, cols = sparse.shape
+        if rows != cols:
+            raise ValueError("Weights object must be square")
+        sparse = sparse.tocsr()
+        return cls(sparse.indptr, sparse.indices, sparse.data, ids=ids,
+                   silence_warnings=silence_warnings)
+
+    @classmethod
+    def from_WSP(cls, WSP, silence_warnings=True):
+        """
+        Construct a CSRW from a WSP without building neighbor dictionaries.
+        """
+        return cls.from_sparse(WSP.sparse, ids=WSP.id_order,
+                               silence_warnings=silence_warnings)
+
+    @classmethod
+    def from_W(cls, w, silence_warnings=True):
+        """
+        Construct a CSRW holding the original (untransformed) weights of w.
+        """
+        transform = w.transform
+        w.transform = 'O'
+        out = cls.from_sparse(w.sparse, ids=w.id_order,
+                              silence_warnings=silence_warnings)
+        w.transform = transform
+        return out
+
+    def to_W(self, silence_warnings=True):
+        """
+        Generate a dictionary based W with the original weights.
+        """
+        neighbors, weights = {}, {}
+        ids = self._ids.tolist()
+        for i, id_i in enumerate(ids):
+            start, end = self._indptr[i], self._indptr[i + 1]
+            neighbors[id_i] = [ids[j] for j in self._indices[start:end]]
+            weights[id_i] = self._data[start:end].tolist()
+        return W(neighbors, weights, id_order=ids,
+                 silence_warnings=silence_warnings)
+
+    def _links(self):
+        """Arrays of row offsets, column offsets and original weights for
+        every link, in CSR order.
+
+        """
+        if 'links' not in self._cache:
+            row = np.repeat(np.arange(self._n), np.diff(self._indptr))
+            self._cache['links'] = (row, self._indices, self._data)
+        return self._cache['links']
+
+    def _row_data(self):
+        """Link weights under the current transformation, in CSR order."""
+        if self._transform == 'O':
+            return self._data
+        if 'row_data' not in self._cache:
+            row, col, data = self._links()
+            self._cache['row_data'] = self._transform_data(self._transform,
+                                                           row, data)
+        return self._cache['row_data']
+
+    def _build_sparse(self):
+        """Construct the sparse attribute from the CSR arrays.
+
+        """
+        return scipy.sparse.csr_matrix(
+            (self._row_data(), self._indices, self._indptr),
+            shape=(self._n, self._n))
+
+    def set_transform(self, value="B"):
+        """
+        Transformations of weights, see W.set_transform.
+        """
+        value = value.upper()
+        if value not in ("B", "R", "D", "V", "O"):
+            raise Exception('unsupported weights transformation')
+        links = self._cache.get('links')
+        self._transform = value
+        if value not in self._transformations:
+            self._transformations.append(value)
+        self._reset()
+        if links is not None:
+            self._cache['links'] = links
+
+    transform = property(W.get_transform, set_transform)
+
+    @property
+    def n(self):
+        """Number of units.
+
+        """
+        return self._n
+
+    def __get_id_order(self):
+        """Returns the ids for the observations in the order in which they
+        would be encountered if iterating over the weights.
+
+        """
+        if 'id_order' not in self._cache:
+            self._cache['id_order'] = self._ids.tolist()
+        return self._cache['id_order']
+
+    def __set_id_order(self, ordered_ids):
+        """
+        Set the iteration order in w by permuting the rows and columns of
+        the CSR arrays.
+
+        """
+        id2i = self.id2i
+        if len(ordered_ids) != self._n or set(id2i) != set(ordered_ids):
+            raise Exception('ordered_ids do not align with W ids')
+        perm = np.array([id2i[i] for i in ordered_ids])
+        original = scipy.sparse.csr_matrix(
+            (self._data, self._indices, self._indptr),
+            shape=(self._n, self._n))[perm][:, perm].tocsr()
+        self._indptr = original.indptr
+        self._indices = original.indices
+        self._data = original.data
+        self._ids = self._ids[perm]
+        self._reset()
+
+    id_order = property(__get_id_order, __set_id_order)
+
+    @property
+    def _id_order(self):
+        return self.id_order
+
+    @property
+    def neighbors(self):
+        """Dictionary where the key is an ID and the value is the list of
+        that ID's neighbors. Built on first access.
+
+        """
+        if 'neighbors' not in self._cache:
+            ids = self.id_order
+            indptr = self._indptr
+            indices = self._indices
+            self._cache['neighbors'] = {
+                id_i: [ids[j] for j in indices[indptr[i]:indptr[i + 1]]]
+                for i, id_i in enumerate(ids)}
+        return self._cache['neighbors']
+
+    @property
+    def weights(self):
+        """Dictionary where the key is an ID and the value is the list of
+        weights for that ID's neighbors, under the current transformation.
+        Built on first access.
+
+        """
+        if 'weights' not in self._cache:
+            data = self._row_data()
+            indptr = self._indptr
+            self._cache['weights'] = {
+                id_i: data[indptr[i]:indptr[i + 1]].tolist()
+                for i, id_i in enumerate(self.id_order)}
+        return self._cache['weights']
+
+    @property
+    def transformations(self):
+        """Dictionary where the key is a transformation applied to the
+        weights, 'O' for the original weights, and the value is the weights
+        dictionary under that transformation, as in W. Built on access.
+
+        """
+        if 'transformations' not in self._cache:
+            row, col, original = self._links()
+            indptr = self._indptr
+            ids = self.id_order
+            transformations = {}
+            for value in self._transformations:
+                if value == 'O':
+                    data = original
+                else:
+                    data = self._transform_data(value, row, original)
+                transformations[value] = {
+                    id_i: data[indptr[i]:indptr[i + 1]].tolist()
+                    for i, id_i in enumerate(ids)}
+            self._cache['transformations'] = transformations
+        return self._cache['transformations']
+
+    @property
+    def cardinalities(self):
+        """Number of neighbors for each observation.
+
+        """
+        if 'cardinalities' not in self._cache:
+            self._cache['cardinalities'] = dict(
+                zip(self.id_order, np.diff(self._indptr).tolist()))
+        return self._cache['cardinalities']
+
+    @property
+    def neighbor_offsets(self):
+        """
+        Given the current id_order, neighbor_offsets[id] is the offsets of
+        the id's neighbors in id_order.
+
+        """
+        if 'neighbors_0' not in self._cache:
+            indptr = self._indptr
+            indices = self._indices
+            self._cache['neighbors_0'] = {
+                id_i: indices[indptr[i]:indptr[i + 1]].tolist()
+                for i, id_i in enumerate(self.id_order)}
+        return self._cache['neighbors_0']
+
+    def __getitem__(self, key):
+        """Allow a dictionary like interaction with the weights class.
+
+        """
+        i = self.id2i[key]
+        start, end = self._indptr[i], self._indptr[i + 1]
+        ids = self._ids[self._indices[start:end]].tolist()
+        return dict(zip(ids, self._row_data()[start:end].tolist()))
+
+    def __iter__(self):
+        """
+        Support iteration over weights.
+
+        """
+        for id_i in self.id_order:
+            yield id_i, self[id_i]
+
+    def full(self):
+        """
+        Generate a full numpy array.
+
+        Returns
+        -------
+        (fullw, keys) : tuple
+                        first element being the full numpy array and second
+                        element keys being the ids associated with each row
+                        in the array.
+        """
+        return (self.sparse.toarray().astype(float), self.id_order)
+
+    def remap_ids(self, new_ids):
+        """
+        Replace the ids of the observations, aligned with w.id_order.
+        """
+        if len(new_ids) != self._n:
+            raise Exception("W.remap_ids: length of `old_ids` does not match \
+            that of new_ids")
+        if len(set(new_ids)) != len(new_ids):
+            raise Exception("W.remap_ids: list `new_ids` contains duplicates")
+        self._ids = np.asarray(new_ids)
+        self._reset()
+
+    def symmetrize(self, inplace=False):
+        """
+        Add the link j->i with weight w_ij wherever i->j is present but
+        j->i is not, using the current weights.
+        """
+        s = self.sparse
+        t = s.transpose().tocsr()
+        missing = t - t.multiply(s != 0)
+        sym = (s + missing).tocsr()
+        if not inplace:
+            return CSRW.from_sparse(sym, ids=self._ids,
+                                    silence_warnings=True)
+        self._indptr = sym.indptr
+        self._indices = sym.indices
+        self._data = sym.data
+        self._transform = 'O'
+        self._transformations = ['O']
+        self._reset()
@@ -1,5 +1,6 @@
 __version__ = "1.0.4"
 from .ols import *
+from .ols_batch import *
 from .diagnostics import *
 from .diagnostics_sp import *
 from .user_output import *
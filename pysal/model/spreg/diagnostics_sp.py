@@ -4,6 +4,7 @@ Spatial diagnostics module
 __author__ = "Luc Anselin luc.anselin@asu.edu, Daniel Arribas-Bel darribas@asu.edu"
 
 from .utils import spdot
+from .w_utils import w_moments
 #from scipy.stats.stats import chisqprob
 from scipy import stats
 #stats.chisqprob = lambda chisq, df: stats.chi2.sf(chisq, df)
@@ -495,8 +496,7 @@ class spDcache:
     @property
     def t(self):
         if 't' not in self._cache:
-            prod = (self.w.sparse.T + self.w.sparse) * self.w.sparse
-            self._cache['t'] = np.sum(prod.diagonal())
+            self._cache['t'] = w_moments(self.w)['trcWtW_WW']
         return self._cache['t']
 
     @property
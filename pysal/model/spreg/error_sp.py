@@ -13,6 +13,7 @@ from pysal.lib.weights.spatial_lag import lag_spatial
 from .utils import power_expansion, set_endog, iter_msg, sp_att
 from .utils import get_A1_hom, get_A2_hom, get_A1_het, optim_moments, get_spFilter, get_lags, _moments2eqs
 from .utils import spdot, RegressionPropsY, set_warn
+from .w_utils import w_moments
 from . import twosls as TSLS
 from . import user_output as USER
 from . import summary_output as SUMMARY
@@ -1030,8 +1031,7 @@ def _momentsGM_Error(w, u):
     uwwu = np.dot(u.T, wwu)
     wwu2 = np.dot(wwu.T, wwu)
     wuwwu = np.dot(wu.T, wwu)
-    wtw = wsparse.T * wsparse
-    trWtW = np.sum(wtw.diagonal())
+    trWtW = w_moments(w)['trcWtW']
     g = np.array([[u2[0][0], wu2[0][0], uwu[0][0]]]).T / n
     G = np.array(
         [[2 * uwu[0][0], -wu2[0][0], n], [2 * wuwwu[0][0], -wwu2[0][0], trWtW],
@@ -22,6 +22,7 @@ try:
 except ImportError:
     minimize_scalar_available = False
 from .sputils import spdot, spfill_diagonal, spinv
+from .ml_utils import logdet_engine, cached_logdet, check_logdet, vm_traces
 from pysal.lib import weights
 
 __all__ = ["ML_Error"]
@@ -46,11 +47,27 @@ class BaseML_Error(RegressionPropsY, RegressionPropsVM, REGI.Regimes_Frame):
                    if 'full', brute force calculation (full matrix expressions)
                    if 'ord', Ord eigenvalue calculation
                    if 'LU', LU decomposition for sparse matrices
+                   if 'cheb', Chebyshev approximation (Pace and LeSage 2004)
+                   if 'mc', Monte Carlo approximation (Barry and Pace 1999)
+                   if 'chol', sparse Cholesky, W similar to symmetric
     epsilon      : float
                    tolerance criterion in mimimize_scalar function and inverse_product
     regimes_att  : dictionary
                    Dictionary containing elements to be used in case of a regimes model,
                    i.e. 'x' before regimes, 'regimes' list and 'cols2regi'
+    logdet       : LogDetGrid or callable
+                   rho -> ln|I - rho W| computed for w, e.g. by
+                   ml_utils.cached_logdet, used instead of computing the
+                   log-Jacobian with method; if True, the grid cached for w
+                   and method (see ml_utils.cached_logdet)
+    trace_rtol   : float
+                   if given, the traces in the variance of lambda are
+                   estimated with ml_utils.vm_traces to this accuracy,
+                   without inverting I - lambda W; if None, exact traces
+    seed         : int
+                   seed for the random vectors of the 'cheb' and 'mc'
+                   log-Jacobian approximations; None uses numpy's global
+                   random state
 
 
     Attributes
@@ -79,6 +96,9 @@ class BaseML_Error(RegressionPropsY, RegressionPropsVM, REGI.Regimes_Frame):
                    log Jacobian method
                    if 'full': brute force (full matrix computations)
                    if 'ord' : Ord eigenvalue method
+                   if 'cheb': Chebyshev approximation (Pace and LeSage 2004)
+                   if 'mc'  : Monte Carlo approximation (Barry and Pace 1999)
+                   if 'chol': sparse Cholesky, W similar to symmetric
     epsilon      : float
                    tolerance criterion used in minimize_scalar function and inverse_product
     mean_y       : float
@@ -155,7 +175,8 @@ class BaseML_Error(RegressionPropsY, RegressionPropsVM, REGI.Regimes_Frame):
 
     """
 
-    def __init__(self, y, x, w, method='full', epsilon=0.0000001, regimes_att=None):
+    def __init__(self, y, x, w, method='full', epsilon=0.0000001, regimes_att=None,
+                 logdet=None, trace_rtol=None, seed=None):
         # set up main regression variables and spatial filters
         self.y = y
         if regimes_att:
@@ -174,7 +195,15 @@ class BaseML_Error(RegressionPropsY, RegressionPropsVM, REGI.Regimes_Frame):
 
         # call minimizer using concentrated log-likelihood to get lambda
         methodML = method.upper()
-        if methodML in ['FULL', 'LU', 'ORD']:
+        if logdet is True:
+            logdet = cached_logdet(w, methodML, seed=seed)
+        if logdet is not None:
+            check_logdet(logdet, w)
+            res = minimize_scalar(err_c_loglik_ld, 0.0, bounds=(-1.0, 1.0),
+                                  args=(self.n, self.y, ylag, self.x,
+                                        xlag, logdet), method='bounded',
+                                  tol=epsilon)
+        elif methodML in ['FULL', 'LU', 'ORD']:
             if methodML == 'FULL':  
                 W = w.full()[0]      # need dense here
                 res = minimize_scalar(err_c_loglik, 0.0, bounds=(-1.0, 1.0),
@@ -204,6 +233,12 @@ class BaseML_Error(RegressionPropsY, RegressionPropsVM, REGI.Regimes_Frame):
                     args=(self.n, self.y, ylag, self.x,
                           xlag, evals), method='bounded',
                     tol=epsilon)
+        elif methodML in ['CHEB', 'MC', 'CHOL']:
+            logdet = logdet_engine(w, methodML, seed=seed)
+            res = minimize_scalar(err_c_loglik_ld, 0.0, bounds=(-1.0, 1.0),
+                                  args=(self.n, self.y, ylag, self.x,
+                                        xlag, logdet), method='bounded',
+                                  tol=epsilon)
         else:
             raise Exception("{0} is an unsupported method".format(method))
 
@@ -240,17 +275,25 @@ class BaseML_Error(RegressionPropsY, RegressionPropsVM, REGI.Regimes_Frame):
 
         # variance-covariance matrix lambda, sigma
 
-        a = -self.lam * W
-        spfill_diagonal(a, 1.0)
-        ai = spinv(a)
-        wai = spdot(W, ai)
-        tr1 = wai.diagonal().sum()
-
-        wai2 = spdot(wai, wai)
-        tr2 = wai2.diagonal().sum()
-
-        waiTwai = spdot(wai.T, wai)
-        tr3 = waiTwai.diagonal().sum()
+        if trace_rtol is None:
+            if logdet is not None:
+                # W is only needed here when the log-Jacobian did not
+                # use it
+                W = w.full()[0] if methodML == 'FULL' else w.sparse
+            a = -self.lam * W
+            spfill_diagonal(a, 1.0)
+            ai = spinv(a)
+            wai = spdot(W, ai)
+            tr1 = wai.diagonal().sum()
+
+            wai2 = spdot(wai, wai)
+            tr2 = wai2.diagonal().sum()
+
+            waiTwai = spdot(wai.T, wai)
+            tr3 = waiTwai.diagonal().sum()
+        else:
+            tr1, tr2, tr3 = vm_traces(w.sparse, self.lam,
+                                      rtol=trace_rtol)
 
         v1 = np.vstack((tr2 + tr3,
                         tr1 / self.sig2))
@@ -299,6 +342,9 @@ class ML_Error(BaseML_Error):
                    if 'full', brute force calculation (full matrix expressions)
                    if 'ord', Ord eigenvalue method
                    if 'LU', LU sparse matrix decomposition
+                   if 'cheb', Chebyshev approximation (Pace and LeSage 2004)
+                   if 'mc', Monte Carlo approximation (Barry and Pace 1999)
+                   if 'chol', sparse Cholesky, W similar to symmetric
     epsilon      : float
                    tolerance criterion in mimimize_scalar function and inverse_product
     spat_diag    : boolean
@@ -314,6 +360,19 @@ class ML_Error(BaseML_Error):
                    Name of weights matrix for use in output
     name_ds      : string
                    Name of dataset for use in output
+    logdet       : LogDetGrid or callable
+                   rho -> ln|I - rho W| computed for w, e.g. by
+                   ml_utils.cached_logdet, used instead of computing the
+                   log-Jacobian with method; if True, the grid cached for w
+                   and method (see ml_utils.cached_logdet)
+    trace_rtol   : float
+                   if given, the traces in the variance of lambda are
+                   estimated with ml_utils.vm_traces to this accuracy,
+                   without inverting I - lambda W; if None, exact traces
+    seed         : int
+                   seed for the random vectors of the 'cheb' and 'mc'
+                   log-Jacobian approximations; None uses numpy's global
+                   random state
 
     Attributes
     ----------
@@ -340,6 +399,9 @@ class ML_Error(BaseML_Error):
     method       : string
                    log Jacobian method
                    if 'full': brute force (full matrix computations)
+                   if 'cheb': Chebyshev approximation (Pace and LeSage 2004)
+                   if 'mc'  : Monte Carlo approximation (Barry and Pace 1999)
+                   if 'chol': sparse Cholesky, W similar to symmetric
     epsilon      : float
                    tolerance criterion used in minimize_scalar function and inverse_product
     mean_y       : float
@@ -446,14 +508,16 @@ class ML_Error(BaseML_Error):
 
     def __init__(self, y, x, w, method='full', epsilon=0.0000001,
                  spat_diag=False, vm=False, name_y=None, name_x=None,
-                 name_w=None, name_ds=None):
+                 name_w=None, name_ds=None, logdet=None, trace_rtol=None,
+                 seed=None):
         n = USER.check_arrays(y, x)
         USER.check_y(y, n)
         USER.check_weights(w, y, w_required=True)
         x_constant = USER.check_constant(x)
         method = method.upper()
         BaseML_Error.__init__(self, y=y, x=x_constant,
-                              w=w, method=method, epsilon=epsilon)
+                              w=w, method=method, epsilon=epsilon,
+                              logdet=logdet, trace_rtol=trace_rtol, seed=seed)
         self.title = "MAXIMUM LIKELIHOOD SPATIAL ERROR" + \
             " (METHOD = " + method + ")"
         self.name_ds = USER.set_name_ds(name_ds)
@@ -532,6 +596,28 @@ def err_c_loglik_ord(lam, n, y, ylag, x, xlag, evals):
     return clik
 
 
+def err_c_loglik_ld(lam, n, y, ylag, x, xlag, logdet):
+    # concentrated log-lik for error model, no constants, log-Jacobian engine
+    if isinstance(lam, np.ndarray):
+        if lam.shape == (1,1):
+            lam = lam[0][0]
+    ys = y - lam * ylag
+    xs = x - lam * xlag
+    ysys = np.dot(ys.T, ys)
+    xsxs = np.dot(xs.T, xs)
+    xsxsi = np.linalg.inv(xsxs)
+    xsys = np.dot(xs.T, ys)
+    x1 = np.dot(xsxsi, xsys)
+    x2 = np.dot(xsys.T, x1)
+    ee = ysys - x2
+    sig2 = ee[0][0] / n
+    nlsig2 = (n / 2.0) * np.log(sig2)
+    jacob = logdet(lam)
+    # this is the negative of the concentrated log lik for minimization
+    clik = nlsig2 - jacob
+    return clik
+
+
 def _test():
     import doctest
     start_suppress = np.get_printoptions()['suppress']
@@ -54,6 +54,9 @@ class ML_Error_Regimes(BaseML_Error, REGI.Regimes_Frame):
                    if 'full', brute force calculation (full matrix expressions)
                    if 'ord', Ord eigenvalue computation
                    if 'LU', LU sparse matrix decomposition
+                   if 'cheb', Chebyshev approximation (Pace and LeSage 2004)
+                   if 'mc', Monte Carlo approximation (Barry and Pace 1999)
+                   if 'chol', sparse Cholesky, W similar to symmetric
     epsilon      : float
                    tolerance criterion in mimimize_scalar function and inverse_product
     regime_err_sep : boolean
@@ -79,6 +82,20 @@ class ML_Error_Regimes(BaseML_Error, REGI.Regimes_Frame):
                    Name of dataset for use in output
     name_regimes : string
                    Name of regimes variable for use in output
+    logdet       : LogDetGrid or callable
+                   rho -> ln|I - rho W| computed for w, e.g. by
+                   ml_utils.cached_logdet, used instead of computing the
+                   log-Jacobian with method; if True, the grid cached for w
+                   and method (see ml_utils.cached_logdet); only True
+                   is allowed when regimes are estimated separately
+    trace_rtol   : float
+                   if given, the traces in the variance of lambda are
+                   estimated with ml_utils.vm_traces to this accuracy,
+                   without inverting I - lambda W; if None, exact traces
+    seed         : int
+                   seed for the random vectors of the 'cheb' and 'mc'
+                   log-Jacobian approximations; None uses numpy's global
+                   random state
 
     Attributes
     ----------
@@ -116,6 +133,9 @@ class ML_Error_Regimes(BaseML_Error, REGI.Regimes_Frame):
                    if 'full': brute force (full matrix computations)
                    if 'ord', Ord eigenvalue computation
                    if 'LU', LU sparse matrix decomposition
+                   if 'cheb': Chebyshev approximation (Pace and LeSage 2004)
+                   if 'mc'  : Monte Carlo approximation (Barry and Pace 1999)
+                   if 'chol': sparse Cholesky, W similar to symmetric
     epsilon      : float
                    tolerance criterion used in minimize_scalar function and inverse_product
     mean_y       : float
@@ -270,7 +290,8 @@ class ML_Error_Regimes(BaseML_Error, REGI.Regimes_Frame):
                  cols2regi='all', method='full', epsilon=0.0000001,
                  regime_err_sep=False, regime_lag_sep=False, cores=False, spat_diag=False,
                  vm=False, name_y=None, name_x=None,
-                 name_w=None, name_ds=None, name_regimes=None):
+                 name_w=None, name_ds=None, name_regimes=None, logdet=None,
+                 trace_rtol=None, seed=None):
 
         n = USER.check_arrays(y, x)
         USER.check_y(y, n)
@@ -298,7 +319,8 @@ class ML_Error_Regimes(BaseML_Error, REGI.Regimes_Frame):
         if regime_err_sep == True:
             if set(cols2regi) == set([True]):
                 self._error_regimes_multi(y, x, regimes, w, cores,
-                                          method, epsilon, cols2regi, vm, name_x, spat_diag)
+                                          method, epsilon, cols2regi, vm, name_x, spat_diag,
+                                          logdet=logdet, trace_rtol=trace_rtol, seed=seed)
             else:
                 raise Exception("All coefficients must vary accross regimes if regime_err_sep = True.")
         else:
@@ -311,7 +333,8 @@ class ML_Error_Regimes(BaseML_Error, REGI.Regimes_Frame):
                                                     names=name_x)
 
             BaseML_Error.__init__(
-                self, y=y, x=x, w=w, method=method, epsilon=epsilon, regimes_att=regimes_att)
+                self, y=y, x=x, w=w, method=method, epsilon=epsilon, regimes_att=regimes_att,
+                logdet=logdet, trace_rtol=trace_rtol, seed=seed)
 
             self.title = "MAXIMUM LIKELIHOOD SPATIAL ERROR - REGIMES" + \
                 " (METHOD = " + method + ")"
@@ -325,7 +348,10 @@ class ML_Error_Regimes(BaseML_Error, REGI.Regimes_Frame):
                 reg=self, w=w, vm=vm, spat_diag=spat_diag, regimes=True)
 
     def _error_regimes_multi(self, y, x, regimes, w, cores,
-                             method, epsilon, cols2regi, vm, name_x, spat_diag):
+                             method, epsilon, cols2regi, vm, name_x, spat_diag, logdet=None, trace_rtol=None, seed=None):
+        if logdet not in (None, True):
+            raise Exception("Each regime has its own W: logdet can only be "
+                            "True when regimes are estimated separately.")
 
         regi_ids = dict(
             (r, list(np.where(np.array(regimes) == r)[0])) for r in self.regimes_set)
@@ -344,10 +370,10 @@ class ML_Error_Regimes(BaseML_Error, REGI.Regimes_Frame):
             if cores:
                 pool = mp.Pool(None)
                 results_p[r] = pool.apply_async(_work_error, args=(
-                    y, x, regi_ids, r, w, method, epsilon, self.name_ds, self.name_y, name_x + ['lambda'], self.name_w, self.name_regimes, ))
+                    y, x, regi_ids, r, w, method, epsilon, self.name_ds, self.name_y, name_x + ['lambda'], self.name_w, self.name_regimes, logdet, trace_rtol, seed, ))
             else:
                 results_p[r] = _work_error(
-                    *(y, x, regi_ids, r, w, method, epsilon, self.name_ds, self.name_y, name_x + ['lambda'], self.name_w, self.name_regimes))
+                    *(y, x, regi_ids, r, w, method, epsilon, self.name_ds, self.name_y, name_x + ['lambda'], self.name_w, self.name_regimes, logdet, trace_rtol, seed))
 
         self.kryd = 0
         self.kr = len(cols2regi) + 1
@@ -398,13 +424,14 @@ class ML_Error_Regimes(BaseML_Error, REGI.Regimes_Frame):
             reg=self, multireg=self.multi, vm=vm, spat_diag=spat_diag, regimes=True, w=w)
 
 
-def _work_error(y, x, regi_ids, r, w, method, epsilon, name_ds, name_y, name_x, name_w, name_regimes):
+def _work_error(y, x, regi_ids, r, w, method, epsilon, name_ds, name_y, name_x, name_w, name_regimes, logdet=None, trace_rtol=None, seed=None):
     w_r, warn = REGI.w_regime(w, regi_ids[r], r, transform=True)
     y_r = y[regi_ids[r]]
     x_r = x[regi_ids[r]]
     x_constant = USER.check_constant(x_r)
     model = BaseML_Error(
-        y=y_r, x=x_constant, w=w_r, method=method, epsilon=epsilon)
+        y=y_r, x=x_constant, w=w_r, method=method, epsilon=epsilon,
+        logdet=logdet, trace_rtol=trace_rtol, seed=seed)
     set_warn(model, warn)
     model.w = w_r
     model.title = "MAXIMUM LIKELIHOOD SPATIAL ERROR - REGIME " + \
@@ -16,6 +16,7 @@ from . import diagnostics as DIAG
 from . import user_output as USER
 from . import summary_output as SUMMARY
 from .w_utils import symmetrize
+from .ml_utils import logdet_engine, cached_logdet, check_logdet, vm_traces
 from pysal.lib import weights
 try:
     from scipy.optimize import minimize_scalar
@@ -45,8 +46,24 @@ class BaseML_Lag(RegressionPropsY, RegressionPropsVM):
                    if 'full', brute force calculation (full matrix expressions)
                    if 'ord', Ord eigenvalue method
                    if 'LU', LU sparse matrix decomposition
+                   if 'cheb', Chebyshev approximation (Pace and LeSage 2004)
+                   if 'mc', Monte Carlo approximation (Barry and Pace 1999)
+                   if 'chol', sparse Cholesky, W similar to symmetric
     epsilon      : float
                    tolerance criterion in mimimize_scalar function and inverse_product
+    logdet       : LogDetGrid or callable
+                   rho -> ln|I - rho W| computed for w, e.g. by
+                   ml_utils.cached_logdet, used instead of computing the
+                   log-Jacobian with method; if True, the grid cached for w
+                   and method (see ml_utils.cached_logdet)
+    trace_rtol   : float
+                   if given, the traces in the variance of rho are
+                   estimated with ml_utils.vm_traces to this accuracy,
+                   without inverting I - rho W; if None, exact traces
+    seed         : int
+                   seed for the random vectors of the 'cheb' and 'mc'
+                   log-Jacobian approximations; None uses numpy's global
+                   random state
 
     Attributes
     ----------
@@ -72,6 +89,9 @@ class BaseML_Lag(RegressionPropsY, RegressionPropsVM):
                    log Jacobian method
                    if 'full': brute force (full matrix computations)
                    if 'ord' : Ord eigenvalue method
+                   if 'cheb': Chebyshev approximation (Pace and LeSage 2004)
+                   if 'mc'  : Monte Carlo approximation (Barry and Pace 1999)
+                   if 'chol': sparse Cholesky, W similar to symmetric
     epsilon      : float
                    tolerance criterion used in minimize_scalar function and inverse_product
     mean_y       : float
@@ -172,7 +192,8 @@ class BaseML_Lag(RegressionPropsY, RegressionPropsVM):
 
     """
 
-    def __init__(self, y, x, w, method='full', epsilon=0.0000001):
+    def __init__(self, y, x, w, method='full', epsilon=0.0000001, logdet=None,
+                 trace_rtol=None, seed=None):
         # set up main regression variables and spatial filters
         self.y = y
         self.x = x
@@ -193,7 +214,14 @@ class BaseML_Lag(RegressionPropsY, RegressionPropsVM):
         e1 = ylag - spdot(x, b1)
         methodML = method.upper()
         # call minimizer using concentrated log-likelihood to get rho
-        if methodML in ['FULL', 'LU', 'ORD']:
+        if logdet is True:
+            logdet = cached_logdet(w, methodML, seed=seed)
+        if logdet is not None:
+            check_logdet(logdet, w)
+            res = minimize_scalar(lag_c_loglik_ld, 0.0, bounds=(-1.0, 1.0),
+                                  args=(self.n, e0, e1, logdet),
+                                  method='bounded', tol=epsilon)
+        elif methodML in ['FULL', 'LU', 'ORD']:
             if methodML == 'FULL':
                 W = w.full()[0]     # moved here
                 res = minimize_scalar(lag_c_loglik, 0.0, bounds=(-1.0, 1.0),
@@ -221,6 +249,11 @@ class BaseML_Lag(RegressionPropsY, RegressionPropsVM):
                                       args=(
                                           self.n, e0, e1, evals), method='bounded',
                                       tol=epsilon)
+        elif methodML in ['CHEB', 'MC', 'CHOL']:
+            logdet = logdet_engine(w, methodML, seed=seed)
+            res = minimize_scalar(lag_c_loglik_ld, 0.0, bounds=(-1.0, 1.0),
+                                  args=(self.n, e0, e1, logdet),
+                                  method='bounded', tol=epsilon)
         else:
             # program will crash, need to catch
             print(("{0} is an unsupported method".format(methodML)))
@@ -253,17 +286,25 @@ class BaseML_Lag(RegressionPropsY, RegressionPropsVM):
 
         # information matrix
         # if w should be kept sparse, how can we do the following:
-        a = -self.rho * W
-        spfill_diagonal(a, 1.0)
-        ai = spinv(a)
-        wai = spdot(W, ai)
-        tr1 = wai.diagonal().sum() #same for sparse and dense
-
-        wai2 = spdot(wai, wai)
-        tr2 = wai2.diagonal().sum()
-
-        waiTwai = spdot(wai.T, wai)
-        tr3 = waiTwai.diagonal().sum()
+        if trace_rtol is None:
+            if logdet is not None:
+                # W is only needed here when the log-Jacobian did not
+                # use it
+                W = w.full()[0] if methodML == 'FULL' else w.sparse
+            a = -self.rho * W
+            spfill_diagonal(a, 1.0)
+            ai = spinv(a)
+            wai = spdot(W, ai)
+            tr1 = wai.diagonal().sum() #same for sparse and dense
+
+            wai2 = spdot(wai, wai)
+            tr2 = wai2.diagonal().sum()
+
+            waiTwai = spdot(wai.T, wai)
+            tr3 = waiTwai.diagonal().sum()
+        else:
+            tr1, tr2, tr3 = vm_traces(w.sparse, self.rho,
+                                      rtol=trace_rtol)
         ### to here
 
         wpredy = weights.lag_spatial(w, self.predy_e)
@@ -303,6 +344,9 @@ class ML_Lag(BaseML_Lag):
     method       : string
                    if 'full', brute force calculation (full matrix expressions)
                    if 'ord', Ord eigenvalue method
+                   if 'cheb', Chebyshev approximation (Pace and LeSage 2004)
+                   if 'mc', Monte Carlo approximation (Barry and Pace 1999)
+                   if 'chol', sparse Cholesky, W similar to symmetric
     epsilon      : float
                    tolerance criterion in mimimize_scalar function and inverse_product
     spat_diag    : boolean
@@ -318,6 +362,19 @@ class ML_Lag(BaseML_Lag):
                    Name of weights matrix for use in output
     name_ds      : string
                    Name of dataset for use in output
+    logdet       : LogDetGrid or callable
+                   rho -> ln|I - rho W| computed for w, e.g. by
+                   ml_utils.cached_logdet, used instead of computing the
+                   log-Jacobian with method; if True, the grid cached for w
+                   and method (see ml_utils.cached_logdet)
+    trace_rtol   : float
+                   if given, the traces in the variance of rho are
+                   estimated with ml_utils.vm_traces to this accuracy,
+                   without inverting I - rho W; if None, exact traces
+    seed         : int
+                   seed for the random vectors of the 'cheb' and 'mc'
+                   log-Jacobian approximations; None uses numpy's global
+                   random state
 
     Attributes
     ----------
@@ -342,6 +399,9 @@ class ML_Lag(BaseML_Lag):
     method       : string
                    log Jacobian method
                    if 'full': brute force (full matrix computations)
+                   if 'cheb': Chebyshev approximation (Pace and LeSage 2004)
+                   if 'mc'  : Monte Carlo approximation (Barry and Pace 1999)
+                   if 'chol': sparse Cholesky, W similar to symmetric
     epsilon      : float
                    tolerance criterion used in minimize_scalar function and inverse_product
     mean_y       : float
@@ -540,14 +600,16 @@ class ML_Lag(BaseML_Lag):
 
     def __init__(self, y, x, w, method='full', epsilon=0.0000001,
                  spat_diag=False, vm=False, name_y=None, name_x=None,
-                 name_w=None, name_ds=None):
+                 name_w=None, name_ds=None, logdet=None, trace_rtol=None,
+                 seed=None):
         n = USER.check_arrays(y, x)
         USER.check_y(y, n)
         USER.check_weights(w, y, w_required=True)
         x_constant = USER.check_constant(x)
         method = method.upper()
         BaseML_Lag.__init__(
-            self, y=y, x=x_constant, w=w, method=method, epsilon=epsilon)
+            self, y=y, x=x_constant, w=w, method=method, epsilon=epsilon,
+            logdet=logdet, trace_rtol=trace_rtol, seed=seed)
         # increase by 1 to have correct aic and sc, include rho in count
         self.k += 1
         self.title = "MAXIMUM LIKELIHOOD SPATIAL LAG" + \
@@ -601,6 +663,19 @@ def lag_c_loglik_ord(rho, n, e0, e1, evals):
     clik = nlsig2 - jacob
     return clik
 
+def lag_c_loglik_ld(rho, n, e0, e1, logdet):
+    # concentrated log-lik for lag model, no constants, log-Jacobian engine
+    if isinstance(rho, np.ndarray):
+        if rho.shape == (1,1):
+            rho = rho[0][0]
+    er = e0 - rho * e1
+    sig2 = spdot(er.T, er) / n
+    nlsig2 = (n / 2.0) * np.log(sig2)
+    jacob = logdet(rho)
+    # this is the negative of the concentrated log lik for minimization
+    clik = nlsig2 - jacob
+    return clik
+
 def _test():
     import doctest
     start_suppress = np.get_printoptions()['suppress']
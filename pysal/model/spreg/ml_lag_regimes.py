@@ -53,6 +53,9 @@ class ML_Lag_Regimes(BaseML_Lag, REGI.Regimes_Frame):
                    if 'full', brute force calculation (full matrix expressions)
                    if 'ord', Ord eigenvalue method
                    if 'LU', LU sparse matrix decomposition
+                   if 'cheb', Chebyshev approximation (Pace and LeSage 2004)
+                   if 'mc', Monte Carlo approximation (Barry and Pace 1999)
+                   if 'chol', sparse Cholesky, W similar to symmetric
     epsilon      : float
                    tolerance criterion in mimimize_scalar function and inverse_product
     regime_lag_sep: boolean
@@ -78,6 +81,20 @@ class ML_Lag_Regimes(BaseML_Lag, REGI.Regimes_Frame):
                    Name of dataset for use in output
     name_regimes : string
                    Name of regimes variable for use in output
+    logdet       : LogDetGrid or callable
+                   rho -> ln|I - rho W| computed for w, e.g. by
+                   ml_utils.cached_logdet, used instead of computing the
+                   log-Jacobian with method; if True, the grid cached for w
+                   and method (see ml_utils.cached_logdet); only True
+                   is allowed when regimes are estimated separately
+    trace_rtol   : float
+                   if given, the traces in the variance of rho are
+                   estimated with ml_utils.vm_traces to this accuracy,
+                   without inverting I - rho W; if None, exact traces
+    seed         : int
+                   seed for the random vectors of the 'cheb' and 'mc'
+                   log-Jacobian approximations; None uses numpy's global
+                   random state
 
     Attributes
     ----------
@@ -113,6 +130,9 @@ class ML_Lag_Regimes(BaseML_Lag, REGI.Regimes_Frame):
                    if 'full': brute force (full matrix computations)
                    if 'ord', Ord eigenvalue method
                    if 'LU', LU sparse matrix decomposition
+                   if 'cheb': Chebyshev approximation (Pace and LeSage 2004)
+                   if 'mc'  : Monte Carlo approximation (Barry and Pace 1999)
+                   if 'chol': sparse Cholesky, W similar to symmetric
     epsilon      : float
                    tolerance criterion used in minimize_scalar function and inverse_product
     mean_y       : float
@@ -288,7 +308,8 @@ class ML_Lag_Regimes(BaseML_Lag, REGI.Regimes_Frame):
                  cols2regi='all', method='full', epsilon=0.0000001,
                  regime_lag_sep=False, regime_err_sep=False, cores=False, spat_diag=False,
                  vm=False, name_y=None, name_x=None,
-                 name_w=None, name_ds=None, name_regimes=None):
+                 name_w=None, name_ds=None, name_regimes=None, logdet=None,
+                 trace_rtol=None, seed=None):
 
         n = USER.check_arrays(y, x)
         USER.check_y(y, n)
@@ -332,7 +353,7 @@ class ML_Lag_Regimes(BaseML_Lag, REGI.Regimes_Frame):
                                       cores=cores, cols2regi=cols2regi, method=method, epsilon=epsilon,
                                       spat_diag=spat_diag, vm=vm, name_y=name_y, name_x=name_x,
                                       name_regimes=self.name_regimes,
-                                      name_w=name_w, name_ds=name_ds)
+                                      name_w=name_w, name_ds=name_ds, logdet=logdet, trace_rtol=trace_rtol, seed=seed)
         else:
             # if regime_lag_sep == True:
             #    w = REGI.w_regimes_union(w, w_i, self.regimes_set)
@@ -341,7 +362,8 @@ class ML_Lag_Regimes(BaseML_Lag, REGI.Regimes_Frame):
                                                          regimes, constant_regi, cols2regi=cols2regi[:-1], names=name_x)
             self.name_x.append("_Global_" + USER.set_name_yend_sp(name_y))
             BaseML_Lag.__init__(
-                self, y=y, x=x, w=w, method=method, epsilon=epsilon)
+                self, y=y, x=x, w=w, method=method, epsilon=epsilon,
+                logdet=logdet, trace_rtol=trace_rtol, seed=seed)
             self.kf += 1  # Adding a fixed k to account for spatial lag in Chow
             # adding a fixed k to account for spatial lag in aic, sc
             self.k += 1
@@ -357,7 +379,10 @@ class ML_Lag_Regimes(BaseML_Lag, REGI.Regimes_Frame):
     def ML_Lag_Regimes_Multi(self, y, x, w_i, w, regi_ids,
                              cores, cols2regi, method, epsilon,
                              spat_diag, vm, name_y, name_x,
-                             name_regimes, name_w, name_ds):
+                             name_regimes, name_w, name_ds, logdet=None, trace_rtol=None, seed=None):
+        if logdet not in (None, True):
+            raise Exception("Each regime has its own W: logdet can only be "
+                            "True when regimes are estimated separately.")
         #        pool = mp.Pool(cores)
         name_x = USER.set_name_x(name_x, x) + [USER.set_name_yend_sp(name_y)]
         results_p = {}
@@ -374,10 +399,10 @@ class ML_Lag_Regimes(BaseML_Lag, REGI.Regimes_Frame):
             if cores:
                 pool = mp.Pool(None)
                 results_p[r] = pool.apply_async(_work, args=(y, x, regi_ids, r, w_i[
-                                                r], method, epsilon, name_ds, name_y, name_x, name_w, name_regimes, ))
+                                                r], method, epsilon, name_ds, name_y, name_x, name_w, name_regimes, logdet, trace_rtol, seed, ))
             else:
                 results_p[r] = _work(
-                    *(y, x, regi_ids, r, w_i[r], method, epsilon, name_ds, name_y, name_x, name_w, name_regimes))
+                    *(y, x, regi_ids, r, w_i[r], method, epsilon, name_ds, name_y, name_x, name_w, name_regimes, logdet, trace_rtol, seed))
 
         self.kryd = 0
         self.kr = len(cols2regi) + 1
@@ -431,11 +456,12 @@ class ML_Lag_Regimes(BaseML_Lag, REGI.Regimes_Frame):
             reg=self, multireg=self.multi, vm=vm, spat_diag=spat_diag, regimes=True, w=w)
 
 
-def _work(y, x, regi_ids, r, w_r, method, epsilon, name_ds, name_y, name_x, name_w, name_regimes):
+def _work(y, x, regi_ids, r, w_r, method, epsilon, name_ds, name_y, name_x, name_w, name_regimes, logdet=None, trace_rtol=None, seed=None):
     y_r = y[regi_ids[r]]
     x_r = x[regi_ids[r]]
     x_constant = USER.check_constant(x_r)
-    model = BaseML_Lag(y_r, x_constant, w_r, method=method, epsilon=epsilon)
+    model = BaseML_Lag(y_r, x_constant, w_r, method=method, epsilon=epsilon,
+                       logdet=logdet, trace_rtol=trace_rtol, seed=seed)
     model.title = "MAXIMUM LIKELIHOOD SPATIAL LAG - REGIME " + \
         str(r) + " (METHOD = " + method + ")"
     model.name_ds = name_ds
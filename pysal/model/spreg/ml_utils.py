@@ -0,0 +1,573 @@
+"""
+Log-Jacobian engines for ML estimation of spatial models.
+
+Each engine evaluates ln|I - rho W| for the concentrated log-likelihoods of
+the spatial lag and error models without a dense determinant:
+
+* 'CHEB': Chebyshev polynomial approximation; Pace and LeSage (2004)
+* 'MC'  : Monte Carlo estimation of the power series; Barry and Pace (1999)
+* 'CHOL': exact sparse Cholesky factorization of a symmetric matrix similar
+          to W
+
+:class:`LogDetGrid` tabulates any of them once per W, so that the
+log-Jacobian of repeated fits against the same weights is a spline lookup,
+and :func:`vm_traces` estimates the traces of the ML information matrix
+without inverting I - rho W.
+"""
+
+import numpy as np
+import numpy.linalg as la
+import os
+from scipy import sparse as sp
+from scipy.interpolate import InterpolatedUnivariateSpline
+from scipy.sparse.linalg import splu as SuperLU
+from .w_utils import symmetrize, w_fingerprint
+from .utils import power_expansion
+try:
+    from sksparse.cholmod import analyze
+    cholmod_available = True
+except ImportError:
+    cholmod_available = False
+
+__all__ = ["trace_moments", "LogDetCheb", "LogDetMC", "LogDetChol",
+           "LogDetLU", "LogDetOrd", "logdet_engine", "LogDetGrid",
+           "cached_logdet", "check_logdet", "vm_traces"]
+
+CHEB_ORDER = 20     # degree of the Chebyshev approximation
+MC_ORDER = 30       # terms of the power series
+MC_SAMPLES = 50     # random vectors for the trace estimates
+PROBE_BLOCK = 16    # random vectors multiplied by W at once
+GRID = np.linspace(-0.99, 0.99, 199)    # default rho grid of LogDetGrid
+TRACE_SAMPLES = 1024    # most random vectors used by vm_traces
+
+# LogDetGrid objects by (W fingerprint, method), see cached_logdet
+LOGDET_CACHE = {}
+
+
+def trace_moments(W, order, samples=MC_SAMPLES, seed=None, chebyshev=False):
+    """
+    Traces of the powers of W, or of its Chebyshev matrix polynomials.
+
+    The traces of orders 0 to 2 are exact; higher orders are estimated as
+    n x'P(W)x / x'x averaged over standard normal vectors x, as in Barry
+    and Pace (1999).
+
+    Parameters
+    ----------
+    W           : sparse matrix
+                  nxn spatial weights
+    order       : int
+                  highest power, or polynomial degree
+    samples     : int
+                  number of random vectors
+    seed        : int
+                  seed for the random vectors; None uses numpy's global
+                  random state
+    chebyshev   : boolean
+                  if True, traces of the Chebyshev polynomials T_k(W)
+                  instead of the powers W^k
+
+    Returns
+    -------
+    traces      : array
+                  (order+1,) traces for k = 0, ..., order
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from pysal.lib.weights import lat2W
+    >>> w = lat2W(3, 3)
+    >>> w.transform = 'r'
+    >>> trace_moments(w.sparse, 2).round(4).tolist()
+    [9.0, 0.0, 3.3333]
+    """
+    W = sp.csr_matrix(W)
+    n = W.shape[0]
+    if seed is None:
+        rng = np.random
+    else:
+        rng = np.random.RandomState(seed)
+    est = np.zeros(order + 1)
+    if order > 2:
+        for start in range(0, samples, PROBE_BLOCK):
+            x = rng.standard_normal((n, min(PROBE_BLOCK, samples - start)))
+            xx = (x * x).sum(axis=0)
+            prev, cur = x, W.dot(x)
+            for k in range(2, order + 1):
+                if chebyshev:
+                    prev, cur = cur, 2 * W.dot(cur) - prev
+                else:
+                    prev, cur = cur, W.dot(cur)
+                est[k] += ((x * cur).sum(axis=0) / xx).sum()
+    traces = n * est / samples
+    tr2 = W.multiply(W.T).sum()
+    exact = [n, W.diagonal().sum(), 2 * tr2 - n if chebyshev else tr2]
+    traces[:3] = exact[:order + 1]
+    return traces
+
+
+class LogDetCheb(object):
+    """
+    Chebyshev approximation of ln|I - rho W|; Pace and LeSage (2004).
+
+    ln(1 - rho x) is interpolated on [-1, 1] by a Chebyshev polynomial of
+    degree `order`, so the log-determinant is the same combination of the
+    traces of the Chebyshev matrix polynomials of W. Assumes the
+    eigenvalues of W lie in [-1, 1], as for a row-standardized W.
+
+    Parameters
+    ----------
+    W           : sparse matrix
+                  nxn spatial weights
+    order       : int
+                  degree of the approximation
+    samples     : int
+                  random vectors for the trace estimates
+    seed        : int
+                  seed for the random vectors
+
+    Attributes
+    ----------
+    traces      : array
+                  (order+1,) traces of T_k(W)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from pysal.lib.weights import lat2W
+    >>> w = lat2W(10, 10)
+    >>> w.transform = 'r'
+    >>> ld = LogDetCheb(w.sparse, seed=12345)
+    >>> exact = np.linalg.slogdet(np.eye(100) - 0.5 * w.full()[0])[1]
+    >>> abs(ld(0.5) - exact) / abs(exact) < 0.1
+    True
+    """
+
+    def __init__(self, W, order=CHEB_ORDER, samples=MC_SAMPLES, seed=None):
+        self.order = order
+        self.traces = trace_moments(W, order, samples=samples, seed=seed,
+                                    chebyshev=True)
+        theta = np.pi * (np.arange(order + 1) + 0.5) / (order + 1)
+        self._nodes = np.cos(theta)
+        self._basis = np.cos(np.outer(np.arange(order + 1), theta))
+
+    def __call__(self, rho):
+        rho = np.asarray(rho, dtype=float)
+        f = np.log(1.0 - np.multiply.outer(rho, self._nodes))
+        c = 2.0 / (self.order + 1) * np.dot(f, self._basis.T)
+        return np.dot(c, self.traces) - c[..., 0] * self.traces[0] / 2.0
+
+
+class LogDetMC(object):
+    """
+    Monte Carlo approximation of ln|I - rho W|; Barry and Pace (1999).
+
+    The power series -sum_k rho^k tr(W^k) / k is truncated at `order`, with
+    the traces estimated by :func:`trace_moments`.
+
+    Parameters
+    ----------
+    W           : sparse matrix
+                  nxn spatial weights
+    order       : int
+                  number of terms of the series
+    samples     : int
+                  random vectors for the trace estimates
+    seed        : int
+                  seed for the random vectors
+
+    Attributes
+    ----------
+    traces      : array
+                  (order+1,) traces of W^k
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from pysal.lib.weights import lat2W
+    >>> w = lat2W(10, 10)
+    >>> w.transform = 'r'
+    >>> ld = LogDetMC(w.sparse, seed=12345)
+    >>> exact = np.linalg.slogdet(np.eye(100) - 0.5 * w.full()[0])[1]
+    >>> abs(ld(0.5) - exact) / abs(exact) < 0.1
+    True
+    """
+
+    def __init__(self, W, order=MC_ORDER, samples=MC_SAMPLES, seed=None):
+        self.order = order
+        self.traces = trace_moments(W, order, samples=samples, seed=seed)
+        self._k = np.arange(1, order + 1)
+
+    def __call__(self, rho):
+        rho = np.asarray(rho, dtype=float)
+        powers = np.power.outer(rho, self._k)
+        return -np.dot(powers, self.traces[1:] / self._k)
+
+
+class LogDetChol(object):
+    """
+    Exact ln|I - rho W| from a sparse Cholesky factorization.
+
+    W must be symmetric, or row-standardized from symmetric neighbors, in
+    which case it is similar to the symmetric D^1/2 W D^-1/2 (see
+    :func:`.w_utils.symmetrize`) and I - rho W is factored through that
+    matrix. Uses CHOLMOD (scikit-sparse) when available, reusing one
+    symbolic analysis across rho, and SuperLU in symmetric mode otherwise.
+
+    Parameters
+    ----------
+    w           : pysal W object
+                  spatial weights
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from pysal.lib.weights import lat2W
+    >>> w = lat2W(10, 10)
+    >>> w.transform = 'r'
+    >>> ld = LogDetChol(w)
+    >>> exact = np.linalg.slogdet(np.eye(100) - 0.5 * w.full()[0])[1]
+    >>> np.allclose(ld(0.5), exact)
+    True
+    """
+
+    def __init__(self, w):
+        if w.asymmetry(intrinsic=True) == []:
+            S = w.sparse
+        elif w.transform.upper() == 'R' and w.asymmetry(intrinsic=False) == []:
+            S = symmetrize(w)
+        else:
+            raise Exception("CHOL requires a symmetric W, or a row-standardized"
+                            " W with symmetric neighbors")
+        self.S = sp.csc_matrix(S)
+        self.I = sp.identity(self.S.shape[0], format='csc')
+        if cholmod_available:
+            self._factor = analyze(self.I - 0.5 * self.S)
+
+    def __call__(self, rho):
+        rho = np.asarray(rho, dtype=float)
+        if rho.ndim:
+            return np.array([self(r) for r in rho.ravel()]).reshape(rho.shape)
+        a = (self.I - float(rho) * self.S).tocsc()
+        if cholmod_available:
+            return self._factor.cholesky(a).logdet()
+        LU = SuperLU(a, permc_spec='MMD_AT_PLUS_A', diag_pivot_thresh=0.0,
+                     options=dict(SymmetricMode=True))
+        return np.sum(np.log(np.abs(LU.U.diagonal())))
+
+
+class LogDetLU(object):
+    """
+    Exact ln|I - rho W| from a sparse LU factorization per rho, as in the
+    'LU' method of the ML estimators.
+
+    Parameters
+    ----------
+    W           : sparse matrix
+                  nxn spatial weights
+    """
+
+    def __init__(self, W):
+        self.W = sp.csc_matrix(W)
+        self.I = sp.identity(self.W.shape[0], format='csc')
+
+    def __call__(self, rho):
+        rho = np.asarray(rho, dtype=float)
+        if rho.ndim:
+            return np.array([self(r) for r in rho.ravel()]).reshape(rho.shape)
+        LU = SuperLU((self.I - float(rho) * self.W).tocsc())
+        return np.sum(np.log(np.abs(LU.U.diagonal())))
+
+
+class LogDetOrd(object):
+    """
+    Exact ln|I - rho W| from the eigenvalues of W; Ord (1975).
+
+    As in the 'ORD' method of the ML estimators, the eigenvalues of the
+    symmetric matrix similar to W are used when its neighbors are
+    symmetric.
+
+    Parameters
+    ----------
+    w           : pysal W object
+                  spatial weights
+
+    Attributes
+    ----------
+    evals       : array
+                  (n,) eigenvalues of W
+    """
+
+    def __init__(self, w):
+        if w.asymmetry(intrinsic=False) == []:
+            self.evals = la.eigvalsh(np.array(symmetrize(w).todense()))
+        else:
+            self.evals = la.eigvals(w.full()[0])
+
+    def __call__(self, rho):
+        rho = np.asarray(rho, dtype=float)
+        jacob = np.log(1 - np.multiply.outer(rho, self.evals)).sum(axis=-1)
+        return np.real(jacob)
+
+
+def logdet_engine(w, method, seed=None):
+    """
+    Log-Jacobian engine for an ML estimation method.
+
+    Parameters
+    ----------
+    w           : pysal W object
+                  spatial weights
+    method      : string
+                  'CHEB', 'MC', 'CHOL', 'LU', or 'ORD' and 'FULL', both
+                  from the eigenvalues
+    seed        : int
+                  seed for the random vectors of 'CHEB' and 'MC'; None
+                  uses numpy's global random state
+
+    Returns
+    -------
+    logdet      : callable
+                  rho -> ln|I - rho W|
+    """
+    method = method.upper()
+    if method == 'CHEB':
+        return LogDetCheb(w.sparse, seed=seed)
+    elif method == 'MC':
+        return LogDetMC(w.sparse, seed=seed)
+    elif method == 'CHOL':
+        return LogDetChol(w)
+    elif method == 'LU':
+        return LogDetLU(w.sparse)
+    elif method in ['ORD', 'FULL']:
+        return LogDetOrd(w)
+    raise Exception("{0} is an unsupported method".format(method))
+
+
+class LogDetGrid(object):
+    """
+    ln|I - rho W| tabulated on a grid of rho and interpolated by a cubic
+    spline.
+
+    The grid is computed once for a W with any log-Jacobian method, and the
+    object can be stored (:meth:`save`, :meth:`load`) and passed as
+    `logdet` to ML_Lag, ML_Error and their regimes variants, which then
+    skip the log-Jacobian computation.
+
+    Parameters
+    ----------
+    w           : pysal W object
+                  spatial weights; not needed when values are given
+    method      : string
+                  log-Jacobian method used to fill the grid, see
+                  :func:`logdet_engine`
+    grid        : array
+                  increasing values of rho; default GRID, -0.99 to 0.99 by
+                  0.01
+    values      : array
+                  ln|I - rho W| on the grid, if already computed
+    fingerprint : string
+                  fingerprint of the W the values were computed for
+    seed        : int
+                  seed of the log-Jacobian method, see :func:`logdet_engine`
+
+    Attributes
+    ----------
+    fingerprint : string
+                  :func:`.w_utils.w_fingerprint` of W
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from pysal.lib.weights import lat2W
+    >>> w = lat2W(10, 10)
+    >>> w.transform = 'r'
+    >>> ld = LogDetGrid(w, method='CHOL')
+    >>> exact = np.linalg.slogdet(np.eye(100) - 0.505 * w.full()[0])[1]
+    >>> abs(ld(0.505) - exact) < 1e-6
+    True
+    """
+
+    def __init__(self, w=None, method='CHOL', grid=None, values=None,
+                 fingerprint=None, seed=None):
+        self.method = method.upper()
+        self.grid = np.asarray(GRID if grid is None else grid, dtype=float)
+        if values is None:
+            values = logdet_engine(w, self.method, seed=seed)(self.grid)
+            fingerprint = w_fingerprint(w)
+        self.values = np.asarray(values, dtype=float)
+        self.fingerprint = fingerprint
+        self._spline = InterpolatedUnivariateSpline(self.grid, self.values,
+                                                    k=3)
+
+    def __call__(self, rho):
+        rho = np.asarray(rho, dtype=float)
+        values = self._spline(rho.ravel()).reshape(rho.shape)
+        if rho.ndim:
+            return values
+        return float(values)
+
+    def save(self, filename):
+        """
+        Write the grid to a numpy .npz file.
+        """
+        with open(filename, 'wb') as f:
+            np.savez(f, grid=self.grid, values=self.values,
+                     method=np.array(self.method),
+                     fingerprint=np.array(self.fingerprint or ''))
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Read a grid written by :meth:`save`.
+        """
+        with np.load(filename) as f:
+            return cls(method=str(f['method']), grid=f['grid'],
+                       values=f['values'],
+                       fingerprint=str(f['fingerprint']) or None)
+
+
+def cached_logdet(w, method='CHOL', filename=None, seed=None):
+    """
+    :class:`LogDetGrid` of a W, computed at most once per W and method.
+
+    Grids are kept in LOGDET_CACHE, keyed by the fingerprint of W, so that
+    W objects with the same weights share them. If filename is given, the
+    grid is read from it when it was computed for the same W and method,
+    and written to it otherwise.
+
+    Parameters
+    ----------
+    w           : pysal W object
+                  spatial weights
+    method      : string
+                  log-Jacobian method, see :func:`logdet_engine`
+    filename    : string
+                  path of a .npz file storing the grid
+    seed        : int
+                  seed of the log-Jacobian method used if the grid is
+                  computed, see :func:`logdet_engine`
+
+    Returns
+    -------
+    logdet      : LogDetGrid
+
+    Examples
+    --------
+    >>> from pysal.lib.weights import lat2W
+    >>> w = lat2W(10, 10)
+    >>> w.transform = 'r'
+    >>> ld = cached_logdet(w)
+    >>> w2 = lat2W(10, 10)
+    >>> w2.transform = 'r'
+    >>> cached_logdet(w2) is ld
+    True
+    """
+    key = (w_fingerprint(w), method.upper())
+    if key in LOGDET_CACHE:
+        return LOGDET_CACHE[key]
+    ld = None
+    if filename is not None and os.path.exists(filename):
+        ld = LogDetGrid.load(filename)
+        if (ld.fingerprint, ld.method) != key:
+            ld = None
+    if ld is None:
+        ld = LogDetGrid(w, method=method, seed=seed)
+        if filename is not None:
+            ld.save(filename)
+    LOGDET_CACHE[key] = ld
+    return ld
+
+
+def check_logdet(logdet, w):
+    """
+    Raise an exception if logdet was computed for weights other than w.
+    """
+    fingerprint = getattr(logdet, 'fingerprint', None)
+    if fingerprint is not None and fingerprint != w_fingerprint(w):
+        raise Exception("logdet was computed for a different W")
+
+
+def vm_traces(W, rho, rtol=0.01, max_samples=TRACE_SAMPLES, seed=None,
+              threshold=0.0000001):
+    """
+    Stochastic estimates of the traces in the information matrix of the ML
+    lag and error models.
+
+    With A = I - rho W and B = W A^-1, returns tr(B), tr(BB) and tr(B'B),
+    estimated as the means of z'Bz, (B'z)'(Bz) and (Bz)'(Bz) over Rademacher
+    vectors z (Hutchinson 1990). A^-1 and A'^-1 are applied to the vectors
+    by power expansion, so only products with the sparse W are needed.
+    Vectors are drawn in blocks until the standard errors of all three
+    estimates are below rtol times the largest trace.
+
+    Parameters
+    ----------
+    W           : sparse matrix
+                  nxn spatial weights
+    rho         : float
+                  spatial parameter
+    rtol        : float
+                  accuracy target, relative to the largest trace
+    max_samples : int
+                  most random vectors to draw
+    seed        : int
+                  seed for the random vectors; None uses numpy's global
+                  random state
+    threshold   : float
+                  convergence criterion of the power expansion
+
+    Returns
+    -------
+    tr1, tr2, tr3 : floats
+                  estimates of tr(B), tr(BB) and tr(B'B)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from pysal.lib.weights import lat2W
+    >>> w = lat2W(10, 10)
+    >>> w.transform = 'r'
+    >>> W = w.full()[0]
+    >>> B = np.dot(W, np.linalg.inv(np.eye(100) - 0.5 * W))
+    >>> exact = np.array([np.trace(B), np.trace(np.dot(B, B)), np.trace(np.dot(B.T, B))])
+    >>> est = np.array(vm_traces(w.sparse, 0.5, rtol=0.005, seed=12345))
+    >>> (np.abs(est - exact) < 0.05 * exact.max()).all()
+    True
+    """
+    W = sp.csr_matrix(W)
+    Wt = W.T.tocsr()
+    n = W.shape[0]
+    if seed is None:
+        rng = np.random
+    else:
+        rng = np.random.RandomState(seed)
+    blocks = []
+    m = 0
+    while m < max_samples:
+        p = min(PROBE_BLOCK, max_samples - m)
+        z = rng.randint(0, 2, size=(n, p)) * 2.0 - 1.0
+        bz = W.dot(power_expansion(W, z, rho, threshold=threshold))
+        btz = power_expansion(Wt, Wt.dot(z), rho, threshold=threshold)
+        blocks.append(np.vstack(((z * bz).sum(axis=0),
+                                 (btz * bz).sum(axis=0),
+                                 (bz * bz).sum(axis=0))))
+        m += p
+        if len(blocks) > 1:
+            values = np.hstack(blocks)
+            se = values.std(axis=1, ddof=1) / np.sqrt(m)
+            if (se <= rtol * np.abs(values.mean(axis=1)).max()).all():
+                break
+    tr1, tr2, tr3 = np.hstack(blocks).mean(axis=1)
+    return tr1, tr2, tr3
+
+
+def _test():
+    import doctest
+    start_suppress = np.get_printoptions()['suppress']
+    np.set_printoptions(suppress=True)
+    doctest.testmod()
+    np.set_printoptions(suppress=start_suppress)
+
+if __name__ == '__main__':
+    _test()
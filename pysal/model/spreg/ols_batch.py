@@ -0,0 +1,269 @@
+"""Ordinary Least Squares for many dependent variables sharing X and W."""
+
+import numpy as np
+import numpy.linalg as la
+from scipy import stats
+from . import user_output as USER
+from . import diagnostics_sp as DIAGSP
+from .utils import spdot
+from .w_utils import w_moments
+
+__all__ = ["OLS_Batch"]
+
+chisqprob = lambda chisq, df: stats.chi2.sf(chisq, df)
+
+
+class OLS_Batch:
+
+    """
+    Ordinary least squares for m dependent variables regressed on the same
+    explanatory variables, with the spatial diagnostics of OLS for each of
+    them.
+
+    X'X is inverted once and every quantity that depends only on X and W
+    (the trace of (W'+W)W, the expectation and variance of Moran's I) is
+    computed once, while coefficients, residuals, LM tests and Moran's I are
+    obtained for all the dependent variables at once with matrix
+    operations. Results are kept as arrays with one column per dependent
+    variable and summarized in a table, rather than as m OLS objects.
+
+    Parameters
+    ----------
+    y            : array
+                   nxm array with one column for each dependent variable
+    x            : array
+                   Two dimensional array with n rows and one column for each
+                   independent (exogenous) variable, excluding the constant
+    w            : pysal W object
+                   Spatial weights object (required if running spatial
+                   diagnostics)
+    sig2n_k      : boolean
+                   If True, then use n-k to estimate sigma^2. If False, use n.
+    spat_diag    : boolean
+                   If True, then compute Lagrange multiplier tests (requires
+                   w). Note: see moran for further tests.
+    moran        : boolean
+                   If True, compute Moran's I on the residuals. Note:
+                   requires spat_diag=True.
+    name_y       : list of strings
+                   Names of dependent variables for use in output
+    name_x       : list of strings
+                   Names of independent variables for use in output
+    name_w       : string
+                   Name of weights matrix for use in output
+    name_ds      : string
+                   Name of dataset for use in output
+
+    Attributes
+    ----------
+    betas        : array
+                   kxm array of estimated coefficients
+    u            : array
+                   nxm array of residuals
+    predy        : array
+                   nxm array of predicted y values
+    n            : integer
+                   Number of observations
+    k            : integer
+                   Number of variables for which coefficients are estimated
+                   (including the constant)
+    m            : integer
+                   Number of dependent variables
+    y            : array
+                   nxm array of dependent variables
+    x            : array
+                   Two dimensional array with n rows and one column for each
+                   independent (exogenous) variable, including the constant
+    xtx          : array
+                   X'X
+    xtxi         : array
+                   (X'X)^-1
+    utu          : array
+                   m sums of squared residuals
+    sig2n        : array
+                   m sigma squared, computed with n in the denominator
+    sig2         : array
+                   m sigma squared, as used in the standard errors
+    std_err      : array
+                   kxm standard errors of betas
+    t_stat       : array
+                   kxm t statistics of betas
+    t_p          : array
+                   kxm p-values of t_stat
+    r2           : array
+                   m R squared
+    ar2          : array
+                   m adjusted R squared
+    logll        : array
+                   m log likelihoods
+    lm_error     : array
+                   2xm Lagrange multiplier tests for spatial error model;
+                   statistics in the first row, p-values in the second
+                   (if spat_diag)
+    lm_lag       : array
+                   2xm Lagrange multiplier tests for spatial lag model
+                   (if spat_diag)
+    rlm_error    : array
+                   2xm robust Lagrange multiplier tests for spatial error
+                   model (if spat_diag)
+    rlm_lag      : array
+                   2xm robust Lagrange multiplier tests for spatial lag
+                   model (if spat_diag)
+    lm_sarma     : array
+                   2xm Lagrange multiplier tests for spatial SARMA model
+                   (if spat_diag)
+    moran_res    : array
+                   3xm Moran's I of the residuals, its standardized value
+                   and p-value (if moran)
+    table        : recarray
+                   one record per dependent variable with its name, r2,
+                   ar2, sig2, logll and, where computed, the spatial
+                   diagnostics and their p-values
+    name_y       : list of strings
+                   Names of dependent variables for use in output
+    name_x       : list of strings
+                   Names of independent variables for use in output
+    name_w       : string
+                   Name of weights matrix for use in output
+    name_ds      : string
+                   Name of dataset for use in output
+    title        : string
+                   Name of the regression method used
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import pysal.lib
+    >>> db = pysal.lib.io.open(pysal.lib.examples.get_path('columbus.dbf'),'r')
+    >>> y = np.array([db.by_col('HOVAL'), db.by_col('CRIME')]).T
+    >>> X = np.array([db.by_col('INC')]).T
+    >>> w = pysal.lib.weights.Rook.from_shapefile(pysal.lib.examples.get_path("columbus.shp"))
+    >>> w.transform = 'r'
+    >>> ols = OLS_Batch(y, X, w, spat_diag=True, moran=True, name_y=['hoval', 'crime'], name_x=['income'])
+    >>> ols.betas.shape
+    (2, 2)
+    >>> ols.table['name_y'].tolist()
+    ['hoval', 'crime']
+    >>> ols.table.dtype.names[:5]
+    ('name_y', 'r2', 'ar2', 'sig2', 'logll')
+
+    """
+
+    def __init__(self, y, x, w=None, sig2n_k=True, spat_diag=False,
+                 moran=False, name_y=None, name_x=None, name_w=None,
+                 name_ds=None):
+        n = USER.check_arrays(x)
+        _check_y(y, n)
+        USER.check_weights(w, y)
+        USER.check_spat_diag(spat_diag, w)
+        x_constant = USER.check_constant(x)
+
+        self.x = x_constant
+        self.y = y
+        self.n, self.k = self.x.shape
+        self.m = y.shape[1]
+        self.xtx = spdot(self.x.T, self.x)
+        self.xtxi = la.inv(self.xtx)
+        self.betas = np.dot(self.xtxi, spdot(self.x.T, y))
+        self.predy = spdot(self.x, self.betas)
+        self.u = y - self.predy
+
+        self.utu = (self.u ** 2).sum(axis=0)
+        self.sig2n = self.utu / self.n
+        self.sig2n_k = self.utu / (self.n - self.k)
+        if sig2n_k:
+            self.sig2 = self.sig2n_k
+        else:
+            self.sig2 = self.sig2n
+        self.std_err = np.sqrt(np.outer(self.xtxi.diagonal(), self.sig2))
+        self.t_stat = self.betas / self.std_err
+        self.t_p = stats.t.sf(np.abs(self.t_stat), self.n - self.k) * 2
+        tss = ((y - y.mean(axis=0)) ** 2).sum(axis=0)
+        self.r2 = 1 - self.utu / tss
+        self.ar2 = 1 - (1 - self.r2) * (self.n - 1) / (self.n - self.k)
+        self.logll = -0.5 * self.n * (np.log(2 * np.pi) + np.log(self.sig2n)
+                                      + 1)
+
+        self.title = "ORDINARY LEAST SQUARES - BATCH"
+        self.name_ds = USER.set_name_ds(name_ds)
+        if name_y is None:
+            name_y = ['dep_var_%d' % i for i in range(self.m)]
+        self.name_y = list(name_y)
+        self.name_x = USER.set_name_x(name_x, x)
+        self.name_w = USER.set_name_w(name_w, w)
+        if spat_diag:
+            self._spat_diag(w, moran)
+        self.table = self._table(spat_diag, moran)
+
+    def _spat_diag(self, w, moran):
+        """
+        LM tests as in diagnostics_sp.LMtests, and Moran's I as in
+        diagnostics_sp.MoranRes, for all the residuals at once
+        """
+        ws = w.sparse
+        wu = ws * self.u
+        utwuDs = (self.u * wu).sum(axis=0) / self.sig2n
+        utwyDs = (self.u * (ws * self.y)).sum(axis=0) / self.sig2n
+        t = w_moments(w)['trcWtW_WW']
+        wxb = ws * self.predy
+        xwxb = spdot(self.x.T, wxb)
+        num = (wxb ** 2).sum(axis=0) - \
+            (xwxb * np.dot(self.xtxi, xwxb)).sum(axis=0) + t * self.sig2n
+        nj = num / self.sig2n
+
+        lme = utwuDs ** 2 / t
+        lml = utwyDs ** 2 / nj
+        rlme = (utwuDs - (t * utwyDs) / nj) ** 2 / (t * (1. - (t / nj)))
+        rlml = (utwyDs - utwuDs) ** 2 / (nj - t)
+        sarma = rlml + lme
+        self.lm_error = np.vstack((lme, chisqprob(lme, 1)))
+        self.lm_lag = np.vstack((lml, chisqprob(lml, 1)))
+        self.rlm_error = np.vstack((rlme, chisqprob(rlme, 1)))
+        self.rlm_lag = np.vstack((rlml, chisqprob(rlml, 1)))
+        self.lm_sarma = np.vstack((sarma, chisqprob(sarma, 2)))
+
+        if moran:
+            # expectation and variance of I only depend on X and W
+            cache = DIAGSP.spDcache(self, w)
+            mi = (w.n * (self.u * wu).sum(axis=0)) / (w.s0 * self.utu)
+            ei = DIAGSP.get_eI(self, w, cache)
+            vi = DIAGSP.get_vI(self, w, ei, cache)
+            zi, p_norm = DIAGSP.get_zI(mi, ei, vi)
+            self.moran_res = np.vstack((mi, zi, p_norm))
+
+    def _table(self, spat_diag, moran):
+        names = ['name_y', 'r2', 'ar2', 'sig2', 'logll']
+        columns = [np.array(self.name_y), self.r2, self.ar2, self.sig2,
+                   self.logll]
+        if spat_diag:
+            for name in ['lm_error', 'lm_lag', 'rlm_error', 'rlm_lag',
+                         'lm_sarma']:
+                names.extend([name, name + '_p'])
+                columns.extend(getattr(self, name))
+        if spat_diag and moran:
+            names.extend(['moran_i', 'moran_z', 'moran_p'])
+            columns.extend(self.moran_res)
+        return np.rec.fromarrays(columns, names=names)
+
+
+def _check_y(y, n):
+    """Check that y is an nxm array without missing values"""
+    if not isinstance(y, np.ndarray):
+        raise Exception("y must be a numpy array")
+    if len(y.shape) != 2:
+        raise Exception("all input arrays must have exactly two dimensions")
+    if y.shape[0] != n:
+        raise Exception("arrays not all of same length")
+    if not np.isfinite(y).all():
+        raise Exception("one or more input arrays have missing/NaN values")
+
+
+def _test():
+    import doctest
+    start_suppress = np.get_printoptions()['suppress']
+    np.set_printoptions(suppress=True)
+    doctest.testmod()
+    np.set_printoptions(suppress=start_suppress)
+
+if __name__ == '__main__':
+    _test()
@@ -6,6 +6,7 @@ from pysal.model.spreg.ols import OLS as OLS
 from pysal.model.spreg.twosls import TSLS as TSLS
 from pysal.model.spreg.twosls_sp import GM_Lag
 from pysal.model.spreg.diagnostics_sp import LMtests, MoranRes, spDcache, AKtest
+from pysal.model.spreg.w_utils import w_moments
 from pysal.lib.common import RTOL
 
 class TestLMtests(unittest.TestCase):
@@ -50,6 +51,17 @@ class TestLMtests(unittest.TestCase):
         sarma = np.array([ 4.190739,  0.123025])
         np.testing.assert_allclose(lms.sarma, sarma, RTOL)
 
+    def test_w_moments(self):
+        lms = LMtests(self.ols, self.w)
+        self.assertTrue('moments' in self.w._cache)
+        wsp = pysal.lib.weights.WSP(self.w.sparse)
+        np.testing.assert_allclose(LMtests(self.ols, wsp).sarma, lms.sarma,
+                                   RTOL)
+        m = w_moments(self.w.sparse)
+        self.assertFalse('trcW3' in m)
+        for key, value in m.items():
+            self.assertAlmostEqual(value, self.w.moments[key])
+
 
 class TestMoranRes(unittest.TestCase):
     def setUp(self):
@@ -21,9 +21,9 @@ class TestMLError(unittest.TestCase):
         ww.close()
         self.w.transform = 'r'
 
-    def _estimate_and_compare(self, method='FULL', RTOL=RTOL):
+    def _estimate_and_compare(self, method='FULL', RTOL=RTOL, logdet=None):
         reg = ML_Error(self.y,self.x,w=self.w,name_y=self.y_name,name_x=self.x_names,\
-               name_w="south_q.gal", method=method)
+               name_w="south_q.gal", method=method, logdet=logdet)
         betas = np.array([[ 6.1492], [ 4.4024], [ 1.7784], [-0.3781], [ 0.4858], [ 0.2991]])
         np.testing.assert_allclose(reg.betas,betas,RTOL + .0001)
         u = np.array([-5.97649777])
@@ -75,6 +75,27 @@ class TestMLError(unittest.TestCase):
     def test_LU(self):
         self._estimate_and_compare(method='LU', RTOL=RTOL*10)
 
+    def test_CHOL(self):
+        self._estimate_and_compare(method='CHOL', RTOL=RTOL*10)
+
+    def test_logdet(self):
+        self._estimate_and_compare(method='LU', RTOL=RTOL*10, logdet=True)
+
+    def test_seed(self):
+        for method in ('MC', 'CHEB'):
+            reg = ML_Error(self.y, self.x, w=self.w, method=method, seed=123)
+            reg2 = ML_Error(self.y, self.x, w=self.w, method=method, seed=123)
+            np.testing.assert_array_equal(reg.betas, reg2.betas)
+            np.testing.assert_array_equal(reg.vm, reg2.vm)
+
+    def test_trace_rtol(self):
+        exact = ML_Error(self.y, self.x, w=self.w, method='LU')
+        np.random.seed(12345)
+        reg = ML_Error(self.y, self.x, w=self.w, method='LU', trace_rtol=0.005)
+        np.testing.assert_allclose(reg.betas, exact.betas, RTOL)
+        np.testing.assert_allclose(reg.vm.diagonal(), exact.vm.diagonal(),
+                                   rtol=0.05)
+
     def test_ord(self):
         reg = ML_Error(self.y, self.x, w=self.w,
                      name_y=self.y_name, name_x=self.x_names,
@@ -117,5 +117,26 @@ class TestMLError(unittest.TestCase):
     def test_LU(self):
         self._estimate_and_compare(method='LU')
 
+    def test_CHOL(self):
+        self._estimate_and_compare(method='CHOL')
+
+    def test_logdet(self):
+        self._estimate_and_compare(method='FULL', logdet=True)
+
+    def test_seed(self):
+        for method in ('MC', 'CHEB'):
+            reg = ML_Lag(self.y, self.x, w=self.w, method=method, seed=123)
+            reg2 = ML_Lag(self.y, self.x, w=self.w, method=method, seed=123)
+            np.testing.assert_array_equal(reg.betas, reg2.betas)
+            np.testing.assert_array_equal(reg.vm, reg2.vm)
+
+    def test_trace_rtol(self):
+        exact = ML_Lag(self.y, self.x, w=self.w, method='LU')
+        np.random.seed(12345)
+        reg = ML_Lag(self.y, self.x, w=self.w, method='LU', trace_rtol=0.005)
+        np.testing.assert_allclose(reg.betas, exact.betas, RTOL)
+        np.testing.assert_allclose(reg.vm.diagonal(), exact.vm.diagonal(),
+                                   rtol=0.05)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import os
+import shutil
+import tempfile
+import pysal.lib
+import numpy as np
+from scipy import sparse
+from ..ml_utils import trace_moments, LogDetCheb, LogDetMC, LogDetChol, \
+     LogDetGrid, cached_logdet, check_logdet, vm_traces, LOGDET_CACHE
+from ..w_utils import w_fingerprint
+from pysal.lib.common import RTOL
+from warnings import filterwarnings
+filterwarnings('ignore', category=sparse.SparseEfficiencyWarning)
+
+class TestLogDet(unittest.TestCase):
+    def setUp(self):
+        ww = pysal.lib.io.open(pysal.lib.examples.get_path("baltim_q.gal"))
+        self.w = ww.read()
+        ww.close()
+        self.w.transform = 'r'
+        self.W = self.w.full()[0]
+        self.rhos = np.array([-0.5, 0.0, 0.3, 0.6])
+        self.exact = np.array([np.linalg.slogdet(np.eye(self.w.n) - r * self.W)[1]
+                               for r in self.rhos])
+
+    def test_trace_moments(self):
+        known = [np.trace(np.linalg.matrix_power(self.W, k)) for k in range(3)]
+        np.testing.assert_allclose(trace_moments(self.w.sparse, 2), known,
+                                   RTOL)
+        est = trace_moments(self.w.sparse, 4, samples=200, seed=12345)
+        W4 = np.trace(np.linalg.matrix_power(self.W, 4))
+        np.testing.assert_allclose(est[4], W4, rtol=0.2)
+
+    def test_chol(self):
+        ld = LogDetChol(self.w)
+        np.testing.assert_allclose(ld(self.rhos), self.exact, RTOL)
+        self.assertAlmostEqual(ld(0.3), self.exact[2])
+        w = pysal.lib.weights.W({0: [1], 1: [2], 2: [0]})
+        self.assertRaises(Exception, LogDetChol, w)
+
+    def test_approximations(self):
+        for engine in [LogDetCheb, LogDetMC]:
+            ld = engine(self.w.sparse, seed=12345)
+            approx = ld(self.rhos)
+            self.assertEqual(approx.shape, self.rhos.shape)
+            self.assertEqual(approx[1], 0.)
+            np.testing.assert_allclose(approx, [ld(r) for r in self.rhos])
+            np.testing.assert_allclose(approx, self.exact, rtol=0.1, atol=1e-8)
+
+    def test_grid(self):
+        ld = LogDetGrid(self.w, method='LU')
+        np.testing.assert_allclose(ld(self.rhos), self.exact, RTOL, atol=1e-6)
+        self.assertEqual(ld.fingerprint, w_fingerprint(self.w))
+        tmp = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmp, 'baltim_logdet.npz')
+            ld.save(filename)
+            ld2 = LogDetGrid.load(filename)
+            self.assertEqual((ld2.method, ld2.fingerprint),
+                             (ld.method, ld.fingerprint))
+            np.testing.assert_array_equal(ld2(self.rhos), ld(self.rhos))
+
+            LOGDET_CACHE.clear()
+            cached = cached_logdet(self.w, 'LU', filename=filename)
+            np.testing.assert_array_equal(cached.values, ld.values)
+            self.assertTrue(cached_logdet(self.w, 'LU') is cached)
+        finally:
+            shutil.rmtree(tmp)
+            LOGDET_CACHE.clear()
+
+        check_logdet(ld, self.w)
+        w = pysal.lib.weights.lat2W(3, 3)
+        self.assertRaises(Exception, check_logdet, ld, w)
+
+    def test_vm_traces(self):
+        B = np.dot(self.W, np.linalg.inv(np.eye(self.w.n) - 0.6 * self.W))
+        exact = np.array([np.trace(B), np.trace(np.dot(B, B)),
+                          np.trace(np.dot(B.T, B))])
+        est = np.array(vm_traces(self.w.sparse, 0.6, rtol=0.005, seed=12345))
+        np.testing.assert_allclose(est, exact, atol=0.02 * exact.max())
+        few = vm_traces(self.w.sparse, 0.6, max_samples=16, seed=12345)
+        self.assertEqual(len(few), 3)
+
+if __name__ == '__main__':
+    unittest.main()
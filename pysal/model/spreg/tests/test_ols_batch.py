@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+import pysal.lib
+from pysal.model.spreg.ols import OLS
+from pysal.model.spreg.ols_batch import OLS_Batch
+from pysal.lib.common import RTOL
+
+class TestOLS_Batch(unittest.TestCase):
+    def setUp(self):
+        db = pysal.lib.io.open(pysal.lib.examples.get_path("columbus.dbf"),"r")
+        self.y = np.array([db.by_col(var) for var in ["HOVAL", "CRIME", "OPEN"]]).T
+        self.X = np.array([db.by_col("INC"), db.by_col("PLUMB")]).T
+        self.w = pysal.lib.weights.Rook.from_shapefile(pysal.lib.examples.get_path("columbus.shp"))
+        self.w.transform = 'r'
+
+    def test_OLS_Batch(self):
+        batch = OLS_Batch(self.y, self.X, self.w, spat_diag=True, moran=True,
+                          name_y=['hoval', 'crime', 'open'])
+        self.assertEqual(batch.table.shape, (3,))
+        self.assertEqual(batch.table['name_y'].tolist(), ['hoval', 'crime', 'open'])
+        for i in range(3):
+            ols = OLS(self.y[:, i:i + 1], self.X, self.w, spat_diag=True,
+                      moran=True)
+            np.testing.assert_allclose(batch.betas[:, i:i + 1], ols.betas, RTOL)
+            np.testing.assert_allclose(batch.u[:, i:i + 1], ols.u, RTOL)
+            np.testing.assert_allclose(batch.std_err[:, i], ols.std_err, RTOL)
+            np.testing.assert_allclose(batch.t_stat[:, i],
+                                       [t for t, p in ols.t_stat], RTOL)
+            np.testing.assert_allclose(batch.t_p[:, i],
+                                       [p for t, p in ols.t_stat], RTOL)
+            row = batch.table[i]
+            np.testing.assert_allclose([row.r2, row.ar2, row.sig2, row.logll],
+                                       [ols.r2, ols.ar2, ols.sig2, ols.logll],
+                                       RTOL)
+            for name in ['lm_error', 'lm_lag', 'rlm_error', 'rlm_lag',
+                         'lm_sarma']:
+                np.testing.assert_allclose(getattr(batch, name)[:, i],
+                                           getattr(ols, name), RTOL)
+            np.testing.assert_allclose(batch.moran_res[:, i], ols.moran_res,
+                                       RTOL)
+
+    def test_no_spat_diag(self):
+        batch = OLS_Batch(self.y, self.X)
+        self.assertEqual(batch.table.dtype.names,
+                         ('name_y', 'r2', 'ar2', 'sig2', 'logll'))
+        self.assertEqual(batch.name_y, ['dep_var_0', 'dep_var_1', 'dep_var_2'])
+        self.assertRaises(Exception, OLS_Batch, self.y[:, 0], self.X)
+        batch = OLS_Batch(self.y, self.X, self.w, moran=True)
+        self.assertFalse(hasattr(batch, 'moran_res'))
+        self.assertEqual(len(batch.table.dtype.names), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
+import hashlib
 import numpy as np
 import scipy.sparse as SPARSE
+from pysal.lib.weights.weights import _moments
 
 
 def symmetrize(w):
@@ -24,3 +26,55 @@ def symmetrize(w):
     D12 = SPARSE.spdiags(d, [0], w.n, w.n)
     w.transform = 'r'
     return D12 * w.sparse * Di12
+
+
+def w_fingerprint(w):
+    """Fingerprint of the weights matrix of w
+
+    Two W objects get the same fingerprint when their (transformed) sparse
+    weights matrices are equal, so that results computed for a W can be
+    reused for another with the same weights.
+
+    Parameters
+    ----------
+    w: weights object
+
+    Returns
+    -------
+    a hexadecimal SHA-1 digest of the CSR arrays of w.sparse
+
+    """
+    W = SPARSE.csr_matrix(w.sparse)
+    if not W.has_sorted_indices:
+        W = W.sorted_indices()
+    h = hashlib.sha1()
+    h.update(np.array(W.shape, dtype=np.int64).tobytes())
+    h.update(np.asarray(W.indptr, dtype=np.int64).tobytes())
+    h.update(np.asarray(W.indices, dtype=np.int64).tobytes())
+    h.update(np.asarray(W.data, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+def w_moments(w):
+    """Traces of powers and cross products of a weights matrix
+
+    For a weights object these are w.moments, computed once per object and
+    read back from WBIN files. A sparse matrix, as passed to the base
+    regression classes, has nowhere to keep them: only the traces that do
+    not need WW are computed, which takes a pass over its nonzeros.
+
+    Parameters
+    ----------
+    w: weights object or sparse matrix
+
+    Returns
+    -------
+    a dictionary with the traces of W, WW, W'W and W'W + WW, keyed 'trcW',
+    'trcW2', 'trcWtW' and 'trcWtW_WW', and for weights objects those of
+    WWW and WWWW, keyed 'trcW3' and 'trcW4'
+
+    """
+    try:
+        return w.moments
+    except AttributeError:
+        return _moments(w, powers=False)